@@ -0,0 +1 @@
+"""Scaling benchmarks for RecommendationSystem and SeasonalMenu. Run with: python -m benchmarks.run --help"""
@@ -0,0 +1,192 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak memory is then not reported
+    resource = None
+
+from benchmarks.synthetic import SyntheticGenerator
+from catalog_loader import FOOD_FIELDS
+from main import RecommendationSystem
+from seasonal_menu_items import SeasonalMenu
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+ENTRY_POINTS = ["addFood", "order_food", "rate_dish", "cuisine_based_recommendations", "personalized_recommendations",
+                "recommend_based_on_nutrition", "pair_recommendations", "get_seasonal_items"]
+
+
+def summarize(timings_ns: List[int]) -> Dict[str, float]:
+    """Throughput and latency percentiles of a list of per-call timings in nanoseconds."""
+    if not timings_ns:
+        return {"ops": 0}
+    ordered = sorted(timings_ns)
+    total = sum(ordered)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] / 1000
+
+    return {
+        "ops": len(ordered),
+        "total_s": round(total / 1e9, 6),
+        "throughput_ops_s": round(len(ordered) / (total / 1e9), 1) if total else float("inf"),
+        "p50_us": round(percentile(0.50), 2),
+        "p99_us": round(percentile(0.99), 2),
+    }
+
+
+def timed(calls: List[Callable[[], object]]) -> List[int]:
+    timings = []
+    clock = time.perf_counter_ns
+    for call in calls:
+        start = clock()
+        call()
+        timings.append(clock() - start)
+    return timings
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_scale(scale: int, seed: int, query_ops: int) -> Dict:
+    """Build a synthetic system of the given size and time every entry point. Everything printed goes to os.devnull."""
+    data = SyntheticGenerator(seed).generate(scale)
+    rng = random.Random(seed)
+    system = RecommendationSystem()
+    menu = SeasonalMenu()
+    results = {}
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for cuisine in data.cuisines:
+            system.add_cuisine(cuisine)
+        for user in data.users:
+            system.addUser(user["name"], user["password"], user["address"], user["fav_cuisine"], user["dietary_pref"])
+        users = {user.name: user for user in system.users}
+
+        results["addFood"] = timed([
+            lambda record=record: system.addFood(*[record[field] for field in FOOD_FIELDS]) for record in data.foods])
+
+        def order(user_name, food_name, quantity):
+            system.logged_user = users[user_name]
+            system.order_food(food_name, quantity)
+        results["order_food"] = timed([lambda event=event: order(*event) for event in data.orders])
+
+        def rate(user_name, cuisine, food_name, rating):
+            system.logged_user = users[user_name]
+            system.rate_dish(cuisine, food_name, rating)
+        results["rate_dish"] = timed([lambda event=event: rate(*event) for event in data.ratings])
+
+        ordering_users = [users[name] for name in dict.fromkeys(user for user, _, _ in data.orders)]
+        sample_users = [rng.choice(ordering_users) for _ in range(query_ops)]
+        sample_foods = [rng.choice(data.foods)["name"] for _ in range(query_ops)]
+        sample_cuisines = [rng.choice(data.cuisines) for _ in range(query_ops)]
+
+        def as_user(user, call):
+            system.logged_user = user
+            return call()
+        results["cuisine_based_recommendations"] = timed([
+            lambda user=user, cuisine=cuisine: as_user(user, lambda: system.cuisine_based_recommendations(cuisine, 10))
+            for user, cuisine in zip(sample_users, sample_cuisines)])
+        results["personalized_recommendations"] = timed([
+            lambda user=user: as_user(user, system.personalized_recommendations) for user in sample_users])
+        results["recommend_based_on_nutrition"] = timed([
+            lambda user=user: as_user(user, system.recommend_based_on_nutrition) for user in sample_users])
+        results["pair_recommendations"] = timed([
+            lambda user=user, food=food: as_user(user, lambda: system.pair_recommendations(food))
+            for user, food in zip(sample_users, sample_foods)])
+
+        for item in data.menu_items:
+            menu.add_item(item)
+        for item in data.menu_items:
+            menu.record_sale(item.name, rng.randint(0, 50))
+        results["get_seasonal_items"] = timed([menu.get_seasonal_items for _ in range(query_ops)])
+
+    return {
+        "scale": scale,
+        "foods": len(data.foods),
+        "users": len(data.users),
+        "orders": len(data.orders),
+        "ratings": len(data.ratings),
+        "menu_items": len(data.menu_items),
+        "peak_memory_mb": peak_memory_mb(),
+        "entry_points": {name: summarize(results[name]) for name in ENTRY_POINTS},
+    }
+
+
+def run(scales: List[int], seed: int, query_ops: int) -> Dict:
+    # Each scale runs in a fresh process so that its peak memory is not inflated by the previous scales
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for scale in scales:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(run_scale, (scale, seed, query_ops)))
+        print(f"scale {scale:>9,} done", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "query_ops": query_ops,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def print_table(report: Dict, baseline: Dict = None):
+    baseline_stats = {}
+    if baseline:
+        for result in baseline["results"]:
+            for name, stats in result["entry_points"].items():
+                baseline_stats[(result["scale"], name)] = stats
+    for result in report["results"]:
+        print(f"\nscale {result['scale']:,}  peak memory {result['peak_memory_mb']} MB", file=sys.stderr)
+        print(f"{'entry point':32} {'ops':>9} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10} {'vs base':>8}", file=sys.stderr)
+        for name, stats in result["entry_points"].items():
+            if not stats["ops"]:
+                continue
+            base = baseline_stats.get((result["scale"], name))
+            ratio = f"{stats['throughput_ops_s'] / base['throughput_ops_s']:.2f}x" if base and base.get("ops") else ""
+            print(f"{name:32} {stats['ops']:>9} {stats['throughput_ops_s']:>12,.0f} {stats['p50_us']:>10.1f} "
+                  f"{stats['p99_us']:>10.1f} {ratio:>8}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark RecommendationSystem entry points on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="catalog sizes to benchmark, e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--query-ops", type=int, default=1000, help="calls per read-only entry point")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON report of a previous run to compare throughput against")
+    args = parser.parse_args(argv)
+
+    report = run(args.scales, args.seed, args.query_ops)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    print_table(report, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
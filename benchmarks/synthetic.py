@@ -0,0 +1,112 @@
+import itertools
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from seasonal_menu_items import Holiday, Ingredient, MenuItem, Season
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack", "late-night"]
+FLAVOR_TERMS = ["Sweet", "Spicy", "Savory", "Tangy", "Herbal", "Cheesy", "Earthy", "Fresh", "Smoky", "Umami"]
+VITAMINS = ["Vitamin A", "Vitamin B", "Vitamin B2", "Vitamin B12", "Vitamin C", "Vitamin D", "Vitamin E", "Vitamin K"]
+MINERALS = ["Iron", "Calcium", "Magnesium", "Potassium", "Phosphorus", "Zinc"]
+DIETARY_RESTRICTIONS = ["Gluten-Free", "Nut-Free", "Dairy-Free", "Vegan", "Vegetarian"]
+ALLERGENS = ["Gluten", "Soy", "Dairy", "Nuts", "Corn", "Eggs", "Shellfish"]
+
+
+@dataclass
+class SyntheticData:
+    cuisines: List[str]
+    foods: List[Dict]  # records with catalog_loader.FOOD_FIELDS
+    users: List[Dict]  # records with catalog_loader.USER_FIELDS
+    orders: List[Tuple[str, str, int]]  # (user name, food name, quantity)
+    ratings: List[Tuple[str, str, str, int]]  # (user name, cuisine, food name, rating)
+    menu_items: List[MenuItem] = field(default_factory=list)
+
+
+class SyntheticGenerator:
+    """
+    Seeded generator of a synthetic catalog and order stream. Dish calories follow a log-normal distribution around a
+    typical meal and are split into protein / fat / carbohydrate grams with random macro shares; order and rating
+    targets follow a Zipf distribution over the dishes, so a few dishes get most of the traffic like in a real menu.
+    """
+
+    def __init__(self, seed: int = 42, zipf_exponent: float = 1.1):
+        self.seed = seed
+        self.zipf_exponent = zipf_exponent
+        self.rng = random.Random(seed)
+
+    def cuisines(self, n_foods: int) -> List[str]:
+        count = max(5, int(n_foods ** 0.5) // 4)
+        return [f"Cuisine {index:04d}" for index in range(count)]
+
+    def food(self, index: int, cuisines: List[str]) -> Dict:
+        rng = self.rng
+        calories = int(min(1500, max(50, rng.lognormvariate(6.0, 0.45))))
+        shares = [rng.gammavariate(2.0, 1.0) for _ in range(3)]
+        total = sum(shares)
+        proteins = round(calories * shares[0] / total / 4)
+        fats = round(calories * shares[1] / total / 9)
+        carbohydrates = round(calories * shares[2] / total / 4)
+        flavor_profile = " and ".join(rng.sample(FLAVOR_TERMS, rng.choice((1, 1, 2))))
+        return {
+            "name": f"Dish {index:07d}",
+            "cuisine_type": rng.choice(cuisines),
+            "calories": calories,
+            "proteins": proteins,
+            "fats": fats,
+            "carbohydrates": carbohydrates,
+            "vitamins": rng.sample(VITAMINS, rng.randint(0, 3)),
+            "minerals": rng.sample(MINERALS, rng.randint(0, 2)),
+            "dietary_restrictions": rng.choice(DIETARY_RESTRICTIONS),
+            "allergens": rng.sample(ALLERGENS, rng.randint(0, 2)),
+            "meal_type": rng.choice(MEAL_TYPES),
+            "flavor_profile": flavor_profile,
+        }
+
+    def user(self, index: int, cuisines: List[str]) -> Dict:
+        rng = self.rng
+        return {
+            "name": f"User {index:07d}",
+            "password": f"pass{index}",
+            "address": f"{rng.randint(1, 9999)} Main St",
+            "fav_cuisine": rng.choice(cuisines),
+            "dietary_pref": rng.choice(DIETARY_RESTRICTIONS),
+            "allergens": rng.sample(ALLERGENS, rng.randint(0, 1)),
+        }
+
+    def zipf_sampler(self, n: int):
+        """Return a function drawing k indexes in [0, n) with Zipf(zipf_exponent) popularity."""
+        cumulative = list(itertools.accumulate(1.0 / (rank ** self.zipf_exponent) for rank in range(1, n + 1)))
+        population = range(n)
+        return lambda k: self.rng.choices(population, cum_weights=cumulative, k=k)
+
+    def menu_item(self, index: int) -> MenuItem:
+        rng = self.rng
+        seasons = list(Season)
+        ingredients = [Ingredient(f"Ingredient {index}-{part}", rng.sample(seasons, rng.randint(0, 2)),
+                                  rng.randint(3, 90), round(rng.uniform(0.5, 5.0), 2), rng.random() < 0.3)
+                       for part in range(rng.randint(1, 4))]
+        holidays = [rng.choice(list(Holiday))] if rng.random() < 0.1 else []
+        return MenuItem(f"Menu Item {index:05d}", "Synthetic seasonal dish", round(rng.uniform(3, 30), 2),
+                        ingredients, seasons=rng.sample(seasons, rng.randint(1, 2)), holidays=holidays)
+
+    def generate(self, n_foods: int, n_users: int = None, n_orders: int = None, n_ratings: int = None,
+                 n_menu_items: int = None) -> SyntheticData:
+        n_users = n_users if n_users is not None else max(10, n_foods // 10)
+        n_orders = n_orders if n_orders is not None else n_foods
+        n_ratings = n_ratings if n_ratings is not None else n_foods // 2
+        n_menu_items = n_menu_items if n_menu_items is not None else min(1000, max(10, n_foods // 100))
+
+        cuisines = self.cuisines(n_foods)
+        foods = [self.food(index, cuisines) for index in range(n_foods)]
+        users = [self.user(index, cuisines) for index in range(n_users)]
+
+        dish_sampler = self.zipf_sampler(n_foods)
+        order_users = self.rng.choices(range(n_users), k=n_orders)
+        orders = [(users[user]["name"], foods[dish]["name"], self.rng.randint(1, 3))
+                  for user, dish in zip(order_users, dish_sampler(n_orders))]
+        rating_users = self.rng.choices(range(n_users), k=n_ratings)
+        ratings = [(users[user]["name"], foods[dish]["cuisine_type"], foods[dish]["name"], self.rng.randint(1, 5))
+                   for user, dish in zip(rating_users, dish_sampler(n_ratings))]
+        menu_items = [self.menu_item(index) for index in range(n_menu_items)]
+        return SyntheticData(cuisines, foods, users, orders, ratings, menu_items)
@@ -0,0 +1,68 @@
+import csv
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+FOOD_FIELDS = ["name", "cuisine_type", "calories", "proteins", "fats", "carbohydrates", "vitamins", "minerals",
+               "dietary_restrictions", "allergens", "meal_type", "flavor_profile"]
+USER_FIELDS = ["name", "password", "address", "fav_cuisine", "dietary_pref", "allergens"]
+
+NUMERIC_FIELDS = {"calories", "proteins", "fats", "carbohydrates"}
+LIST_FIELDS = {"vitamins", "minerals", "allergens"}
+LIST_SEPARATOR = ";"  # separates list values inside a single CSV cell, e.g "Vitamin A;Calcium"
+
+
+def _parse_number(value) -> float:
+    if isinstance(value, (int, float)):
+        return value
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _parse_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [part.strip() for part in value.split(LIST_SEPARATOR) if part.strip()]
+
+
+def _normalize(record: Dict) -> Dict:
+    for field in NUMERIC_FIELDS & record.keys():
+        record[field] = _parse_number(record[field])
+    for field in LIST_FIELDS & record.keys():
+        record[field] = _parse_list(record[field])
+    return record
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Stream records from a JSONL file (one object per line) or a CSV file with a header row."""
+    if os.path.splitext(path)[1].lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                yield _normalize(dict(row))
+    else:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield _normalize(json.loads(line))
+
+
+def load_catalog(system, foods_path: Optional[str] = None, users_path: Optional[str] = None,
+                 register_cuisines: bool = True) -> Dict[str, Dict[str, int]]:
+    """
+    Bulk load foods and users into a RecommendationSystem without per-item output.
+    With register_cuisines, cuisines seen in the food file that are not in the system yet are added first so that every
+    dish is available for cuisine-based recommendations.
+    """
+    summary = {}
+    if users_path:
+        summary["users"] = system.add_users_bulk(read_records(users_path))
+    if foods_path:
+        records = list(read_records(foods_path))
+        if register_cuisines:
+            for cuisine in dict.fromkeys(record["cuisine_type"] for record in records):
+                if cuisine not in system.cuisines:
+                    system.add_cuisine(cuisine)
+        summary["foods"] = system.add_foods_bulk(records)
+    return summary
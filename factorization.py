@@ -0,0 +1,164 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional for the rest of the system, the factorization needs it
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for the rating matrix factorization")
+
+
+@dataclass
+class RatingMatrix:
+    """
+    Sparse users x dishes rating matrix in CSR form: the ratings of users[u] are values[indptr[u]:indptr[u + 1]] for the
+    dishes items[indices[indptr[u]:indptr[u + 1]]].
+    """
+    users: List[str]
+    items: List[str]
+    indptr: object
+    indices: object
+    values: object
+
+    @classmethod
+    def from_users(cls, users: Iterable) -> "RatingMatrix":
+        """Build the matrix from the User.ratings dictionaries (dish name : rating) of the given users."""
+        _require_numpy()
+        user_names: List[str] = []
+        item_ids: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        values: List[float] = []
+        for user in users:
+            if not user.ratings:
+                continue
+            user_names.append(user.name)
+            for item, rating in user.ratings.items():
+                indices.append(item_ids.setdefault(item, len(item_ids)))
+                values.append(rating)
+            indptr.append(len(indices))
+        return cls(user_names, list(item_ids), np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int32),
+                   np.array(values, dtype=np.float32))
+
+    @property
+    def shape(self):
+        return len(self.users), len(self.items)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.values)
+
+    def transpose(self) -> "RatingMatrix":
+        """The dishes x users matrix (CSC of this one)."""
+        rows = np.repeat(np.arange(len(self.users), dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        counts = np.bincount(self.indices, minlength=len(self.items))
+        indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return RatingMatrix(self.items, self.users, indptr, rows[order], self.values[order])
+
+
+@dataclass
+class FactorizationModel:
+    """
+    Result of train_als: latent factors of every user and dish (ratings are predicted as global_mean + user . item) and
+    the precomputed top-N unrated dishes of every user, so serving a personalized list is a dictionary lookup.
+    """
+    users: List[str]
+    items: List[str]
+    user_factors: object
+    item_factors: object
+    global_mean: float
+    top_n: Dict[str, List[str]] = field(default_factory=dict)
+    rmse: Optional[float] = None  # on the training ratings
+
+    def predict(self, user: str, item: str) -> Optional[float]:
+        try:
+            user_index = self.users.index(user)
+            item_index = self.items.index(item)
+        except ValueError:
+            return None
+        return float(self.global_mean + self.user_factors[user_index] @ self.item_factors[item_index])
+
+    def recommendations(self, user: str, limit: Optional[int] = None) -> List[str]:
+        recommended = self.top_n.get(user, [])
+        return recommended if limit is None else recommended[:limit]
+
+
+def _solve_side(matrix: RatingMatrix, fixed, regularization: float, chunk: int):
+    """
+    One ALS half step: the factors of every row of matrix minimizing the squared error against the fixed factors of
+    the columns, with weighted-lambda regularization. Rows are processed in chunks: the Gram matrices of a chunk are
+    sums of outer products over its contiguous CSR ranges (one reduceat) and all of them are solved in one batched call.
+    """
+    rows, factors = len(matrix.indptr) - 1, fixed.shape[1]
+    result = np.zeros((rows, factors), dtype=np.float32)
+    identity = np.eye(factors, dtype=np.float32)
+    for start in range(0, rows, chunk):
+        stop = min(rows, start + chunk)
+        low, high = matrix.indptr[start], matrix.indptr[stop]
+        counts = np.diff(matrix.indptr[start:stop + 1])
+        present = np.flatnonzero(counts)
+        if low == high:
+            continue
+        offsets = matrix.indptr[start:stop][present] - low
+        columns = fixed[matrix.indices[low:high]]
+        outer = (columns[:, :, None] * columns[:, None, :]).reshape(high - low, factors * factors)
+        gram = np.add.reduceat(outer, offsets, axis=0).reshape(len(present), factors, factors)
+        gram += (regularization * counts[present]).astype(np.float32)[:, None, None] * identity
+        targets = np.add.reduceat(columns * matrix.values[low:high, None], offsets, axis=0)
+        result[start + present] = np.linalg.solve(gram, targets[..., None])[..., 0]
+    return result
+
+
+def train_als(matrix: RatingMatrix, factors: int = 16, regularization: float = 0.1, iterations: int = 5,
+              top_n: int = 20, seed: int = 0, chunk: int = 4096) -> FactorizationModel:
+    """
+    Factorize the rating matrix with alternating least squares and precompute every user's top_n dishes they have not
+    rated yet, best predicted first. Everything is vectorized with NumPy; a million ratings take a few seconds.
+    """
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    global_mean = float(matrix.values.mean()) if matrix.nnz else 0.0
+    centered = RatingMatrix(matrix.users, matrix.items, matrix.indptr, matrix.indices, matrix.values - global_mean)
+    transposed = centered.transpose()
+    user_factors = np.zeros((len(matrix.users), factors), dtype=np.float32)
+    item_factors = (rng.standard_normal((len(matrix.items), factors)) * 0.01).astype(np.float32)
+    for _ in range(iterations):
+        user_factors = _solve_side(centered, item_factors, regularization, chunk)
+        item_factors = _solve_side(transposed, user_factors, regularization, chunk)
+
+    model = FactorizationModel(matrix.users, matrix.items, user_factors, item_factors, global_mean)
+    if matrix.nnz:
+        rows = np.repeat(np.arange(len(matrix.users)), np.diff(matrix.indptr))
+        predicted = np.einsum("ij,ij->i", user_factors[rows], item_factors[matrix.indices])
+        model.rmse = float(np.sqrt(np.mean((centered.values - predicted) ** 2)))
+    model.top_n = _top_n(matrix, user_factors, item_factors, top_n, chunk)
+    return model
+
+
+def _top_n(matrix: RatingMatrix, user_factors, item_factors, limit: int, chunk: int) -> Dict[str, List[str]]:
+    """Score all dishes for a chunk of users at once with one matrix product and keep the best unrated ones."""
+    top: Dict[str, List[str]] = {}
+    items = len(matrix.items)
+    if not items or limit <= 0:
+        return top
+    chunk = max(1, min(chunk, (1 << 24) // items))  # keep each score block around 64 MB
+    for start in range(0, len(matrix.users), chunk):
+        stop = min(len(matrix.users), start + chunk)
+        scores = user_factors[start:stop] @ item_factors.T
+        low, high = matrix.indptr[start], matrix.indptr[stop]
+        rated_rows = np.repeat(np.arange(stop - start), np.diff(matrix.indptr[start:stop + 1]))
+        scores[rated_rows, matrix.indices[low:high]] = -np.inf
+        keep = min(limit, items)
+        best = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        valid = np.isfinite(np.take_along_axis(best_scores, order, axis=1))
+        for offset, (row, row_valid) in enumerate(zip(best.tolist(), valid.tolist())):
+            top[matrix.users[start + offset]] = [matrix.items[item] for item, ok in zip(row, row_valid) if ok]
+    return top
@@ -1,11 +1,67 @@
+from array import array
+import bisect
+import contextlib
 import datetime as dt
+import heapq
+import math
+import operator
+import os
 from seasonal_menu_items import *
 import sys
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from factorization import RatingMatrix, train_als
+from order_pipeline import OrderPipeline
+from persistence import SQLiteStore
+from similarity import DishSimilarityIndex
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the batch code paths fall back to pure Python
+    np = None
+"""
+A Vocabulary interns the values of a categorical attribute (cuisine, meal type, flavor profile, ...) as small integer
+codes: every distinct value is stored once in values and objects only keep its code. Codes are never reused, so they can
+be stored in compact arrays (see FoodTable) and compared without looking at the strings.
+"""
+class Vocabulary:
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes = {}  # value : code
+        self.values = []  # code : value
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+# Lookup tables shared by every Food and FoodTable (allergen and dietary restriction lists are interned as tuples)
+CUISINE_CODES = Vocabulary()
+MEAL_TYPE_CODES = Vocabulary()
+FLAVOR_CODES = Vocabulary()
+DIETARY_CODES = Vocabulary()
+ALLERGEN_SET_CODES = Vocabulary()
+
+def _allergen_code(allergens):
+    return ALLERGEN_SET_CODES.code(tuple(allergens) if allergens is not None else ())
+
+def _dietary_code(dietary_restrictions):
+    return DIETARY_CODES.code(tuple(dietary_restrictions) if isinstance(dietary_restrictions, list)
+                              else dietary_restrictions)
+
 """
     The User class represents a user in the system, storing details like their name, password, address, favorite cuisine, and dietary preferences.
     It also keeps track of the user's order history and allergens, ensuring that their preferences are considered when recommending food items.
 """
 class User:
+    __slots__ = ("name", "password", "address", "fav_cuisine", "dietary_pref", "order_history", "allergens", "ratings")
+
     def __init__(self, name, password, address, fav_cuisine, dietary_pref,allergens):
         self.name = name
         self.password = password
@@ -18,83 +74,299 @@ class User:
 """
     The Food class represents a food item, storing information like the name, cuisine type, nutritional details, and restrictions.
     It also includes additional attributes like allergens, meal type, and flavor profile for more personalized recommendations.
+    The object uses __slots__ and keeps the categorical attributes (cuisine type, dietary restrictions, allergens, meal type
+    and flavor profile) as codes into the shared vocabularies; the public attributes are properties decoding them, so a
+    dish costs a fixed handful of slots instead of a per-instance dict and its repeated strings. Allergens, and
+    dietary restrictions given as a list, read back as an interned tuple.
+    rating_count and rating_sum aggregate the ratings of all users; rating is their Bayesian mean (0 while unrated).
 """
 class Food:
+    __slots__ = ("name", "_cuisine", "calories", "nutrition_score", "rating", "rating_count", "rating_sum", "_dietary",
+                 "_allergens", "_meal", "_flavor", "timestamp", "promotion")
+
     def __init__(self, name, cuisine_type,calories,nutrition_score,dietary_restrictions, allergens, meal_type, flavor_profile):
         self.name = name
         self.cuisine_type = cuisine_type
         self.calories = calories
         self.nutrition_score = nutrition_score
         self.rating = 0
+        self.rating_count = 0
+        self.rating_sum = 0
         self.dietary_restrictions = dietary_restrictions
         self.allergens = allergens
         self.meal_type = meal_type
         self.flavor_profile = flavor_profile
         self.timestamp = 0
         self.promotion = None
-class FoodNodeDLL:
+
+    @property
+    def cuisine_type(self):
+        return CUISINE_CODES.values[self._cuisine]
+
+    @cuisine_type.setter
+    def cuisine_type(self, value):
+        self._cuisine = CUISINE_CODES.code(value)
+
+    @property
+    def dietary_restrictions(self):
+        return DIETARY_CODES.values[self._dietary]
+
+    @dietary_restrictions.setter
+    def dietary_restrictions(self, value):
+        self._dietary = _dietary_code(value)
+
+    @property
+    def allergens(self):
+        return ALLERGEN_SET_CODES.values[self._allergens]
+
+    @allergens.setter
+    def allergens(self, value):
+        self._allergens = _allergen_code(value)
+
+    @property
+    def meal_type(self):
+        return MEAL_TYPE_CODES.values[self._meal]
+
+    @meal_type.setter
+    def meal_type(self, value):
+        self._meal = MEAL_TYPE_CODES.code(value)
+
+    @property
+    def flavor_profile(self):
+        return FLAVOR_CODES.values[self._flavor]
+
+    @flavor_profile.setter
+    def flavor_profile(self, value):
+        self._flavor = FLAVOR_CODES.code(value)
+
+    # Codes are only meaningful within one process, so pickled foods carry the decoded values
+    def __getstate__(self):
+        return {attribute: getattr(self, attribute) for attribute in FOOD_ATTRIBUTES}
+
+    def __setstate__(self, state):
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+
+FOOD_ATTRIBUTES = ("name", "cuisine_type", "calories", "nutrition_score", "rating", "rating_count", "rating_sum",
+                   "dietary_restrictions", "allergens", "meal_type", "flavor_profile", "timestamp", "promotion")
+
+def _column(column, vocabulary=None, encode=None):
     """
-    Node class for Doubly Linked List to track new food arrivals.
-    Each node maintains references to previous and next nodes for
-    bidirectional traversal.
+    Property of a FoodRow reading and writing its row of a FoodTable column, decoding vocabulary codes if given.
+    encode turns a written value into its code, vocabulary.code by default.
     """
-    def __init__(self, food):
-        self.food = food
-        self.prev = None
-        self.next = None
+    if vocabulary is None:
+        def get(row):
+            return getattr(row.table, column)[row.index]
+
+        def set(row, value):
+            getattr(row.table, column)[row.index] = value
+    else:
+        encode = encode or vocabulary.code
 
-class DoublyLinkedList:
+        def get(row):
+            return vocabulary.values[getattr(row.table, column)[row.index]]
+
+        def set(row, value):
+            getattr(row.table, column)[row.index] = encode(value)
+    return property(get, set)
+
+"""
+FoodTable is the optional struct-of-arrays catalog backend (RecommendationSystem(columnar=True)). Instead of one object
+with its own fields per dish, every attribute is one column: typed arrays for the numbers and vocabulary codes, a list
+for the names and a sparse dict for the few promoted dishes. Dishes are handed out as FoodRow objects, two-slot handles
+(table, row index) exposing the same public attributes as Food, so every index keeps working with them unchanged.
+"""
+class FoodTable:
+    def __init__(self):
+        self.names = []
+        self.cuisines = array("I")
+        self.calories = array("d")
+        self.nutrition_scores = array("d")
+        self.ratings = array("d")
+        self.rating_counts = array("I")
+        self.rating_sums = array("d")
+        self.dietary = array("I")
+        self.allergens = array("I")
+        self.meal_types = array("I")
+        self.flavors = array("I")
+        self.timestamps = array("q")
+        self.promotions = {}  # row index : offer
+
+    CODED_COLUMNS = (("cuisines", CUISINE_CODES), ("dietary", DIETARY_CODES), ("allergens", ALLERGEN_SET_CODES),
+                     ("meal_types", MEAL_TYPE_CODES), ("flavors", FLAVOR_CODES))
+
+    def __len__(self):
+        return len(self.names)
+
+    # The code columns are only meaningful with this process' vocabularies: pickles carry the vocabularies they were
+    # written with and the codes are remapped when they are loaded elsewhere.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["vocabularies"] = [list(vocabulary.values) for _, vocabulary in self.CODED_COLUMNS]
+        return state
+
+    def __setstate__(self, state):
+        vocabularies = state.pop("vocabularies")
+        self.__dict__.update(state)
+        for (column, vocabulary), values in zip(self.CODED_COLUMNS, vocabularies):
+            if vocabulary.values[:len(values)] != values:
+                remap = [vocabulary.code(value) for value in values]
+                setattr(self, column, array("I", [remap[code] for code in getattr(self, column)]))
+
+    def add(self, name, cuisine_type, calories, nutrition_score, dietary_restrictions, allergens, meal_type, flavor_profile):
+        """Append a dish and return its FoodRow. Time Complexity: O(1) amortized"""
+        self.names.append(name)
+        self.cuisines.append(CUISINE_CODES.code(cuisine_type))
+        self.calories.append(calories)
+        self.nutrition_scores.append(nutrition_score)
+        self.ratings.append(0)
+        self.rating_counts.append(0)
+        self.rating_sums.append(0)
+        self.dietary.append(_dietary_code(dietary_restrictions))
+        self.allergens.append(_allergen_code(allergens))
+        self.meal_types.append(MEAL_TYPE_CODES.code(meal_type))
+        self.flavors.append(FLAVOR_CODES.code(flavor_profile))
+        self.timestamps.append(0)
+        return FoodRow(self, len(self.names) - 1)
+
+class FoodRow:
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    name = _column("names")
+    cuisine_type = _column("cuisines", CUISINE_CODES)
+    calories = _column("calories")
+    nutrition_score = _column("nutrition_scores")
+    rating = _column("ratings")
+    rating_count = _column("rating_counts")
+    rating_sum = _column("rating_sums")
+    dietary_restrictions = _column("dietary", DIETARY_CODES, _dietary_code)
+    allergens = _column("allergens", ALLERGEN_SET_CODES, _allergen_code)
+    meal_type = _column("meal_types", MEAL_TYPE_CODES)
+    flavor_profile = _column("flavors", FLAVOR_CODES)
+    timestamp = _column("timestamps")
+
+    @property
+    def promotion(self):
+        return self.table.promotions.get(self.index)
+
+    @promotion.setter
+    def promotion(self, value):
+        if value is None:
+            self.table.promotions.pop(self.index, None)
+        else:
+            self.table.promotions[self.index] = value
+
+class ArrivalRing:
     """
-    Maintains most recent food additions with automatic removal of oldest items.
+    Fixed capacity ring buffer of the most recent arrivals: dish names and the times they were added, newest last.
+    Both arrays are allocated once, an insert overwrites the oldest slot, so nothing is allocated per arrival.
     """
-    def __init__(self, max_size=5):
-        self.head = None
-        self.tail = None
+    __slots__ = ("names", "times", "capacity", "head", "size")
+
+    def __init__(self, capacity):
+        self.names = [None] * capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.capacity = capacity
+        self.head = 0  # slot of the next arrival
         self.size = 0
-        self.max_size = max_size
-    
-    def append(self, food):
+
+    def __len__(self):
+        return self.size
+
+    def append(self, name, timestamp):
         """
-        Add new food item to list, removing oldest if at capacity.
+        Record an arrival, overwriting the oldest one when the ring is full.
         Time Complexity: O(1)
         """
-        if self.size >= self.max_size:
-            # Remove oldest item
-            self.head = self.head.next
-            if self.head:
-                self.head.prev = None
-            self.size -= 1
-            
-        new_node = FoodNodeDLL(food)
-        if not self.head:
-            self.head = self.tail = new_node
-        else:
-            self.tail.next = new_node
-            new_node.prev = self.tail
-            self.tail = new_node
-        self.size += 1
+        self.names[self.head] = name
+        self.times[self.head] = timestamp
+        self.head = (self.head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
 
-    def get_new_arrivals(self):
+    def recent(self, k=None, since=None, accept=None):
         """
-        Retrieve list of most recent food items.
-        It returns List of food names, ordered from newest to oldest
-        Time Complexity: O(k) where k is max_size
+        Return the names of up to k arrivals (all kept ones by default) added at or after since, newest first, skipping
+        the ones accept rejects.
+        Time Complexity: O(k) plus the rejected arrivals
         """
         arrivals = []
-        current = self.tail  # Start from the recent one
-        count = 0
-        while current and count < self.max_size:
-            arrivals.append(current.food.name)
-            current = current.prev
-            count += 1
+        limit = self.size if k is None else k
+        slot = self.head
+        for _ in range(self.size):
+            if len(arrivals) >= limit:
+                break
+            slot = slot - 1 if slot else self.capacity - 1
+            if since is not None and self.times[slot] < since:
+                break  # arrivals are appended in time order
+            name = self.names[slot]
+            if accept is None or accept(name):
+                arrivals.append(name)
         return arrivals
+
+class NewArrivals:
+    """
+    Tracks new dishes in one global ArrivalRing and one ArrivalRing per cuisine (created on the first dish of a cuisine,
+    registered or not), so "what's new in Mexican this week" only walks the Mexican arrivals.
+    """
+    def __init__(self, capacity=256, cuisine_capacity=64):
+        self.capacity = capacity
+        self.cuisine_capacity = cuisine_capacity
+        self.all = ArrivalRing(capacity)
+        self.by_cuisine = {}  # cuisine type : ArrivalRing
+
+    def add(self, food, timestamp):
+        self.all.append(food.name, timestamp)
+        ring = self.by_cuisine.get(food.cuisine_type)
+        if ring is None:
+            ring = self.by_cuisine[food.cuisine_type] = ArrivalRing(self.cuisine_capacity)
+        ring.append(food.name, timestamp)
+
+    def add_many(self, foods, timestamp):
+        """
+        Bulk version of add for dishes arriving at the same time: only the newest dishes that still fit in each ring
+        are written.
+        Time Complexity: O(m) for m dishes, O(capacity) ring writes per ring
+        """
+        by_cuisine = defaultdict(list)
+        for food in foods:
+            by_cuisine[food.cuisine_type].append(food.name)
+        for food in foods[-self.capacity:]:
+            self.all.append(food.name, timestamp)
+        for cuisine, names in by_cuisine.items():
+            ring = self.by_cuisine.get(cuisine)
+            if ring is None:
+                ring = self.by_cuisine[cuisine] = ArrivalRing(self.cuisine_capacity)
+            for name in names[-self.cuisine_capacity:]:
+                ring.append(name, timestamp)
+
+    def recent(self, k=None, cuisine=None, since=None, accept=None):
+        """Names of the newest dishes overall or in one cuisine, see ArrivalRing.recent."""
+        ring = self.all if cuisine is None else self.by_cuisine.get(cuisine)
+        if ring is None:
+            return []
+        return ring.recent(k, since, accept)
+
 class MaxHeap:
     """
-    MaxHeap data structure for maintaining dishes sorted by rating.It used for the efficient retrieval 
-    of highest rated dishes
+    Indexed MaxHeap data structure for maintaining dishes sorted by rating.It used for the efficient retrieval 
+    of highest rated dishes. Alongside the heap array it keeps a positions map (dish name : index in heap) so that a dish
+    whose rating changed can be moved up or down in place instead of rebuilding the heap.
     """
     def __init__(self):
         self.heap = []
+        self.positions = {}  # dish name : index of the dish in self.heap
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, dish):
+        return dish.name in self.positions
 
     def push(self, dish):
         """
@@ -102,8 +374,20 @@ class MaxHeap:
         Time Complexity: O(log n)
         """
         self.heap.append(dish)
+        self.positions[dish.name] = len(self.heap) - 1
         self._heapify_up(len(self.heap) - 1)
 
+    def push_many(self, dishes):
+        """
+        Add several dishes at once: they are appended and the heap is rebuilt bottom-up.
+        Time Complexity: O(n + m) for m new dishes
+        """
+        for dish in dishes:
+            self.positions[dish.name] = len(self.heap)
+            self.heap.append(dish)
+        for index in range(len(self.heap) // 2 - 1, -1, -1):
+            self._heapify_down(index)
+
     def pop(self):
         """
         Remove and return highest rated dish from heap.
@@ -113,19 +397,61 @@ class MaxHeap:
         if not self.heap:
             return None
         if len(self.heap) == 1:
-            return self.heap.pop()
+            root = self.heap.pop()
+            del self.positions[root.name]
+            return root
         # Store root (highest rated) and move last element to root
         root = self.heap[0]
         self.heap[0] = self.heap.pop()
+        self.positions[self.heap[0].name] = 0
+        del self.positions[root.name]
         self._heapify_down(0)# Restore heap property
         return root
 
+    def update(self, dish):
+        """
+        Restore the heap property after the rating of a dish already in the heap was increased or decreased.
+        Returns False if the dish is not in the heap.
+        Time Complexity: O(log n)
+        """
+        index = self.positions.get(dish.name)
+        if index is None:
+            return False
+        self._heapify_up(index)
+        self._heapify_down(self.positions[dish.name])
+        return True
+
+    def top_k(self, k, accept=None):
+        """
+        Return the k highest rated dishes (highest first) without modifying the heap. A small candidate heap holds the
+        frontier of heap indexes, starting from the root; each step takes the best candidate and adds its two children.
+        With accept, dishes for which accept(name) is false are skipped and the walk goes on until k are accepted.
+        Time Complexity: O(k log k), O(m log m) with accept where m is the number of dishes visited
+        """
+        result = []
+        if not self.heap or k <= 0:
+            return result
+        candidates = [(-self.heap[0].rating, 0)]
+        while candidates and len(result) < k:
+            _, index = heapq.heappop(candidates)
+            if accept is None or accept(self.heap[index].name):
+                result.append(self.heap[index])
+            for child_index in (2 * index + 1, 2 * index + 2):
+                if child_index < len(self.heap):
+                    heapq.heappush(candidates, (-self.heap[child_index].rating, child_index))
+        return result
+
+    def _swap(self, i, j):
+        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+        self.positions[self.heap[i].name] = i
+        self.positions[self.heap[j].name] = j
+
     def _heapify_up(self, index):
         while index > 0:
             parent_index = (index - 1) // 2
             # If current element has higher rating than parent, swap them
             if self.heap[index].rating > self.heap[parent_index].rating:
-                self.heap[index], self.heap[parent_index] = self.heap[parent_index], self.heap[index]
+                self._swap(index, parent_index)
                 index = parent_index
             else:
                 break
@@ -140,11 +466,14 @@ class MaxHeap:
 
             if self.heap[index].rating < self.heap[child_index].rating:
             # If current element has lower rating than child, swap them
-                self.heap[index], self.heap[child_index] = self.heap[child_index], self.heap[index]
+                self._swap(index, child_index)
                 index = child_index
+                child_index = 2 * index + 1
             else:
                 break
 class CuisineTrieNode:
+    __slots__ = ("children", "is_end_of_cuisine")
+
     def __init__(self):
         self.children = {}
         self.is_end_of_cuisine = False
@@ -185,188 +514,1033 @@ class CuisineTrie:
             node = node.children[char]
         return node.is_end_of_cuisine
 
+class AutocompleteNode:
+    """
+    Node of the AutocompleteTrie. label is the (compressed) edge text leading to the node, first holds the first character
+    of every child's label at the child's position in children, entries are the (kind, name) pairs ending here and top
+    the best ranked entries of the whole subtree. __slots__ keeps each node to a handful of references instead of a dict.
+    """
+    __slots__ = ("label", "first", "children", "entries", "top")
+
+    def __init__(self, label=""):
+        self.label = label
+        self.first = ""
+        self.children = []
+        self.entries = None
+        self.top = []
+
+class AutocompleteTrie:
+    """
+    Case insensitive radix trie over cuisine and dish names used for autocompletion. Chains of single-child nodes are
+    compressed into one edge label, so the trie has at most two nodes per name instead of one per character.
+    Every node keeps its TOP_K best completions ranked by score (e.g (times ordered, rating)), refreshed along the path
+    of a name whenever it is inserted or its score changes, so prefix_search answers from the node reached by the prefix.
+    """
+    TOP_K = 10
+
+    def __init__(self):
+        self.root = AutocompleteNode()
+        self.scores = {}  # (kind, name) : score
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _rank(self, entry):
+        return self.scores[entry]
+
+    def insert(self, name, kind, score=0):
+        """
+        Add a name of the given kind ("cuisine" or "dish") with its ranking score.
+        Time Complexity: O(m + d * K) where m is the name length and d the depth of its node
+        """
+        entry = (kind, name)
+        previous = self.scores.get(entry)
+        path = self._insert_path(name, entry)
+        self.scores[entry] = score
+        self._place(path, entry, previous is not None and score < previous)
+
+    def insert_many(self, items):
+        """
+        Batch version of insert for (name, kind, score) triples, e.g a catalog import. The names are sorted and merged
+        into the trie top-down: the names below a node form a range of the sorted batch, split by binary search into
+        one range per next character, and each range follows or creates one child whose label is the prefix shared by
+        the range's first and last name. Every edge is thus created or split once instead of walked once per name, and
+        every node reached is then refreshed once, children before parents.
+        Time Complexity: O(n log n + u * (log n + c * K)) for n names and u nodes reached by the batch
+        """
+        batch = []
+        for name, kind, score in items:
+            self.scores[(kind, name)] = score
+            batch.append((name.lower(), (kind, name)))
+        batch.sort()
+        keys = [key for key, _ in batch]
+        dirty = []  # every node reached by the batch, parents before children
+        stack = [(self.root, 0, 0, len(keys))]  # node, length of its prefix, range of the batch below it
+        while stack:
+            node, depth, lo, hi = stack.pop()
+            dirty.append(node)
+            while lo < hi and len(keys[lo]) == depth:  # names ending here sort first
+                if node.entries is None:
+                    node.entries = []
+                if batch[lo][1] not in node.entries:
+                    node.entries.append(batch[lo][1])
+                lo += 1
+            while lo < hi:
+                first = keys[lo]
+                char = first[depth]
+                end = bisect.bisect_left(keys, first[:depth] + chr(ord(char) + 1), lo, hi)
+                last = keys[end - 1]
+                shared = first[depth:] if first == last else os.path.commonprefix([first[depth:], last[depth:]])
+                index = node.first.find(char)
+                if index < 0:
+                    child = AutocompleteNode(shared)
+                    node.first += char
+                    node.children.append(child)
+                else:
+                    child = node.children[index]
+                    common = len(os.path.commonprefix([child.label, shared]))
+                    if common < len(child.label):
+                        child = self._split(node, index, common)
+                stack.append((child, depth + len(child.label), lo, end))
+                lo = end
+        for node in reversed(dirty):
+            self._refresh([node])
+
+    def _insert_path(self, name, entry):
+        """Add the nodes for name (splitting edges where needed) and the entry at its node, return the path to it."""
+        key = name.lower()
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(key):
+            index = node.first.find(key[i])
+            if index < 0:
+                child = AutocompleteNode(key[i:])
+                node.first += key[i]
+                node.children.append(child)
+                node = child
+                path.append(node)
+                break
+            child = node.children[index]
+            label = child.label
+            if key.startswith(label, i):
+                common = len(label)
+            else:
+                common = 1
+                while common < len(label) and i + common < len(key) and label[common] == key[i + common]:
+                    common += 1
+                child = self._split(node, index, common)
+            node = child
+            path.append(node)
+            i += common
+        if node.entries is None:
+            node.entries = []
+        if entry not in node.entries:
+            node.entries.append(entry)
+        return path
+
+    def _split(self, node, index, common):
+        """Split the edge to the index-th child of node after common characters, return the new middle node."""
+        child = node.children[index]
+        middle = AutocompleteNode(child.label[:common])
+        child.label = child.label[common:]
+        middle.first = child.label[0]
+        middle.children.append(child)
+        middle.top = list(child.top)
+        node.children[index] = middle
+        return middle
+
+    def _path(self, key):
+        """Nodes from the root to the node where key ends, or None when key is not a complete path."""
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(key):
+            index = node.first.find(key[i])
+            if index < 0:
+                return None
+            node = node.children[index]
+            if not key.startswith(node.label, i):
+                return None
+            path.append(node)
+            i += len(node.label)
+        return path
+
+    def _refresh(self, path):
+        # Recompute the top lists bottom-up: a node's best entries are its own plus the best of each child
+        for node in reversed(path):
+            candidates = list(node.entries) if node.entries else []
+            for child in node.children:
+                candidates.extend(child.top)
+            node.top = heapq.nlargest(self.TOP_K, candidates, key=self._rank)
+
+    def _place(self, path, entry, decreased):
+        """
+        Bring the top lists of the path up to date after the score of entry changed, bottom-up and in place: the entry
+        is moved within a list that holds it, or enters a list when it beats the K-th entry. A node is only recomputed
+        when a lowered entry may leave its full list, and the walk stops at the first list the entry is not part of
+        (the lists of the ancestors are drawn from it).
+        Time Complexity: O(d * K), O(d * c * K) when a lowered entry may leave full lists
+        """
+        scores = self.scores
+        score = scores[entry]
+        limit = self.TOP_K
+        for index in range(len(path) - 1, -1, -1):
+            top = path[index].top
+            if entry in top:
+                if decreased and len(top) == limit:
+                    self._refresh([path[index]])
+                    continue
+                position = top.index(entry)
+                if not decreased and (position == 0 or scores[top[position - 1]] >= score):
+                    continue  # already in place
+                del top[position]
+            elif len(top) >= limit and score <= scores[top[-1]]:
+                break
+            position = len(top)
+            while position and scores[top[position - 1]] < score:
+                position -= 1
+            top.insert(position, entry)
+            del top[limit:]
+
+    def update(self, name, kind, score):
+        """
+        Change the ranking score of an indexed name. Returns False when the name is not indexed.
+        Time Complexity: O(m + d * K), see _place
+        """
+        entry = (kind, name)
+        previous = self.scores.get(entry)
+        if previous is None:
+            return False
+        if previous != score:
+            self.scores[entry] = score
+            self._place(self._path(name.lower()), entry, score < previous)
+        return True
+
+    def update_many(self, updates):
+        """Batch version of update for (name, kind, score) triples."""
+        for name, kind, score in updates:
+            self.update(name, kind, score)
+
+    def search(self, name, kind=None):
+        """Exact (case insensitive) lookup of a name, of the given kind when kind is not None."""
+        path = self._path(name.lower())
+        if path is None or not path[-1].entries:
+            return False
+        return any(kind is None or entry_kind == kind for entry_kind, _ in path[-1].entries)
+
+    def prefix_search(self, prefix, limit=10, kind=None):
+        """
+        Return up to limit names starting with prefix (case insensitive), best ranked first, optionally only those of
+        the given kind. When limit fits in the precomputed top list (and every one of them is of the wanted kind) no
+        subtree is visited.
+        Time Complexity: O(p + limit) where p is the prefix length, O(p + s log limit) for a subtree of s names otherwise
+        """
+        key = prefix.lower()
+        node = self.root
+        i = 0
+        while i < len(key):
+            index = node.first.find(key[i])
+            if index < 0:
+                return []
+            node = node.children[index]
+            label = node.label
+            rest = key[i:i + len(label)]
+            if not label.startswith(rest):
+                return []
+            i += len(label)
+        matches = [entry for entry in node.top if kind is None or entry[0] == kind]
+        if len(matches) >= limit or len(node.top) < self.TOP_K:
+            return [name for _, name in matches[:limit]]
+        # The answer reaches beyond the precomputed top list: select from the whole subtree
+        entries = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.entries:
+                entries.extend(entry for entry in current.entries if kind is None or entry[0] == kind)
+            stack.extend(current.children)
+        return [name for _, name in heapq.nlargest(limit, entries, key=self._rank)]
+
 """
-NutritionTree is a BST in which the criteria is the nutrition score obtained during the addition of food item. Based on the nutrition score the food items are
-ordered just like in a BST. This is used to retrieve food item faster based on the nutrition score.
-It has a Node which contains a food node and left and right pointers. The root node is initialised to none in the beginning.
+NutritionTree keeps the food items ordered by the nutrition score obtained during the addition of food item. Instead of an
+unbalanced BST (which degrades to a linked list and hits the recursion limit when scores arrive sorted) the ordering is
+kept in two parallel sorted arrays: scores (the nutrition scores) and foods (the food nodes at the same positions).
+Binary search with bisect keeps lookups at O(log n) regardless of the insertion order, and the in-order traversal of the
+old tree is simply the array order.
 """
 class NutritionTree:
     def __init__(self):
-        self.root = None
+        self.scores = []
+        self.foods = []
 
-    class Node:
-        def __init__(self, food):
-            self.food = food
-            self.left = None
-            self.right = None
+    def __len__(self):
+        return len(self.foods)
 
     """
-    The insert_food method inserts the NutritionTree node based on the nutrition score i.e node.food.nutrition_score.
-    The helper function _insert recursively works to insert the given node.    
+    The insert_food method places the food item right after any item with an equal nutrition score, so equal scores keep
+    their insertion order just like the right-leaning inserts of the BST did.
+    Time Complexity: O(log n) search + O(n) memmove, with no recursion
     """
     def insert_food(self, food):
-        if self.root is None:
-            self.root = self.Node(food)
-        else:
-            self._insert(self.root, food)
+        index = bisect.bisect_right(self.scores, food.nutrition_score)
+        self.scores.insert(index, food.nutrition_score)
+        self.foods.insert(index, food)
 
-    def _insert(self, node, food):
-        if food.nutrition_score < node.food.nutrition_score:
-            if node.left is None:
-                node.left = self.Node(food)
-            else:
-                self._insert(node.left, food)
-        else:
-            if node.right is None:
-                node.right = self.Node(food)
-            else:
-                self._insert(node.right, food)
     """
-    The modified version of inOrder traversal is used to give the recommendations based on the nutrition score, this basically returns food items that are
-    more are less similar in nutrition score i.e cousins or siblings in the tree.
+    insert_many adds a batch of food items at once: the batch is sorted on its own and merged with the existing arrays,
+    which Python's sort does as a single merge of two sorted runs. Equal scores keep their insertion order.
+    Time Complexity: O(m log m + n) for m new items
     """
+    def insert_many(self, foods):
+        batch = sorted(foods, key=lambda food: food.nutrition_score)
+        if not batch:
+            return
+        merged = list(zip(self.scores, self.foods))
+        merged.extend((food.nutrition_score, food) for food in batch)
+        merged.sort(key=lambda pair: pair[0])
+        self.scores = [score for score, _ in merged]
+        self.foods = [food for _, food in merged]
 
+    """
+    inorder_recommendations gives the recommendations based on the nutrition score i.e the food items whose score lies in
+    [avg_score - tolerance, avg_score + tolerance], in ascending score order. The two ends of the band are found by binary
+    search, so only the items inside the band are touched.
+    Time Complexity: O(log n + k) where k is the number of items in the band
+    """
     def inorder_recommendations(self, avg_score, tolerance):
-        recommendations = []
-
-        def _inorder(node):
-            if node is not None:
-                _inorder(node.left)
-                
-                # Check if the food's nutrition score is within the specified range
-                if avg_score - tolerance <= node.food.nutrition_score <= avg_score + tolerance:
-                    recommendations.append(node.food.name)
-                
-                _inorder(node.right)
-        
-        _inorder(self.root)
-        return recommendations
-    """This method searches for a food item with a specified nutrition score in the tree.
+        low = bisect.bisect_left(self.scores, avg_score - tolerance)
+        high = bisect.bisect_right(self.scores, avg_score + tolerance)
+        return [food.name for food in self.foods[low:high]]
+
+    """This method searches for a food item with a specified nutrition score.
     If an exact match is found, it returns the food's name.
-    If no exact match is found, it returns the next closest food with a lower nutrition score."""
+    If no exact match is found, it returns the next closest food with a lower nutrition score.
+    Time Complexity: O(log n)"""
     def get_food(self, nutrition_score):
-        closest_food = None
+        index = bisect.bisect_left(self.scores, nutrition_score)
+        if index < len(self.scores) and self.scores[index] == nutrition_score:
+            return self.foods[index].name
+        if index > 0:
+            return self.foods[index - 1].name
+        return None
 
-        result = self._search(self.root, nutrition_score, closest_food)
-        return result if result is not None else closest_food
-    
-    """This helper function performs a recursive search through the NutritionTree.
-    It checks each node for an exact match to the given nutrition score.
-    If no match is found, it keeps track of the closest food while continuing the search."""
-    def _search(self, node, nutrition_score, closest_food):
-        if node is None:
-            return closest_food
-        if node.food.nutrition_score == nutrition_score:
-            return node.food.name
-        elif nutrition_score < node.food.nutrition_score:
-            return self._search(node.left, nutrition_score, closest_food)
-        else:
-            return self._search(node.right, nutrition_score, node.food.name)
-    
 """
 The graph is the basic data structure in this Food recommendation system as the relationship between a user and food node is established by means of an edge.
-
-The graph class has three methods:
-    i)add_vertex -> this method adds vertex (either user or food) by creating a key in the adj list of the graph.
-    ii)add_edge -> this method adds the vertex in both key's value by appending vice-versa in the adj list of the graph.
-    iii) print_graph -> this methods prints the Vertex and its neighbours. This method is just for verifying the working of the code.
+Every vertex (either user or food) gets a small integer id; vertices maps the id back to the object and adj holds, per id, a
+dictionary neighbour id : edge weight. An edge is stored once per user-food pair and its weight counts how many times the
+pair was connected (i.e the number of orders), so memory and traversals scale with the distinct pairs and not the order volume.
+
+The graph class has these methods:
+    i)add_vertex -> this method adds vertex (either user or food) by assigning it an id and an empty adjacency dictionary.
+    ii)add_edge -> this method adds weight to the edge between both vertices, creating the edge on first use.
+    iii)neighbors / edges / weight -> these methods read the distinct neighbours of a vertex (with their weights for edges).
+    iv)to_csr -> this method freezes the graph into compressed sparse row arrays (CSRGraph).
+    v) print_graph -> this methods prints the Vertex and its neighbours. This method is just for verifying the working of the code.
 """
 
 class Graph:
     def __init__(self):
-        self.adj_list = {}
+        self.ids = {}  # vertex : vertex id
+        self.vertices = []  # vertex id : vertex
+        self.adj = []  # vertex id : {neighbour id : edge weight}
+
+    def __contains__(self, vertex):
+        return vertex in self.ids
+
+    def __len__(self):
+        return len(self.vertices)
 
     def add_vertex(self, vertex):
-        if vertex not in self.adj_list:
-            self.adj_list[vertex] = []
+        if vertex not in self.ids:
+            self.ids[vertex] = len(self.vertices)
+            self.vertices.append(vertex)
+            self.adj.append({})
             return True
         return False
 
-    def add_edge(self, v1, v2):
-        if v1 in self.adj_list and v2 in self.adj_list:
-            self.adj_list[v1].append(v2)
-            self.adj_list[v2].append(v1)
-            return True
-        return False
+    def add_edge(self, v1, v2, weight=1):
+        """
+        Add weight to the edge between v1 and v2 in both directions.
+        Time Complexity: O(1) average
+        """
+        id1 = self.ids.get(v1)
+        id2 = self.ids.get(v2)
+        if id1 is None or id2 is None:
+            return False
+        self.adj[id1][id2] = self.adj[id1].get(id2, 0) + weight
+        self.adj[id2][id1] = self.adj[id2].get(id1, 0) + weight
+        return True
+
+    def neighbors(self, vertex):
+        """Return the distinct neighbours of a vertex in the order they were first connected."""
+        vertex_id = self.ids.get(vertex)
+        if vertex_id is None:
+            return []
+        return [self.vertices[neighbor_id] for neighbor_id in self.adj[vertex_id]]
+
+    def edges(self, vertex):
+        """Return (neighbour, weight) pairs of a vertex in the order they were first connected."""
+        vertex_id = self.ids.get(vertex)
+        if vertex_id is None:
+            return []
+        return [(self.vertices[neighbor_id], weight) for neighbor_id, weight in self.adj[vertex_id].items()]
+
+    def weight(self, v1, v2):
+        id1 = self.ids.get(v1)
+        id2 = self.ids.get(v2)
+        if id1 is None or id2 is None:
+            return 0
+        return self.adj[id1].get(id2, 0)
+
+    def degree(self, vertex):
+        vertex_id = self.ids.get(vertex)
+        return 0 if vertex_id is None else len(self.adj[vertex_id])
+
+    def to_csr(self):
+        """
+        Freeze the graph into compressed sparse row arrays: the neighbours of vertex id v are
+        indices[indptr[v]:indptr[v + 1]] with the matching weights.
+        Time Complexity: O(V + E)
+        """
+        indptr = array("q", [0])
+        indices = array("q")
+        weights = array("d")
+        for neighbors in self.adj:
+            indices.extend(neighbors.keys())
+            weights.extend(neighbors.values())
+            indptr.append(len(indices))
+        return CSRGraph(tuple(self.vertices), indptr, indices, weights)
 
     def print_graph(self):
-        for vertex in self.adj_list:
-            print(vertex, ":", self.adj_list[vertex])
+        for vertex in self.vertices:
+            print(vertex, ":", self.edges(vertex))
 
-class OfferNode:
-    def __init__(self,food):
-        self.food = food
-        self.left = None
-        self.right = None
+"""
+CSRGraph is the frozen, array based export of the Graph. vertices maps a vertex id to its object, and the neighbours of a
+vertex id v are indices[indptr[v]:indptr[v + 1]] with the edge weights at the same positions in weights.
+"""
+@dataclass(frozen=True)
+class CSRGraph:
+    vertices: tuple
+    indptr: array
+    indices: array
+    weights: array
+
+    def neighbors(self, vertex_id):
+        start, end = self.indptr[vertex_id], self.indptr[vertex_id + 1]
+        return list(zip(self.indices[start:end], self.weights[start:end]))
+
+"""
+The Catalog is the hash index layer of the system. It keeps a name -> Food and a name -> User dictionary so that every
+lookup by name (duplicate checks, ordering, rating, pairing, offers and login) is an O(1) average dictionary access
+instead of a linear scan over the food or user lists. Every mutation of the food and user collections goes through it so
+that the indexes always stay in sync with RecommendationSystem.food_items and RecommendationSystem.users.
+"""
+class Catalog:
+    def __init__(self):
+        self.foods = {}  # food name : Food
+        self.users = {}  # user name : User
+
+    def add_food(self, food):
+        """
+        Index a new food item by name. Returns False if a food with the same name is already indexed.
+        Time Complexity: O(1) average
+        """
+        if food.name in self.foods:
+            return False
+        self.foods[food.name] = food
+        return True
+
+    def add_user(self, user):
+        """
+        Index a new user by name. Returns False if a user with the same name is already indexed.
+        Time Complexity: O(1) average
+        """
+        if user.name in self.users:
+            return False
+        self.users[user.name] = user
+        return True
+
+    def get_food(self, name):
+        return self.foods.get(name)
+
+    def get_user(self, name):
+        return self.users.get(name)
+
+    def has_food(self, name):
+        return name in self.foods
+
+    def has_user(self, name):
+        return name in self.users
+
+"""
+The PopularityTracker keeps the top-K most ordered dishes incrementally as orders stream in, so reading the popular dishes
+never sorts the whole order table. scores holds the (optionally time-decayed) ordered quantity of every dish and top holds
+the K best of them; a lazy min-heap over top finds the entry that a rising dish has to displace.
+With a half_life the tracker uses forward decay: an order at time t adds quantity * e^(rate * (t - origin)), which ranks
+dishes exactly like the exponentially decayed counts while old scores never have to be touched. When the exponent grows
+too large all scores are rescaled by the same factor and the origin moves forward, which keeps the ranking unchanged.
+Memory is bounded by the number of distinct dishes ordered (at most the catalog size) plus O(K) for the top set.
+"""
+class PopularityTracker:
+    RESCALE_EXPONENT = 50  # rescale before e^(rate * (t - origin)) gets near float overflow
+
+    def __init__(self, k=5, half_life=None):
+        self.k = k
+        self.half_life = half_life
+        self.decay_rate = math.log(2) / half_life if half_life else 0.0
+        self.origin = None  # timestamp the decayed scores are expressed relative to
+        self.scores = {}  # food name : score
+        self.top = {}  # food name : score, for the current top-K dishes
+        self._min_heap = []  # (score, food name) entries of top, possibly stale
+
+    def add(self, food_name, quantity=1, timestamp=None):
+        """
+        Record an order of quantity units of a dish.
+        Time Complexity: O(log K) amortized
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        weight = quantity
+        if self.decay_rate:
+            if self.origin is None:
+                self.origin = timestamp
+            exponent = self.decay_rate * (timestamp - self.origin)
+            if exponent > self.RESCALE_EXPONENT:
+                self._rescale(timestamp)
+                exponent = 0.0
+            weight = quantity * math.exp(exponent)
+        score = self.scores.get(food_name, 0) + weight
+        self.scores[food_name] = score
+
+        if food_name in self.top:
+            self.top[food_name] = score
+            heapq.heappush(self._min_heap, (score, food_name))
+        elif len(self.top) < self.k:
+            self.top[food_name] = score
+            heapq.heappush(self._min_heap, (score, food_name))
+        else:
+            min_score, min_name = self._peek_min()
+            if score > min_score:
+                heapq.heappop(self._min_heap)
+                del self.top[min_name]
+                self.top[food_name] = score
+                heapq.heappush(self._min_heap, (score, food_name))
+        # Drop the stale entries once they dominate the heap
+        if len(self._min_heap) > 4 * self.k + 16:
+            self._min_heap = [(score, name) for name, score in self.top.items()]
+            heapq.heapify(self._min_heap)
+
+    def _peek_min(self):
+        # Discard heap entries whose score is no longer the dish's current top score
+        while self._min_heap:
+            score, name = self._min_heap[0]
+            if self.top.get(name) == score:
+                return score, name
+            heapq.heappop(self._min_heap)
+        return 0, None
+
+    def _rescale(self, timestamp):
+        factor = math.exp(-self.decay_rate * (timestamp - self.origin))
+        self.origin = timestamp
+        self.scores = {name: score * factor for name, score in self.scores.items()}
+        self.top = {name: score * factor for name, score in self.top.items()}
+        self._min_heap = [(score, name) for name, score in self.top.items()]
+        heapq.heapify(self._min_heap)
+
+    def score(self, food_name, timestamp=None):
+        """Return the current (decayed) ordered quantity of a dish."""
+        score = self.scores.get(food_name, 0)
+        if self.decay_rate and self.origin is not None:
+            if timestamp is None:
+                timestamp = time.time()
+            score *= math.exp(-self.decay_rate * (timestamp - self.origin))
+        return score
+
+    def top_k(self, k=None, accept=None):
+        """
+        Return up to k (at most the tracker's K) dish names, most popular first. With accept only the names for which
+        accept(name) is true are returned; when fewer than k of the top set pass, the rest come from all scored dishes.
+        Time Complexity: O(K log K), independent of the catalog size (O(n) when the top set has to be completed)
+        """
+        k = self.k if k is None else min(k, self.k)
+        ranked = sorted(self.top.items(), key=lambda item: item[1], reverse=True)
+        if accept is None:
+            return [name for name, _ in ranked[:k]]
+        names = [name for name, _ in ranked if accept(name)]
+        if len(names) < k and len(self.scores) > len(self.top):
+            names = heapq.nlargest(k, (name for name in self.scores if accept(name)), key=self.scores.__getitem__)
+        return names[:k]
+
+"""
+The AttributeIndex is an inverted index from food attributes to the dishes having them: cuisine type, exact flavor profile
+and the individual flavor terms of the profile (e.g "Earthy and Spicy" -> "earthy", "spicy"). It is maintained by addFood
+so that pair_recommendations only visits the posting lists of the main dish's attributes instead of the whole catalog.
+"""
+class AttributeIndex:
+    STOP_WORDS = {"and", "with", "&"}
 
-class OfferBST:
     def __init__(self):
-        self.root = None
+        self.by_cuisine = defaultdict(list)  # cuisine type : names of its dishes
+        self.by_flavor = defaultdict(list)  # flavor profile : names of dishes with exactly that profile
+        self.by_flavor_term = defaultdict(list)  # flavor term : names of dishes whose profile contains the term
+        self.order = {}  # food name : position in which the food was indexed
+        self.profile_terms = {}  # flavor profile : its flavor terms, so every distinct profile is tokenized once
+
+    @classmethod
+    def flavor_terms(cls, flavor_profile):
+        """Split a flavor profile into its distinct lower case terms, ignoring connecting words."""
+        terms = []
+        for term in flavor_profile.lower().replace(",", " ").split():
+            if term not in cls.STOP_WORDS and term not in terms:
+                terms.append(term)
+        return terms
+
+    def add(self, food):
+        """
+        Add a food to the posting lists of its attributes.
+        Time Complexity: O(t) where t is the number of flavor terms
+        """
+        if food.name in self.order:
+            return
+        self.order[food.name] = len(self.order)
+        self.by_cuisine[food.cuisine_type].append(food.name)
+        self.by_flavor[food.flavor_profile].append(food.name)
+        for term in self.terms_of(food.flavor_profile):
+            self.by_flavor_term[term].append(food.name)
+
+    def terms_of(self, flavor_profile):
+        terms = self.profile_terms.get(flavor_profile)
+        if terms is None:
+            terms = self.profile_terms[flavor_profile] = self.flavor_terms(flavor_profile)
+        return terms
+
+    def matches(self, food):
+        """
+        Return food name : number of attributes shared with the given food (same cuisine, same flavor profile and one per
+        shared flavor term) for every other dish sharing at least one of them.
+        Time Complexity: O(size of the visited posting lists)
+        """
+        counts = defaultdict(int)
+        posting_lists = [self.by_cuisine.get(food.cuisine_type, []), self.by_flavor.get(food.flavor_profile, [])]
+        posting_lists.extend(self.by_flavor_term.get(term, []) for term in self.terms_of(food.flavor_profile))
+        for names in posting_lists:
+            for name in names:
+                counts[name] += 1
+        counts.pop(food.name, None)
+        return counts
+
+    def pairings(self, food):
+        """Return the names of the dishes sharing attributes with food, most shared attributes first, then catalog order."""
+        counts = self.matches(food)
+        return sorted(counts, key=lambda name: (-counts[name], self.order[name]))
 
-    def insert_offer_BST(self,food):
-        new_node = OfferNode(food)
-        if self.root is None:
-            self.root = new_node
+"""
+The MealSlotIndex precomputes the time-based suggestions. Meal types are normalized once (lower case) and mapped to one of
+the four meal slots (breakfast, lunch, dinner and late-night, which also takes snacks). For every (weekday/weekend, slot)
+pair the matching dishes are kept in catalog order, weekdays only taking quick meals under QUICK_MEAL_CALORIES, so a
+suggestion is a slice of the first TOP_N (or the first TOP_N a user may eat). Each slot also has a calorie-sorted bucket
+for calorie bounded queries.
+"""
+class MealSlotIndex:
+    QUICK_MEAL_CALORIES = 500  # Threshold for a quick meal
+    TOP_N = 5
+    MEAL_TYPE_SLOTS = {"breakfast": "breakfast", "lunch": "lunch", "dinner": "dinner", "snack": "late-night", "late-night": "late-night"}
+    SLOTS = ("breakfast", "lunch", "dinner", "late-night")
+
+    def __init__(self):
+        # (is_weekend, slot) : matching dish names in catalog order, the first TOP_N are the suggestions
+        self.ordered = {(weekend, slot): [] for weekend in (False, True) for slot in self.SLOTS}
+        # slot : calories in ascending order, and the dish names at the same positions
+        self.calories = {slot: [] for slot in self.SLOTS}
+        self.names = {slot: [] for slot in self.SLOTS}
+
+    @staticmethod
+    def slot_for_hour(hour):
+        if 6 <= hour < 11:
+            return "breakfast"
+        elif 11 <= hour < 17:
+            return "lunch"
+        elif 17 <= hour < 22:
+            return "dinner"
+        return "late-night"
+
+    def add(self, food):
+        """
+        Put a new food in its slot's calorie bucket and in the suggestion lists that still have room.
+        Time Complexity: O(log n) search + O(n) list insert for the bucket, O(1) for the suggestion lists
+        """
+        slot = self.MEAL_TYPE_SLOTS.get(food.meal_type.strip().lower())
+        if slot is None:
             return
-        current = self.root
-        while True:
-            if new_node.food.name < current.food.name:
-                if current.left is None:
-                    current.left = new_node
-                    return
-                else:
-                    current = current.left
-            elif new_node.food.name > current.food.name:
-                if current.right is None:
-                    current.right = new_node
-                    return
+        index = bisect.bisect_right(self.calories[slot], food.calories)
+        self.calories[slot].insert(index, food.calories)
+        self.names[slot].insert(index, food.name)
+
+        self.ordered[(True, slot)].append(food.name)
+        if food.calories < self.QUICK_MEAL_CALORIES:
+            self.ordered[(False, slot)].append(food.name)
+
+    def add_many(self, foods):
+        """
+        Bulk version of add: every slot's calorie bucket is rebuilt with one merge of the existing and new dishes.
+        Time Complexity: O(n + m log m) for m new items
+        """
+        batch = {slot: [] for slot in self.SLOTS}
+        for food in foods:
+            slot = self.MEAL_TYPE_SLOTS.get(food.meal_type.strip().lower())
+            if slot is None:
+                continue
+            batch[slot].append((food.calories, food.name))
+            self.ordered[(True, slot)].append(food.name)
+            if food.calories < self.QUICK_MEAL_CALORIES:
+                self.ordered[(False, slot)].append(food.name)
+        for slot, pairs in batch.items():
+            if not pairs:
+                continue
+            pairs.sort(key=lambda pair: pair[0])
+            merged = list(zip(self.calories[slot], self.names[slot])) + pairs
+            merged.sort(key=lambda pair: pair[0])
+            self.calories[slot] = [calories for calories, _ in merged]
+            self.names[slot] = [name for _, name in merged]
+
+    def suggestions(self, weekend, slot, accept=None):
+        """
+        Return the first TOP_N dishes of the slot, only those passing accept(name) when given.
+        Time Complexity: O(1) without accept, otherwise O(number of dishes scanned until TOP_N are accepted)
+        """
+        ordered = self.ordered[(weekend, slot)]
+        if accept is None:
+            return ordered[:self.TOP_N]
+        suggestions = []
+        for name in ordered:
+            if accept(name):
+                suggestions.append(name)
+                if len(suggestions) == self.TOP_N:
+                    break
+        return suggestions
+
+    def under_calories(self, slot, max_calories, limit=None):
+        """Return the dishes of a slot with fewer than max_calories calories, lightest first."""
+        end = bisect.bisect_left(self.calories[slot], max_calories)
+        if limit is not None:
+            end = min(end, limit)
+        return self.names[slot][:end]
+
+"""
+The DietaryFilter keeps users away from dishes they must not eat with one bitwise AND per dish. Every dish gets an
+exclusion bitmask made of one bit per allergen it contains and one bit per known diet (DIETS) it does not satisfy;
+a user's mask has the bits of their allergens and of their dietary preferences. A dish is safe for a user exactly when
+dish_mask & user_mask == 0. Diet bits are the even bits and allergen bits the odd bits, so new allergens can be added at
+any time without renumbering. Masks are memoized per distinct (restrictions, allergens) value, so most dishes share them.
+filter() checks a whole candidate list in one pass, vectorized with NumPy for long lists.
+"""
+class DietaryFilter:
+    DIETS = ("gluten-free", "nut-free", "dairy-free", "vegan", "vegetarian")
+    IMPLIED_DIETS = {"vegan": ("vegetarian", "dairy-free")}
+    VECTORIZE_FROM = 64  # candidate list length from which the NumPy path is used
+
+    def __init__(self):
+        self.allergen_bits = Vocabulary()  # allergen (lower case) : bit number among the allergen bits
+        self.food_masks = {}  # food name : exclusion mask
+        self.dish_masks = {}  # (dietary restrictions, allergens) : exclusion mask
+        self.user_masks = {}  # (dietary preferences, allergens) : exclusion mask
+
+    @staticmethod
+    def _terms(value):
+        """Normalize a list or comma separated string of labels (the string "None" meaning no label)."""
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = value.split(",")
+        return [term.strip().lower() for term in value if term and term.strip() and term.strip().lower() != "none"]
+
+    def _allergen_mask(self, allergens):
+        mask = 0
+        for allergen in self._terms(allergens):
+            mask |= 1 << (2 * self.allergen_bits.code(allergen) + 1)
+        return mask
+
+    def _diet_bit(self, diet):
+        return 1 << (2 * self.DIETS.index(diet))
+
+    def dish_mask(self, dietary_restrictions, allergens):
+        key = (dietary_restrictions, tuple(allergens) if isinstance(allergens, list) else allergens)
+        mask = self.dish_masks.get(key)
+        if mask is None:
+            satisfied = set()
+            for diet in self._terms(dietary_restrictions):
+                satisfied.add(diet)
+                satisfied.update(self.IMPLIED_DIETS.get(diet, ()))
+            mask = self._allergen_mask(allergens)
+            for diet in self.DIETS:
+                if diet not in satisfied:
+                    mask |= self._diet_bit(diet)
+            self.dish_masks[key] = mask
+        return mask
+
+    def add(self, food):
+        self.food_masks[food.name] = self.dish_mask(food.dietary_restrictions, food.allergens)
+
+    def user_mask(self, user):
+        """
+        Exclusion mask of a user, 0 (nothing excluded) when there is no user. Unknown diets are ignored, and so are
+        allergens no dish has: they are not given a bit here, so the filter is only modified by add() and by caching
+        the masks in user_masks (a mask with such an allergen is not cached, a later dish may give it a bit).
+        """
+        if user is None:
+            return 0
+        allergens = user.allergens
+        key = (user.dietary_pref if isinstance(user.dietary_pref, str) else tuple(user.dietary_pref),
+               allergens if isinstance(allergens, str) else tuple(allergens))
+        mask = self.user_masks.get(key)
+        if mask is None:
+            mask = 0
+            complete = True
+            for allergen in self._terms(allergens):
+                code = self.allergen_bits.codes.get(allergen)
+                if code is None:
+                    complete = False
                 else:
-                    current = current.right
+                    mask |= 1 << (2 * code + 1)
+            for diet in self._terms(user.dietary_pref):
+                if diet in self.DIETS:
+                    mask |= self._diet_bit(diet)
+            if complete:
+                self.user_masks[key] = mask
+        return mask
+
+    def allows(self, name, mask):
+        return not self.food_masks.get(name, 0) & mask
+
+    def filter(self, names, mask):
+        """
+        Return the names (in order) of the dishes allowed by the user mask.
+        Time Complexity: O(n) for n names, in one vectorized pass when NumPy is available and the list is long
+        """
+        if not mask:
+            return list(names)
+        food_masks = self.food_masks
+        # Every mask fits in 64 bits as long as there are at most 32 distinct allergens
+        if np is not None and len(names) >= self.VECTORIZE_FROM and len(self.allergen_bits) <= 32:
+            try:
+                masks = np.array(operator.itemgetter(*names)(food_masks), dtype=np.uint64)
+            except KeyError:  # a name outside the catalog, take the per name path
+                pass
+            else:
+                allowed = np.flatnonzero((masks & np.uint64(mask)) == 0).tolist()
+                return [names[index] for index in allowed]
+        return [name for name in names if not food_masks.get(name, 0) & mask]
 
-    """The in order traversal allows the lexicographical arrange of the food names"""
+"""
+An Offer is the promotion of one dish, running from start until end (epoch seconds, end None for no end).
+"""
+class Offer:
+    __slots__ = ("food", "text", "start", "end")
 
-    def in_order_offer(self):
-        offers = []
-        self._in_order_offer(self.root, offers)
-        return offers
+    def __init__(self, food, text, start, end=None):
+        self.food = food
+        self.text = text
+        self.start = start
+        self.end = end
 
-    def _in_order_offer(self, node, offers):
-        if node is None:
-            return
-        self._in_order_offer(node.left, offers)
-        offers.append(node.food)
-        self._in_order_offer(node.right, offers)
+"""
+The OfferIndex is the long-lived index of the special offers, maintained as offers are added instead of being rebuilt
+for every listing. Each dish has at most one offer (a new offer replaces the previous one). The names of the dishes
+whose offer is running are kept sorted, and two min-heaps schedule the offers by start and by end time. Nothing is
+removed eagerly: advance(now) pops the heap entries that are due, activating the offers that have started and expiring
+the ones that have ended (entries of replaced offers are simply skipped), and keeps food.promotion in sync. current(now)
+lists the running offers without modifying the index, so readers can share it while only the writer advances it.
+Time Complexity: O(log n) per add, O(k) to list the k running offers plus the amortized O(log n) per start / expiry
+"""
+class OfferIndex:
+    def __init__(self):
+        self.offers = {}  # food name : its current or scheduled Offer
+        self.active = []  # sorted names of the dishes whose offer is running
+        self.starts = []  # min-heap of (start, sequence, Offer)
+        self.ends = []  # min-heap of (end, sequence, Offer)
+        self.sequence = 0  # tie breaker, so offers themselves are never compared
+
+    def __len__(self):
+        return len(self.active)
+
+    def add(self, food, text, start, end=None):
+        """Schedule an offer for a dish, replacing its previous offer."""
+        previous = self.offers.get(food.name)
+        if previous is not None:
+            self._deactivate(previous)
+        offer = self.offers[food.name] = Offer(food, text, start, end)
+        self.sequence += 1
+        heapq.heappush(self.starts, (start, self.sequence, offer))
+        if end is not None:
+            heapq.heappush(self.ends, (end, self.sequence, offer))
+        return offer
+
+    def _is_active(self, name):
+        index = bisect.bisect_left(self.active, name)
+        return index < len(self.active) and self.active[index] == name
+
+    def _deactivate(self, offer):
+        index = bisect.bisect_left(self.active, offer.food.name)
+        if index < len(self.active) and self.active[index] == offer.food.name:
+            del self.active[index]
+            offer.food.promotion = None
+
+    def advance(self, now):
+        """Start and expire the offers that are due at time now. Returns whether the running offers changed."""
+        changed = False
+        while self.starts and self.starts[0][0] <= now:
+            offer = heapq.heappop(self.starts)[2]
+            name = offer.food.name
+            if self.offers.get(name) is offer and (offer.end is None or offer.end > now) and not self._is_active(name):
+                bisect.insort(self.active, name)
+                offer.food.promotion = offer.text
+                changed = True
+        while self.ends and self.ends[0][0] <= now:
+            offer = heapq.heappop(self.ends)[2]
+            if self.offers.get(offer.food.name) is offer:
+                del self.offers[offer.food.name]
+                changed |= self._is_active(offer.food.name)
+                self._deactivate(offer)
+        return changed
+
+    def due(self, now):
+        """Whether an offer starts or ends at or before now that advance() has not processed yet."""
+        return bool(self.starts and self.starts[0][0] <= now or self.ends and self.ends[0][0] <= now)
+
+    def current(self, now=None):
+        """
+        The offers running at time now (default: now), in lexicographical order of their dish names: the active offers
+        that have not ended and the offers whose start advance() has not processed yet, found by walking the part of the
+        starts heap that is due.
+        Time Complexity: O(k) for k running offers, O(k + s log s) with s unprocessed starts
+        """
+        if now is None:
+            now = time.time()
+        offers = self.offers
+        running = [offers[name] for name in self.active if offers[name].end is None or offers[name].end > now]
+        starts = self.starts
+        frontier = [0] if starts and starts[0][0] <= now else []
+        started = False
+        while frontier:
+            index = frontier.pop()
+            offer = starts[index][2]
+            name = offer.food.name
+            if offers.get(name) is offer and (offer.end is None or offer.end > now) and not self._is_active(name):
+                running.append(offer)
+                started = True
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(starts) and starts[child][0] <= now:
+                    frontier.append(child)
+        if started:
+            running.sort(key=lambda offer: offer.food.name)
+        return running
+
+"""
+The ResultCache memoizes recommendation results in a bounded LRU keyed by (endpoint, args, user). Instead of evicting
+entries when data changes, every entry records the versions of the data it was computed from (e.g ("ratings", cuisine)
+or ("orders", user)); writers only bump the counters they affect, and an entry whose recorded versions no longer match is
+recomputed on its next read. So a rating in one cuisine leaves the cached results of every other cuisine valid.
+Time Complexity: O(d) per lookup where d is the number of versions the entry depends on, O(1) per bump
+"""
+class ResultCache:
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # (endpoint, args, user) : (versions it was computed from, result)
+        self.versions = defaultdict(int)  # data key : version counter
+        self.hits = defaultdict(int)  # endpoint : cache hits
+        self.misses = defaultdict(int)  # endpoint : computations (missing or stale entry)
+        self.stale = defaultdict(int)  # endpoint : entries found but outdated by a version bump
+
+    def bump(self, *keys):
+        for key in keys:
+            self.versions[key] += 1
+
+    def get(self, endpoint, args, user, dependencies, compute):
+        """Return the cached result of endpoint(args) for user, computing and storing it when missing or stale."""
+        key = (endpoint, args, user)
+        versions = tuple(self.versions.get(dependency, 0) for dependency in dependencies)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] == versions:
+                self.hits[endpoint] += 1
+                with contextlib.suppress(KeyError):  # may have been evicted by another reader meanwhile
+                    self.entries.move_to_end(key)
+                return entry[1]
+            self.stale[endpoint] += 1
+        self.misses[endpoint] += 1
+        result = compute()
+        self.entries[key] = (versions, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            with contextlib.suppress(KeyError):
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        """Hit / miss counts and hit ratio, in total and per endpoint."""
+        endpoints = sorted(set(self.hits) | set(self.misses))
+        per_endpoint = {endpoint: {"hits": self.hits[endpoint], "misses": self.misses[endpoint],
+                                   "stale": self.stale[endpoint]} for endpoint in endpoints}
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {"hits": hits, "misses": misses, "stale": sum(self.stale.values()),
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+                "size": len(self.entries), "max_size": self.max_size, "endpoints": per_endpoint}
 
 """
 The RecommendationSystem class has attributes such as users(list of users in the system),food_items (list of food items in the system), logged_user (maintains the current logged in user),
-graph (the graph which has the relationships between user and food for the system), nutritionTree (the nutritionTree which stores the food nodes based on nutrition score), popular_dishes (a dictionary
-which stores the food_name : count of the food_ordered) and available_restritions
+graph (the graph which has the relationships between user and food for the system), nutritionTree (the sorted nutrition index which stores the food nodes based on nutrition score), popular_dishes (a dictionary
+which stores the food_name : count of the food_ordered), available_restritions and catalog (the name -> Food / User hash indexes used for every lookup by name)
 The methods in this class serves as the important functions which interact with user and provide outputs which recommends food to the user.
 """
 class RecommendationSystem:
-    def __init__(self):
+    def __init__(self, columnar=False):
         self.users = []
         self.food_items = []
+        self.food_table = FoodTable() if columnar else None  # struct-of-arrays storage of the dishes, if enabled
         self.logged_user = None  # Store the current logged in user
         self.graph = Graph()
         self.nutritionTree = NutritionTree() 
         self.popular_dishes = {}
+        # Streaming top-K trackers fed by order_food: all-time counts and counts decaying with a half-life of the window
+        self.popularity = {
+            "all": PopularityTracker(),
+            "hour": PopularityTracker(half_life=60 * 60),
+            "day": PopularityTracker(half_life=24 * 60 * 60),
+            "week": PopularityTracker(half_life=7 * 24 * 60 * 60),
+        }
         self.available_restrictions = ["Gluten-Free", "Nut-Free", "Dairy-Free", "Vegan", "Vegetarian"]
         self.cuisine_trie = CuisineTrie()  # Trie for cuisines
+        self.autocomplete = AutocompleteTrie()  # cuisine and dish names ranked by (times ordered, rating)
         self.cuisines = {}  # cuisine_type: List of Dishes
-        self.new_arrivals = DoublyLinkedList()
-        self.promotion_list = []
+        self.rating_heaps = {}  # cuisine_type: indexed MaxHeap of its dishes by rating
+        self.new_arrivals = NewArrivals()  # newest dishes overall and per cuisine, with their arrival times
+        self.offer_index = OfferIndex()  # running and scheduled special offers
+        self.catalog = Catalog()  # name -> Food / User hash indexes
+        self.attribute_index = AttributeIndex()  # cuisine / flavor -> dishes, for pairing
+        self.meal_slots = MealSlotIndex()  # precomputed time-based suggestions
+        self.dietary_filter = DietaryFilter()  # allergen / diet exclusion bitmasks of every dish
+        self.similarity = DishSimilarityIndex()  # k nearest dishes by nutrition, cuisine, meal type and flavor
+        self.store = None  # optional persistence.SQLiteStore receiving orders, ratings and offers
+        self.order_pipeline = None  # optional OrderPipeline that order_food submits the orders to
+        self.rating_model = None  # factorization.FactorizationModel trained by train_rating_model
+        self.cache = ResultCache()  # versioned results of the read-mostly recommendation endpoints
 
     """The adduser methods gets arguements such as name,password,address,fav cuisine and dietary preferences and checks the existence of user by name. If no user exists with the name, specific
     allergens will be collected from the user and then these arg are passed to the constructor of the user node and a new node is created. After the creation, a new vertex is added in the graph and the user list is appended with the new
     user."""
     def addUser(self,temp_name, temp_pass, temp_address, temp_fav_cuisine, temp_dietary_pref):
-        for name in self.users:
-            if (name==temp_name):
-                print("Username already exists. Try again!")
-                return
+        if self.catalog.has_user(temp_name):
+            print("Username already exists. Try again!")
+            return
         temp_allergens = "None"
         new_user = User(temp_name, temp_pass, temp_address, temp_fav_cuisine, temp_dietary_pref,temp_allergens)
+        self.catalog.add_user(new_user)
         self.users.append(new_user)
         self.graph.add_vertex(new_user)
         print(f"{temp_name} is added successfully!\n")
@@ -386,29 +1560,135 @@ class RecommendationSystem:
     If the food is new, the function calculates a nutrition score using the provided nutritional information.
     The new food is then added to both the list of food items and the graph, as well as the nutrition tree for quick lookups by nutritional value.
     The method also ensures that food is associated with any dietary restrictions and allergens.
+    timestamp is the arrival time of the dish (default: now); a VersionedSystem takes it when the dish is submitted.
     """
-    def addFood(self,temp_name,temp_cuisine_type,temp_calories,temp_proteins,temp_fats,temp_carbohydrates,temp_vitamins,temp_minerals,temp_dietary_restrictions,temp_allergens,temp_meal_type,temp_flavor_profile):
+    def addFood(self,temp_name,temp_cuisine_type,temp_calories,temp_proteins,temp_fats,temp_carbohydrates,temp_vitamins,temp_minerals,temp_dietary_restrictions,temp_allergens,temp_meal_type,temp_flavor_profile,timestamp=None):
         # Check if food already exists
-        for food in self.food_items:
-            if food.name == temp_name:
-                print("Food item already exists. Try again!\n")
-                return
+        if self.catalog.has_food(temp_name):
+            print("Food item already exists. Try again!\n")
+            return
         #calculate nutrition score    
         temp_score = self.nutrition_score(temp_calories,temp_proteins,temp_fats,temp_carbohydrates,temp_vitamins,temp_minerals)
-        new_food = Food(temp_name,temp_cuisine_type,temp_calories,temp_score,temp_dietary_restrictions,temp_allergens,temp_meal_type,temp_flavor_profile)
+        new_food = self.new_food(temp_name,temp_cuisine_type,temp_calories,temp_score,temp_dietary_restrictions,temp_allergens,temp_meal_type,temp_flavor_profile)
         #Cuisine based reco 
         if temp_cuisine_type in self.cuisines:
             new_food.timestamp = len(self.cuisines[temp_cuisine_type])
             self.cuisines[temp_cuisine_type].append(new_food)
-            self.new_arrivals.append(new_food)
+            self.rating_heaps[temp_cuisine_type].push(new_food)
         else:
             print(f"Warning: Cuisine type '{temp_cuisine_type}' not found in system. Food item will not be available for cuisine-based recommendations.\n")
 
+        self.catalog.add_food(new_food)
+        self.new_arrivals.add(new_food, time.time() if timestamp is None else timestamp)
+        self.attribute_index.add(new_food)
+        self.meal_slots.add(new_food)
+        self.dietary_filter.add(new_food)
         self.food_items.append(new_food)
         self.graph.add_vertex(new_food)
         self.nutritionTree.insert_food(new_food)
+        self.autocomplete.insert(new_food.name, "dish", (0, new_food.rating))
+        self.similarity.add(new_food.name, temp_cuisine_type, temp_meal_type, self.attribute_index.terms_of(temp_flavor_profile),
+                            temp_calories, temp_proteins, temp_fats, temp_carbohydrates, len(temp_vitamins),
+                            len(temp_minerals), temp_score)
+        self.bump_food_versions(new_food)
         
         print(f"{new_food.name} added succesfully!\n")
+
+    # Creates a dish object: a Food, or a FoodRow of the food table with the columnar backend.
+    def new_food(self, name, cuisine_type, calories, nutrition_score, dietary_restrictions, allergens, meal_type, flavor_profile):
+        if self.food_table is not None:
+            return self.food_table.add(name, cuisine_type, calories, nutrition_score, dietary_restrictions, allergens,
+                                       meal_type, flavor_profile)
+        return Food(name, cuisine_type, calories, nutrition_score, dietary_restrictions, allergens, meal_type, flavor_profile)
+
+    """
+    The add_foods_bulk function is the batch version of addFood used for catalog imports. It takes an iterable of food
+    records (dictionaries with the addFood argument names without the temp_ prefix, see catalog_loader.FOOD_FIELDS),
+    skips names that already exist (in the system or earlier in the batch), computes all nutrition scores in one vectorized
+    pass and creates the dishes, then fills the derived indexes in one batch pass each: sorted merges for the nutrition
+    index and meal slot buckets, one bottom-up rebuild per cuisine rating heap, AutocompleteTrie.insert_many, only the
+    newest dishes that fit in the new arrival rings, the similarity features (indexed by the next build) and one result
+    cache bump per distinct key. Nothing is printed per item; the number of added and skipped records is returned instead.
+    timestamp is the arrival time of the dishes, now by default.
+    """
+    def add_foods_bulk(self, records, timestamp=None):
+        batch = []
+        seen = set()
+        skipped = 0
+        for record in records:
+            name = record["name"]
+            if name in seen or self.catalog.has_food(name):
+                skipped += 1
+                continue
+            seen.add(name)
+            batch.append(record)
+
+        scores = self.nutrition_scores(
+            [record["calories"] for record in batch], [record["proteins"] for record in batch],
+            [record["fats"] for record in batch], [record["carbohydrates"] for record in batch],
+            [len(record["vitamins"]) for record in batch], [len(record["minerals"]) for record in batch])
+
+        new_foods = []
+        by_cuisine = defaultdict(list)
+        features = []
+        profiles = set()
+        for record, score in zip(batch, scores):
+            new_food = self.new_food(record["name"], record["cuisine_type"], record["calories"], score,
+                                     record["dietary_restrictions"], record["allergens"], record["meal_type"],
+                                     record["flavor_profile"])
+            if new_food.cuisine_type in self.cuisines:
+                new_food.timestamp = len(self.cuisines[new_food.cuisine_type])
+                self.cuisines[new_food.cuisine_type].append(new_food)
+                by_cuisine[new_food.cuisine_type].append(new_food)
+            self.catalog.add_food(new_food)
+            self.attribute_index.add(new_food)
+            self.dietary_filter.add(new_food)
+            self.graph.add_vertex(new_food)
+            terms = self.attribute_index.terms_of(record["flavor_profile"])
+            features.append((new_food.name, record["cuisine_type"], record["meal_type"], terms,
+                             [record["calories"], record["proteins"], record["fats"], record["carbohydrates"],
+                              len(record["vitamins"]), len(record["minerals"]), score]))
+            profiles.add((new_food.cuisine_type, new_food.flavor_profile))
+            new_foods.append(new_food)
+
+        for cuisine_type, foods in by_cuisine.items():
+            self.rating_heaps[cuisine_type].push_many(foods)
+        self.food_items.extend(new_foods)
+        self.meal_slots.add_many(new_foods)
+        self.nutritionTree.insert_many(new_foods)
+        self.new_arrivals.add_many(new_foods, time.time() if timestamp is None else timestamp)
+        self.autocomplete.insert_many((food.name, "dish", (0, food.rating)) for food in new_foods)
+        self.similarity.add_many(features)
+        versions = {"nutrition_index"}
+        for cuisine_type, flavor_profile in profiles:
+            versions.add(("dishes", cuisine_type))
+            versions.add(("flavor", flavor_profile))
+            versions.update(("flavor_term", term) for term in self.attribute_index.terms_of(flavor_profile))
+        self.cache.bump(*versions)
+        return {"added": len(new_foods), "skipped": skipped}
+
+    # A new dish changes its cuisine's listing, the pairings sharing one of its attributes and the nutrition index.
+    def bump_food_versions(self, food):
+        self.cache.bump(("dishes", food.cuisine_type), ("flavor", food.flavor_profile), "nutrition_index",
+                        *[("flavor_term", term) for term in self.attribute_index.terms_of(food.flavor_profile)])
+
+    """
+    The add_users_bulk function is the batch version of addUser. Each record has the addUser argument names without the
+    temp_ prefix and optionally a list of allergens. Existing names are skipped and nothing is printed per user.
+    """
+    def add_users_bulk(self, records):
+        added = 0
+        skipped = 0
+        for record in records:
+            new_user = User(record["name"], record["password"], record["address"], record["fav_cuisine"],
+                            record["dietary_pref"], record.get("allergens"))
+            if not self.catalog.add_user(new_user):
+                skipped += 1
+                continue
+            self.users.append(new_user)
+            self.graph.add_vertex(new_user)
+            added += 1
+        return {"added": added, "skipped": skipped}
     
     """
     The login_user function handles user authentication by prompting the user for their username and password.
@@ -421,47 +1701,135 @@ class RecommendationSystem:
         temp_pass = input("Enter your password: ")
         
         #Find the user in the system
-        for user in self.users:
-            if user.name == temp_name:
-                # check password
-                if temp_pass == user.password:
-                    print(f"User {temp_name} logged in successfully!")
-                    self.logged_user = user  # Store the logged-in user for future purpose like for recommending for the logged in user.
-                    return True
-                else:
-                    print("Invalid password.")
-                    sys.exit()
-                    return False
+        user = self.catalog.get_user(temp_name)
+        if user is not None:
+            # check password
+            if self.authenticate(temp_name, temp_pass) is not None:
+                print(f"User {temp_name} logged in successfully!")
+                self.logged_user = user  # Store the logged-in user for future purpose like for recommending for the logged in user.
+                return True
+            else:
+                print("Invalid password.")
+                sys.exit()
+                return False
         
         print(f"User '{temp_name}' not found.")
         sys.exit()
         return False
+
+    # Returns the user if the name exists and the password matches, otherwise None. Used by login_user and the server sessions.
+    def authenticate(self, name, password):
+        user = self.catalog.get_user(name)
+        if user is not None and user.password == password:
+            return user
+        return None
+
+    """
+    acting_as temporarily makes the given user the logged in user, so that a request of one session (see server.Session)
+    runs all the logged_user based methods for that session's user. The previous logged in user is restored afterwards.
+    """
+    @contextlib.contextmanager
+    def acting_as(self, user):
+        previous = self.logged_user
+        self.logged_user = user
+        try:
+            yield self
+        finally:
+            self.logged_user = previous
     """
     The order_food function allows a logged-in user to place an order for a specific food item.
     It checks if the user is logged in, then searches for the specified food item by name.
     If the food item exists, an edge is added between the user and the food in the graph to track the relationship.
     The user's order history is updated, and the system tracks the popularity of food items based on the number of times they are ordered.
-    If the food item is not found, the function informs the user.
+    With an order pipeline attached the order is submitted to it instead, and applied with its micro-batch: order_food waits
+    for that by default (wait=False only queues the order). If the food item is not found, the function informs the user.
     """
-    def order_food(self,food_name,quantity):
+    def order_food(self,food_name,quantity,wait=True):
         if not self.logged_user:
             print("User not logged in.")
             return
-        for food in self.food_items:
-            if food.name == food_name:
-                self.graph.add_edge(self.logged_user,food)
-                self.logged_user.order_history.append((food_name,quantity))
-
-                # Update the count of ordered food for popularity
-                if food_name in self.popular_dishes:
-                    self.popular_dishes[food_name] += quantity
-                else:
-                    self.popular_dishes[food_name] = quantity
+        food = self.catalog.get_food(food_name)
+        if food is not None:
+            now = time.time()
+            if self.order_pipeline is not None:
+                # The pipeline applies and records the order with its batch; wait for it unless asked not to
+                self.order_pipeline.submit(self.logged_user.name, food_name, quantity, now, wait)
+            else:
+                self.apply_order(self.logged_user, food, quantity, now)
+                if self.store is not None:
+                    self.store.record_order(self.logged_user.name, food_name, quantity, now)
 
-                print(f"Food ordered: {self.logged_user.name} Ordered {food_name},Quantity: {quantity}")
-                return
+            print(f"Food ordered: {self.logged_user.name} Ordered {food_name},Quantity: {quantity}")
+            return
         
         print(f"Food item '{food_name}' not found.")
+        self.print_suggestions(food_name, "dish")
+
+    """
+    apply_order updates the in-memory state for one order of a user: the user-food edge in the graph, the user's order history
+    and the popularity counters. It is shared by order_food and by the replay of persisted orders at startup.
+    """
+    def apply_order(self, user, food, quantity, timestamp):
+        self.graph.add_edge(user,food)
+        user.order_history.append((food.name,quantity))
+
+        # Update the count of ordered food for popularity
+        if food.name in self.popular_dishes:
+            self.popular_dishes[food.name] += quantity
+        else:
+            self.popular_dishes[food.name] = quantity
+        for tracker in self.popularity.values():
+            tracker.add(food.name, quantity, timestamp)
+        self.cache.bump("popularity", ("orders", user.name))
+        self.autocomplete.update(food.name, "dish", (self.popular_dishes[food.name], food.rating))
+        cuisine_score = self.autocomplete.scores.get(("cuisine", food.cuisine_type))
+        if cuisine_score is not None:
+            self.autocomplete.update(food.cuisine_type, "cuisine", (cuisine_score[0] + quantity, 0))
+
+    """
+    apply_orders is the batch version of apply_order, with the same effects, for a list of (user, food, quantity, timestamp) orders (see
+    order_pipeline.OrderPipeline). The batch is coalesced first, so every derived structure is updated once per distinct
+    key: one graph edge update per (user, food) pair weighted by its number of orders, one order history extension and
+    cache bump per user, and one popularity and autocomplete update per dish and cuisine. The time-decayed trackers
+    receive the decayed quantities of a dish summed at the latest timestamp of the batch, which gives the same scores as
+    adding the orders one by one.
+    Time Complexity: O(n + d log K) for n orders of d distinct dishes
+    """
+    def apply_orders(self, orders):
+        if not orders:
+            return
+        latest = max(order[3] for order in orders)
+        decayed = {window: defaultdict(float) for window, tracker in self.popularity.items() if tracker.decay_rate}
+        pair_counts = defaultdict(int)
+        histories = defaultdict(list)
+        quantities = defaultdict(int)
+        for user, food, quantity, timestamp in orders:
+            pair_counts[(user, food)] += 1
+            histories[user].append((food.name, quantity))
+            quantities[food] += quantity
+            for window, sums in decayed.items():
+                sums[food] += quantity * math.exp(self.popularity[window].decay_rate * (timestamp - latest))
+
+        for (user, food), count in pair_counts.items():
+            self.graph.add_edge(user, food, count)
+        for user, history in histories.items():
+            user.order_history.extend(history)
+        # Update the count of ordered food for popularity
+        cuisine_quantities = defaultdict(int)
+        for food, quantity in quantities.items():
+            self.popular_dishes[food.name] = self.popular_dishes.get(food.name, 0) + quantity
+            cuisine_quantities[food.cuisine_type] += quantity
+        for window, tracker in self.popularity.items():
+            sums = decayed.get(window, quantities)
+            for food in quantities:
+                tracker.add(food.name, sums[food], latest)
+        self.cache.bump("popularity", *[("orders", user.name) for user in histories])
+        updates = [(food.name, "dish", (self.popular_dishes[food.name], food.rating)) for food in quantities]
+        for cuisine, quantity in cuisine_quantities.items():
+            cuisine_score = self.autocomplete.scores.get(("cuisine", cuisine))
+            if cuisine_score is not None:
+                updates.append((cuisine, "cuisine", (cuisine_score[0] + quantity, 0)))
+        self.autocomplete.update_many(updates)
 
    
     # This method allows the currently logged-in user to update their dietary preferences and allergens.
@@ -482,6 +1850,15 @@ class RecommendationSystem:
         
         print("Dietary preferences and allergens updated successfully.")
     
+    # Exclusion bitmask of the logged in user's allergens and dietary preferences (0 when nobody is logged in).
+    def exclusion_mask(self):
+        return self.dietary_filter.user_mask(self.logged_user)
+
+    # This helper method prompts the user for their allergens as a comma-separated list.
+    def get_allergens(self):
+        allergens = input("Enter your allergens (comma-separated, or 'none'): ")
+        return [allergen.strip() for allergen in allergens.split(",") if allergen.strip() and allergen.strip().lower() != "none"]
+
     # This helper method prompts the user to input dietary restrictions from a pre-defined list.
     # It continuously displays the list of available restrictions and collects the user’s choices until they are done.
     def get_dietary_restrictions(self):
@@ -500,30 +1877,27 @@ class RecommendationSystem:
         return restrictions
     
     # Provides a list of complementary dishes based on the selected main dish, considering cuisine type and flavor profile.
+    # The candidates come from the inverted AttributeIndex and are ranked by how many attributes they share with the main dish.
     def pair_recommendations(self, main_dish_name):
         if not self.logged_user:
             print("User not logged in.")
             return []
 
-        complementary_dishes = []
-        selected_main_dish = None
-
-        # Find the main dish in food_items
-        for food in self.food_items:
-            if food.name == main_dish_name:
-                selected_main_dish = food
-                break
+        # Find the main dish in the catalog
+        selected_main_dish = self.catalog.get_food(main_dish_name)
         
         if not selected_main_dish:
             print(f"Main dish '{main_dish_name}' not found.")
+            self.print_suggestions(main_dish_name, "dish")
             return []
 
-        # Recommend complementary dishes based on cuisine type and flavor profile
-        for food in self.food_items:
-            if food.name != main_dish_name:
-                # Simple logic: Suggest dishes of the same cuisine type or compatible flavor profiles
-                if food.cuisine_type == selected_main_dish.cuisine_type or food.flavor_profile==selected_main_dish.flavor_profile:
-                    complementary_dishes.append(food.name)
+        # Recommend complementary dishes sharing the cuisine type, the flavor profile or any of its flavor terms
+        dependencies = [("dishes", selected_main_dish.cuisine_type), ("flavor", selected_main_dish.flavor_profile)]
+        dependencies.extend(("flavor_term", term) for term in self.attribute_index.terms_of(selected_main_dish.flavor_profile))
+        mask = self.exclusion_mask()
+        complementary_dishes = self.cache.get(
+            "pair_recommendations", (main_dish_name,), mask, dependencies,
+            lambda: self.dietary_filter.filter(self.attribute_index.pairings(selected_main_dish), mask))
 
         if complementary_dishes:
             print(f"Complimentary Dishes for {main_dish_name}")
@@ -532,69 +1906,154 @@ class RecommendationSystem:
             print(f"No pairing recommendations found for {main_dish_name}.")
             return []
 
-    
+
+    """
+    The similar_dishes function recommends the k dishes closest to a given dish by calories, macronutrients, nutrition
+    score, cuisine, meal type and flavor terms, using the precomputed neighbour lists of the similarity index. Dishes the
+    logged in user cannot eat are skipped. Without NumPy the dishes sharing the most attributes are returned instead.
+    """
+    def similar_dishes(self, name, k=5):
+        if not self.logged_user:
+            print("User not logged in.")
+            return []
+        food = self.catalog.get_food(name)
+        if not food:
+            print(f"Dish '{name}' not found.")
+            self.print_suggestions(name, "dish")
+            return []
+        mask = self.exclusion_mask()
+        if np is None:
+            similar = self.dietary_filter.filter(self.attribute_index.pairings(food), mask)[:k]
+        else:
+            if not self.similarity.ready:
+                self.similarity.build()
+            similar = self.similarity.similar_dishes(
+                name, k, (lambda dish: self.dietary_filter.allows(dish, mask)) if mask else None)
+        if similar:
+            print(f"Dishes similar to {name}:")
+            return self.print_recommendations(similar)
+        print(f"No similar dishes found for {name}.")
+        return []
+
     def add_cuisine(self, cuisine):
         self.cuisine_trie.insert(cuisine)
+        self.autocomplete.insert(cuisine, "cuisine", (0, 0))
         self.cuisines[cuisine] = []
+        self.rating_heaps[cuisine] = MaxHeap()
     
     def rate_dish(self,cuisine, dish_name, rating):
         if  self.cuisine_trie.search(cuisine):
-            self.logged_user.ratings[dish_name] = rating
-            
-            # Update the rating in the dish list
-            for food in self.cuisines.get(cuisine,[]):
-                if food.name == dish_name:
-                    food.rating = rating
-                    print(f"Rated {dish_name} with {rating} in {cuisine}.")
-                    return
+            # Update the rating of the dish if it belongs to this cuisine
+            food = self.catalog.get_food(dish_name)
+            if food is not None and food.cuisine_type == cuisine and cuisine in self.cuisines:
+                self.apply_rating(self.logged_user, food, rating)
+                if self.store is not None:
+                    self.store.record_rating(self.logged_user.name, cuisine, dish_name, rating, time.time())
+                print(f"Rated {dish_name} with {rating} in {cuisine}.")
+                return
             print(f"Dish '{dish_name}' not found in cuisine '{cuisine}'.")
+            self.print_suggestions(dish_name, "dish")
         else:
             print(f"Cuisine '{cuisine}' not found in the system.")
+            self.print_suggestions(cuisine, "cuisine")
+
+    """
+    autocomplete_names returns up to limit cuisine and/or dish names starting with the typed prefix (case insensitive), the most
+    ordered first and then the best rated. print_suggestions uses it to help when a typed name is not found.
+    """
+    def autocomplete_names(self, prefix, limit=5, kind=None):
+        return self.autocomplete.prefix_search(prefix.strip(), limit, kind)
+
+    def print_suggestions(self, typed, kind=None):
+        suggestions = [name for name in self.autocomplete_names(typed, 5, kind) if name != typed]
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
+
+    # Updates the in-memory state for one rating of a user (shared by rate_dish and the replay of persisted ratings).
+    # A user rating the same dish again replaces their previous rating in the dish's aggregates.
+    def apply_rating(self, user, food, rating):
+        previous = user.ratings.get(food.name)
+        if previous is None:
+            food.rating_count += 1
+            food.rating_sum += rating
+        else:
+            food.rating_sum += rating - previous
+        user.ratings[food.name] = rating
+        food.rating = self.bayesian_rating(food)
+        if food.cuisine_type in self.rating_heaps:
+            self.rating_heaps[food.cuisine_type].update(food)
+        self.cache.bump(("ratings", food.cuisine_type))
+        self.autocomplete.update(food.name, "dish", (self.popular_dishes.get(food.name, 0), food.rating))
+
+    # Bayesian mean of a dish's ratings: the average pulled towards RATING_PRIOR_MEAN as if RATING_PRIOR_WEIGHT extra
+    # ratings of that value had been given, so one 5 star rating does not outrank many 4.8 ones.
+    RATING_PRIOR_MEAN = 3.0
+    RATING_PRIOR_WEIGHT = 2
+
+    def bayesian_rating(self, food):
+        if not food.rating_count:
+            return 0
+        return ((self.RATING_PRIOR_MEAN * self.RATING_PRIOR_WEIGHT + food.rating_sum)
+                / (self.RATING_PRIOR_WEIGHT + food.rating_count))
 
-    def cuisine_based_recommendations(self, cuisine):
+    """
+    rating_matrix builds the sparse users x dishes matrix of every user's ratings and train_rating_model factorizes it
+    (see factorization.train_als), precomputing each user's top dishes. Once trained, personalized_recommendations
+    serves these lists; the model is a snapshot and takes new ratings into account when it is retrained.
+    """
+    def rating_matrix(self):
+        return RatingMatrix.from_users(self.users)
+
+    def train_rating_model(self, **options):
+        self.rating_model = train_als(self.rating_matrix(), **options)
+        return self.rating_model
+
+    def cuisine_based_recommendations(self, cuisine, k=None):
         #Validate cuisine exists
         if not self.cuisine_trie.search(cuisine):
             print(f"Cuisine '{cuisine}' not found in the system.")
+            self.print_suggestions(cuisine, "cuisine")
             return []
         #Check if cuisine has dishes
         if cuisine not in self.cuisines or not self.cuisines[cuisine]:
             print(f"No dishes found for cuisine '{cuisine}'.")
             return []
 
-        # Use MaxHeap to get top rated dishes
-        max_heap = MaxHeap()
-        for food in self.cuisines[cuisine]:
-            max_heap.push(food)
-
-        # Collect dishes sorted by rating (highest to lowest)
+        # Read the top rated dishes from the cuisine's persistent MaxHeap (all of them when k is not given)
         print(f"Top Rated {cuisine} Dishes:")
-        top_dishes = []
-        while len(max_heap.heap) > 0:
-            dish = max_heap.pop()
-            top_dishes.append(dish.name)
+        mask = self.exclusion_mask()
+        top_dishes = self.cache.get("cuisine_based_recommendations", (cuisine, k), mask,
+                                    [("dishes", cuisine), ("ratings", cuisine)],
+                                    lambda: self.top_k(cuisine, len(self.cuisines[cuisine]) if k is None else k, mask))
         return self.print_recommendations(top_dishes)
-        
-    def get_new_arrivals(self):
+
+    def top_k(self, cuisine, k, mask=0):
         """
-        Retrieve most recently added dishes.
-        It return the List of dish names ordered from newest to oldest
-        Time Complexity: O(k) where k is max size of new arrivals list
+        Return the names of the k highest rated dishes of a cuisine, highest first, skipping the dishes excluded by the
+        dietary mask if one is given.
+        The per-cuisine MaxHeap is kept up to date by addFood and rate_dish, so nothing is rebuilt here.
+        Time Complexity: O(k log k)
         """
-        #Initialize result collection
-        arrivals = []
-        current = self.new_arrivals.tail  # Start from most recent
-        #Handle empty case
-        if self.new_arrivals.size == 0:
+        heap = self.rating_heaps.get(cuisine)
+        if heap is None:
             return []
-        #Collect recent arrivals up to max size
-        while current and len(arrivals) < self.new_arrivals.max_size:
-            arrivals.append(current.food.name)
-            current = current.prev
+        accept = (lambda name: self.dietary_filter.allows(name, mask)) if mask else None
+        return [dish.name for dish in heap.top_k(k, accept)]
         
-        return self.print_recommendations(arrivals)
-    
+    def get_new_arrivals(self, cuisine=None, since=None, k=5):
+        """
+        Retrieve most recently added dishes, overall or in one cuisine, optionally only those added at or after since
+        (epoch seconds). Dishes the logged in user cannot eat are skipped.
+        It return the List of dish names ordered from newest to oldest
+        Time Complexity: O(k) plus the skipped dishes
+        """
+        mask = self.exclusion_mask()
+        accept = (lambda name: self.dietary_filter.allows(name, mask)) if mask else None
+        return self.print_recommendations(self.new_arrivals.recent(k, cuisine, since, accept))
+
     """
     The personalized_recommendations function generates food recommendations for the logged-in user based on their previous orders.
+    When a rating model has been trained (train_rating_model), the user's precomputed list of best predicted dishes is served instead.
     It checks the logged-in user's connections (edges) in the graph to suggest food items they have already ordered.
     If no orders are found, it attempts to recommend items ordered by other users. If recommendations are still not found, it falls back to time-based suggestions.
     The function returns a list of up to 5 food items as recommendations.
@@ -603,18 +2062,30 @@ class RecommendationSystem:
         if not self.logged_user:
             print("User not logged in.")
             return []
-        recommendations = []
-        if self.logged_user in self.graph.adj_list and self.graph.adj_list[self.logged_user]:
-            for food in self.graph.adj_list[self.logged_user]:
-                if food.name not in recommendations:
-                    recommendations.append(food.name)
+        mask = self.exclusion_mask()
+        # With a trained rating model the list is precomputed: one lookup, then the dietary filter
+        if self.rating_model is not None:
+            recommendations = self.dietary_filter.filter(self.rating_model.recommendations(self.logged_user.name), mask)
+            if recommendations:
+                print(f"{self.logged_user.name}'s Personalised Recommendations: ")
+                return self.print_recommendations(recommendations[:5])
+        # The graph stores each user-food edge once, so the neighbours are already the distinct dishes in order
+        ordered = [food.name for food in self.graph.neighbors(self.logged_user)]
+        recommendations = self.dietary_filter.filter(ordered, mask)
     
         if not recommendations:
-            print(f"No orders found for user '{self.logged_user.name}'. Recommending from other users.")
+            if ordered:
+                print(f"No dishes ordered by '{self.logged_user.name}' match their dietary preferences. Recommending from other users.")
+            else:
+                print(f"No orders found for user '{self.logged_user.name}'. Recommending from other users.")
+            seen = set()
             for user in self.users:
-                if user != self.logged_user and user in self.graph.adj_list:
-                    for food in self.graph.adj_list[user]:
-                        if food.name not in recommendations:
+                if len(recommendations) >= 5:
+                    break
+                if user != self.logged_user:
+                    for food in self.graph.neighbors(user):
+                        if food.name not in seen and self.dietary_filter.allows(food.name, mask):
+                            seen.add(food.name)
                             recommendations.append(food.name)
     
     # Cold case handling: if still no recommendations, use any of the other reco methods
@@ -636,6 +2107,19 @@ class RecommendationSystem:
         score += len(vitamins) * 2  # Each vitamin adds 
         score += len(minerals) * 1.5  # Each mineral adds
         return score
+
+    """
+    nutrition_scores is the vectorized version of nutrition_score for a whole batch of foods. It takes one sequence per
+    attribute (vitamins and minerals as counts) and evaluates the same formula over NumPy arrays when NumPy is installed.
+    """
+    def nutrition_scores(self, calories, proteins, fats, carbs, vitamin_counts, mineral_counts):
+        if np is not None:
+            scores = (np.asarray(proteins, dtype=float) * 4 + np.asarray(fats, dtype=float) * 9
+                      + np.asarray(carbs, dtype=float) * 4 - np.asarray(calories, dtype=float) * 0.1
+                      + np.asarray(vitamin_counts, dtype=float) * 2 + np.asarray(mineral_counts, dtype=float) * 1.5)
+            return scores.tolist()
+        return [(p * 4) + (f * 9) + (c * 4) - (cal * 0.1) + v * 2 + m * 1.5
+                for cal, p, f, c, v, m in zip(calories, proteins, fats, carbs, vitamin_counts, mineral_counts)]
     """
     The recommend_based_on_nutrition function generates food recommendations for the logged-in user based on their average nutritional score.
     It first calculates the average nutrition score of the foods the user has previously ordered, which are accessible through the edges in the graph.
@@ -644,21 +2128,27 @@ class RecommendationSystem:
     then the function prints the top recommendations using the print_recommendations function.
     """
     def recommend_based_on_nutrition(self):
-        total_Score = 0
-        count = 0
-        for food in self.graph.adj_list[self.logged_user]:
-            total_Score+=food.nutrition_score
-            count+=1
-        if count==0:
+        if not self.graph.degree(self.logged_user):
             print("No food ordered yet to calculate average nutrition score.")
             return []
-        avg_score = total_Score/count
-
-        recommendations = self.nutritionTree.inorder_recommendations(avg_score,15)
+        mask = self.exclusion_mask()
+        recommendations = self.cache.get("recommend_based_on_nutrition", (mask,), self.logged_user.name,
+                                         [("orders", self.logged_user.name), "nutrition_index"],
+                                         lambda: self.dietary_filter.filter(self._nutrition_recommendations(), mask))
         if recommendations:    
             print("Nutrition based recommendations: ")
         return self.print_recommendations(recommendations)
     
+    def _nutrition_recommendations(self):
+        total_Score = 0
+        count = 0
+        # Each distinct dish is weighted by how many times the user ordered it
+        for food, order_count in self.graph.edges(self.logged_user):
+            total_Score+=food.nutrition_score * order_count
+            count+=order_count
+        avg_score = total_Score/count
+        return self.nutritionTree.inorder_recommendations(avg_score,15)
+    
     """This method searches for a food item with a specified nutrition score in the tree.This calls a function in the NutritionTree class which
     fetches the food with its nutrition score.."""
     def get_food_based_on_nutrition(self,nutritionScore):
@@ -682,74 +2172,101 @@ class RecommendationSystem:
     # We maintain a hash map (dictionary) where the key is the food item and the value is the count of times it has been ordered.
     # Time complexity:
     # - Insertion/Update of orders is O(1) as hash maps offer constant time insertion and updates.
-    # - To find the most popular dishes, we sort the hash map based on order count (O(n log n), where n is the number of unique food items ordered).
-    # - Retrieving the top 5 most popular dishes is O(1) after sorting.
-
-    def popular_dishes_recommendation(self):
-        # Sort the popular dishes by the number of orders and return the top 5
-        sorted_dishes = sorted(self.popular_dishes.items(), key=lambda x: x[1], reverse=True)
-        popular_recommendations = [dish[0] for dish in sorted_dishes[:5]]
+    # - Every order also updates the PopularityTracker of each window, which keeps the top 5 incrementally (O(log K)).
+    # - Retrieving the top 5 most popular dishes is O(K) for the chosen window ("all", "hour", "day" or "week"),
+    #   the time-decayed windows let stale hits fade out.
+
+    def popular_dishes_recommendation(self, window="all"):
+        mask = self.exclusion_mask()
+        accept = (lambda name: self.dietary_filter.allows(name, mask)) if mask else None
+        popular_recommendations = self.cache.get("popular_dishes_recommendation", (window,), mask, ["popularity"],
+                                                 lambda: self.popularity[window].top_k(5, accept))
         return self.print_recommendations(popular_recommendations)
     
     # Preamble for Time-Based Suggestions
     # Time-based suggestions recommend food items based on the current time of day.
     # The system categorizes food by meal type (Breakfast, Lunch, Dinner), and provides recommendations accordingly.
+    # Weekdays (Monday to Friday) only suggest quick meals, weekends suggest any dish of the meal slot.
     # Time complexity:
     # - Determining the meal type based on the current hour is O(1).
-    # - Filtering the food items based on meal type is O(m), where m is the number of available food items.
+    # - The suggestions of every (weekday/weekend, meal slot) pair are precomputed by the MealSlotIndex when food is added,
+    #   so picking them is a dictionary lookup (O(1)).
 
     def time_based_suggestions(self):
-        current_hour = dt.datetime.now().hour
-        current_day = dt.datetime.now().weekday()  # 0 is Monday, 6 is Sunday
-        meal_suggestions = []
-        quick_meal_calories = 500  # Threshold for a quick meal
-
-        if current_day < 5:  # Weekdays (Monday to Friday)
-            if 6 <= current_hour < 11:  # Breakfast
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() == "breakfast" and food.calories < quick_meal_calories]
-            elif 11 <= current_hour < 17:  # Lunch
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() == "lunch" and food.calories < quick_meal_calories]
-            elif 17 <= current_hour < 22:  # Dinner
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() == "dinner" and food.calories < quick_meal_calories]
-            else:  # Late-night snacks
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() in ["snack", "late-night"] and food.calories < quick_meal_calories]
-        else:  # Weekends (Saturday and Sunday)
-            if 6 <= current_hour < 11:  # Breakfast
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() == "breakfast"]
-            elif 11 <= current_hour < 17:  # Lunch
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() == "lunch"]
-            elif 17 <= current_hour < 22:  # Dinner
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() == "dinner"]
-            else:  # Late-night snacks
-                meal_suggestions = [food.name for food in self.food_items if food.meal_type.lower() in ["snack", "late-night"]]
-
-        return self.print_recommendations(meal_suggestions[:5])  # Return up to 5 meal suggestions
-
-    def add_offers(self,food_name,offer):
-        for food in self.food_items:
-            if food.name == food_name:
-                food.promotion = offer
-                self.promotion_list.append(food)
+        now = dt.datetime.now()
+        weekend = now.weekday() >= 5  # 0 is Monday, 6 is Sunday
+        mask = self.exclusion_mask()
+        accept = (lambda name: self.dietary_filter.allows(name, mask)) if mask else None
+        meal_suggestions = self.meal_slots.suggestions(weekend, MealSlotIndex.slot_for_hour(now.hour), accept)
+        return self.print_recommendations(meal_suggestions)  # Up to 5 meal suggestions
+
+    # Adds an offer for a dish running from start (default: now) until end (default: no end), replacing its previous offer.
+    def add_offers(self,food_name,offer,start=None,end=None):
+        food = self.catalog.get_food(food_name)
+        if food is not None:
+            timestamp = time.time()
+            start = timestamp if start is None else start
+            if end is not None and end <= start:
+                print("The offer must end after it starts.")
                 return
+            self.apply_offer(food, offer, start, end, timestamp)
+            if self.store is not None:
+                self.store.record_offer(food_name, offer, timestamp, start, end)
+            return
         print("Food not found")
         return
 
+    # Updates the in-memory state for one offer (shared by add_offers and the replay of persisted offers), starting and
+    # expiring the offers due at time now (default: now).
+    def apply_offer(self, food, offer, start, end=None, now=None):
+        self.offer_index.add(food, offer, start, end)
+        self.offer_index.advance(time.time() if now is None else now)
+        self.cache.bump("offers")
+
+    """
+    prepare_reads brings the lazily maintained structures up to date: it starts and expires the due offers and builds the
+    similarity index if dishes were added in bulk since its last build. Afterwards no read method modifies the system,
+    which is what a VersionedSystem relies on before publishing a replica to its reader threads.
+    """
+    def prepare_reads(self, now=None):
+        self.advance_offers(now)
+        if np is not None and not self.similarity.ready:
+            self.similarity.build()
+
+    # Starts and expires the offers that are due, so that the cached listings can be used again.
+    def advance_offers(self, now=None):
+        if self.offer_index.advance(time.time() if now is None else now):
+            self.cache.bump("offers")
+
     def offer_recommendation(self):
-        offer_tree = OfferBST()
-        for offer in self.promotion_list:
-            offer_tree.insert_offer_BST(offer)
-        ascending_order = offer_tree.in_order_offer()
+        # Listing does not modify the offer index (see advance_offers); the cached listing is bypassed while an offer
+        # started or ended since the last advance
+        now = time.time()
+        mask = self.exclusion_mask()
+        listing = lambda: [offer for offer in self.offer_index.current(now)
+                           if self.dietary_filter.allows(offer.food.name, mask)]
+        if self.offer_index.due(now):
+            ascending_order = listing()
+        else:
+            ascending_order = self.cache.get("offer_recommendation", (), mask, ["offers"], listing)
         print("-----------------------------------------------------------------------------------")
         print("Special Offers!!!!!")
         for offer in ascending_order:
-            print(f"Food name: {offer.name},Cuisine type: {offer.cuisine_type},Offer: {offer.promotion}.")
+            print(f"Food name: {offer.food.name},Cuisine type: {offer.food.cuisine_type},Offer: {offer.text}.")
         print("-----------------------------------------------------------------------------------")
     
     def logout(self):
         self.logged_user = None
 
 
-def main():
+DATABASE_PATH = "flavorsync.db"
+
+"""
+build_demo_system creates the demo catalog (users, cuisines, dishes, offers and seasonal menu), replays the persisted
+orders, ratings, offers and sales from the SQLite database and attaches the store for the new ones. It is shared by the
+terminal menu in main() and the network server in server.py.
+"""
+def build_demo_system(database_path=DATABASE_PATH):
     recommendation_system = RecommendationSystem()
     seasonal_menu=SeasonalMenu()
     recommendation_system.addUser("Gopal", "password123", "123 Main St", "Italian", "Vegetarian")
@@ -794,7 +2311,30 @@ def main():
     
     seasonal_menu.record_sale("Spring Salad", 10)
     seasonal_menu.record_sale("Pumpkin Spice Latte", 15)
-    
+
+    # Replay the orders, ratings, offers and sales of previous runs, then persist the new ones
+    store = SQLiteStore(database_path)
+    store.restore(recommendation_system, seasonal_menu)
+    recommendation_system.store = store
+    seasonal_menu.store = store
+    return recommendation_system, seasonal_menu, store
+
+"""print_seasonal_items prints the seasonal menu items returned by SeasonalMenu.get_seasonal_items."""
+def print_seasonal_items(seasonal_items):
+    print("\nCurrent Seasonal Menu Items:")
+    print("-" * 50)
+    for item in seasonal_items:
+        print(f"{item['name']}")
+        print(f"Description: {item['description']}")
+        print(f"Price: ${item['price']:.2f}")
+        print(f"Availability: {item['availability']:.2%}")
+        print(f"Popularity: {item['popularity']:.2%}")
+        print("-" * 50)
+
+def main():
+    recommendation_system, seasonal_menu, store = build_demo_system()
+    order_pipeline = recommendation_system.order_pipeline = OrderPipeline(recommendation_system, seasonal_menu)
+
     # Simulate user login
     recommendation_system.login_user()
 
@@ -812,9 +2352,10 @@ def main():
         print("10. Pair Recommendations")
         print("11. Check Specific Food in Nutrition Tree")
         print("12. Show Special Offers")
+        print("13. Similar Dishes")
         print("0. Exit")
 
-        choice = input("Please select an option (0-12): ")
+        choice = input("Please select an option (0-13): ")
 
         if choice == '1':
             cuisine = input("Enter cuisine type: ")
@@ -829,17 +2370,7 @@ def main():
 
         elif choice == '3':
             print("Getting seasonal items")
-            seasonal_items = seasonal_menu.get_seasonal_items()
-    
-            print("\nCurrent Seasonal Menu Items:")
-            print("-" * 50)
-            for item in seasonal_items:
-                print(f"{item['name']}")
-                print(f"Description: {item['description']}")
-                print(f"Price: ${item['price']:.2f}")
-                print(f"Availability: {item['availability']:.2%}")
-                print(f"Popularity: {item['popularity']:.2%}")
-                print("-" * 50)
+            print_seasonal_items(seasonal_menu.get_seasonal_items())
 
         elif choice == '4':
             cuisine = input("Enter cuisine type for recommendations: ")
@@ -877,8 +2408,14 @@ def main():
         elif choice == '12':
             recommendation_system.offer_recommendation()
 
+        elif choice == '13':
+            dish = input("Enter the name of the dish to find similar dishes: ")
+            recommendation_system.similar_dishes(dish)
+
         elif choice == '0':
             print("Exiting the recommendation system. Goodbye!")
+            order_pipeline.close()
+            store.close()
             break
 
         else:
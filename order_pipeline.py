@@ -0,0 +1,212 @@
+import itertools
+import queue
+import threading
+import time
+import traceback
+from collections import defaultdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from seasonal_menu_items import SeasonalMenu
+
+if TYPE_CHECKING:  # main creates the pipelines of the terminal menu and the server
+    from main import RecommendationSystem
+
+_STOP = object()
+
+
+class OrderEvent(NamedTuple):
+    """One order: quantity units of a dish of the catalog, or of a seasonal menu item, by a user at timestamp."""
+    user: str
+    item: str
+    quantity: int
+    timestamp: float
+
+
+class _ReplayBatch:
+    """A batch of a replayed event log, applied by the pipeline thread without recording; counts gathers the results."""
+    __slots__ = ("events", "counts")
+
+    def __init__(self, events: List[OrderEvent], counts: Dict[str, int]):
+        self.events = events
+        self.counts = counts
+
+
+def micro_batches(events: Iterable[OrderEvent], batch_size: int) -> Iterator[List[OrderEvent]]:
+    """Cut a stream of events into lists of up to batch_size events, consuming it lazily."""
+    iterator = iter(events)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class OrderPipeline:
+    """
+    Order event stream feeding every structure derived from orders. submit() only queues an event and returns, so
+    ingest never waits on index maintenance. A background thread collects the events into micro-batches (up to
+    batch_size events or batch_delay seconds) and applies each batch in one pass with apply_batch():
+
+        dish orders       RecommendationSystem.apply_orders: graph edge weights, order histories, popularity
+                          counters, autocomplete scores and result cache versions, once per distinct key
+        seasonal items    SeasonalMenu.apply_sale, once per (item, month)
+
+    and hands the events to the persistence stores of the system and the menu. replay() applies a recorded event log
+    with the same batching and without recording it again, and returns once it is applied.
+
+    Batches, replayed ones included, are applied on the pipeline thread. When other threads use the system at the same
+    time, pass a lock they also take (the server takes it around every command). A handler, when given, is called as
+    handler(events, record) with every micro-batch instead of apply_batch() (a VersionedSystem turns it into one
+    mutation of its replicas); it records the events only with record and returns the number of orders, sales and
+    skipped events like apply_batch() does (or None when it does not know them). Use submit(wait=True) or flush() to
+    wait until the events submitted so far are applied (the terminal menu does, so an order is visible right away) and
+    close() on shutdown, before closing the stores.
+    """
+
+    def __init__(self, system: "RecommendationSystem", menu: Optional[SeasonalMenu] = None, batch_size: int = 1024,
+                 batch_delay: float = 0.05, lock: Optional[threading.Lock] = None,
+                 handler: Optional[Callable[[List[OrderEvent]], None]] = None):
+        self.system = system
+        self.menu = menu
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.lock = lock
+        self.handler = handler
+        self.stats: Dict[str, int] = {"events": 0, "batches": 0, "orders": 0, "sales": 0, "skipped": 0}
+        self._months: Dict[tuple, str] = {}  # (year, month) : "YYYY-MM" sales key
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="order-pipeline", daemon=True)
+        self._worker.start()
+
+    # Ingest
+
+    def submit(self, user_name: str, item_name: str, quantity: int = 1, timestamp: Optional[float] = None,
+               wait: bool = False):
+        """Queue an order event, with wait block until it is applied (see flush)."""
+        self._queue.put(OrderEvent(user_name, item_name, quantity, time.time() if timestamp is None else timestamp))
+        if wait:
+            self.flush()
+
+    def flush(self):
+        """Block until every event submitted before this call is applied."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join()
+
+    # Batch application
+
+    def _month(self, timestamp: float) -> str:
+        moment = datetime.fromtimestamp(timestamp)
+        key = self._months.get((moment.year, moment.month))
+        if key is None:
+            key = self._months[(moment.year, moment.month)] = moment.strftime("%Y-%m")
+        return key
+
+    def apply_batch(self, events: List[OrderEvent], record: bool = True) -> Dict[str, int]:
+        """
+        Apply a batch of events to the system and the menu, returning the number of dish orders, seasonal sales and
+        skipped events (unknown user, dish or item). With record, the events are also handed to the stores.
+        """
+        catalog = self.system.catalog
+        system_store = self.system.store if record else None
+        menu_store = self.menu.store if record and self.menu is not None else None
+        orders = []
+        sales: Dict[tuple, int] = defaultdict(int)
+        skipped = 0
+        for event in events:
+            food = catalog.get_food(event.item)
+            if food is not None:
+                user = catalog.get_user(event.user)
+                if user is None:
+                    skipped += 1
+                    continue
+                orders.append((user, food, event.quantity, event.timestamp))
+                if system_store is not None:
+                    system_store.record_order(event.user, event.item, event.quantity, event.timestamp)
+            elif self.menu is not None and event.item in self.menu.items_by_name:
+                month = self._month(event.timestamp)
+                sales[(event.item, month)] += event.quantity
+                if menu_store is not None:
+                    menu_store.record_sale(event.item, event.quantity, month, event.timestamp)
+            else:
+                skipped += 1
+
+        self.system.apply_orders(orders)
+        for (item_name, month), quantity in sales.items():
+            self.menu.apply_sale(item_name, quantity, month)
+        applied = {"orders": len(orders), "sales": len(events) - len(orders) - skipped, "skipped": skipped}
+        self._count(events, applied)
+        return applied
+
+    def _count(self, events: List[OrderEvent], applied: Dict[str, int]):
+        self.stats["events"] += len(events)
+        self.stats["batches"] += 1
+        for key, count in applied.items():
+            self.stats[key] += count
+
+    def _apply(self, events: List[OrderEvent], record: bool = True) -> Dict[str, int]:
+        if self.handler is not None:
+            applied = self.handler(events, record) or {}
+            self._count(events, applied)
+            return applied
+        if self.lock is None:
+            return self.apply_batch(events, record)
+        with self.lock:
+            return self.apply_batch(events, record)
+
+    def replay(self, events: Iterable[OrderEvent]) -> Dict[str, int]:
+        """
+        Apply a recorded event log (e.g a day of orders) in micro-batches without recording it again, after the events
+        already submitted. The batches go through the pipeline thread one at a time, so a long log is never queued as a
+        whole. Returns the number of replayed events, orders, sales and skipped events.
+        """
+        counts = {"events": 0, "orders": 0, "sales": 0, "skipped": 0}
+        for batch in micro_batches(events, self.batch_size):
+            self._queue.put(_ReplayBatch(batch, counts))
+            self.flush()
+        return counts
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[OrderEvent] = []
+            waiters: List[threading.Event] = []
+            replay: Optional[_ReplayBatch] = None
+            item = self._queue.get()
+            deadline = time.monotonic() + self.batch_delay
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif isinstance(item, _ReplayBatch):
+                    replay = item
+                else:
+                    batch.append(item)
+                if stopping or waiters or replay is not None or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._apply(batch)
+                except Exception:  # a failing batch must not stop the pipeline
+                    traceback.print_exc()
+            if replay is not None:  # after the events submitted before it
+                try:
+                    applied = self._apply(replay.events, record=False)
+                    replay.counts["events"] += len(replay.events)
+                    for key, count in applied.items():
+                        replay.counts[key] += count
+                except Exception:
+                    traceback.print_exc()
+            for waiter in waiters:
+                waiter.set()
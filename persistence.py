@@ -0,0 +1,236 @@
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    food TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    cuisine TEXT NOT NULL,
+    food TEXT NOT NULL,
+    rating NUMERIC NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS offers (
+    id INTEGER PRIMARY KEY,
+    food TEXT NOT NULL,
+    offer TEXT NOT NULL,
+    ts REAL NOT NULL,
+    starts_at REAL,
+    ends_at REAL
+);
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY,
+    item TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+"""
+
+INSERTS = {
+    "orders": "INSERT INTO orders (user, food, quantity, ts) VALUES (?, ?, ?, ?)",
+    "ratings": "INSERT INTO ratings (user, cuisine, food, rating, ts) VALUES (?, ?, ?, ?, ?)",
+    "offers": "INSERT INTO offers (food, offer, ts, starts_at, ends_at) VALUES (?, ?, ?, ?, ?)",
+    "sales": "INSERT INTO sales (item, quantity, month, ts) VALUES (?, ?, ?, ?)",
+}
+
+# Columns added after the first release: table : [(column, type)], added to older databases on open
+MIGRATIONS = {
+    "offers": [("starts_at", "REAL"), ("ends_at", "REAL")],
+}
+
+_STOP = object()
+
+
+class SQLiteStore:
+    """
+    Local SQLite persistence for orders, ratings, offers and seasonal sales.
+
+    The record_* methods only put the event on an in-memory queue and return immediately. A background writer thread
+    drains the queue and writes the events in batches of up to batch_size rows, one transaction per batch, at least
+    every flush_interval seconds, so the request path never waits on disk. With WAL journaling and synchronous=NORMAL
+    a batch costs a single fsync at checkpoint time instead of one per event. Use flush() to wait until everything
+    queued so far is written and close() on shutdown.
+
+    A batch that fails to write (locked database, full disk, a bad row) is rolled back, its traceback printed and its
+    events dropped; the writer goes on with the next batches and the next flush() raises the error. Once the writer has
+    stopped, record_* and flush() raise instead of queueing events nothing will write.
+    """
+    REPLAY_BATCH = 4096  # orders applied per batch by restore()
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+            for table, columns in MIGRATIONS.items():
+                existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+                for column, kind in columns:
+                    if column not in existing:
+                        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+        self._queue: "queue.Queue" = queue.Queue()
+        self.error: Optional[BaseException] = None  # last write error, not reported by flush() yet
+        self._running = True
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-write-behind", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # Event producers, called from the request path
+
+    def _put(self, item):
+        if not self._running:
+            raise RuntimeError("The SQLite writer is not running.") from self.error
+        self._queue.put(item)
+
+    def record_order(self, user: str, food: str, quantity: int, timestamp: float):
+        self._put(("orders", (user, food, quantity, timestamp)))
+
+    def record_rating(self, user: str, cuisine: str, food: str, rating: float, timestamp: float):
+        self._put(("ratings", (user, cuisine, food, rating, timestamp)))
+
+    def record_offer(self, food: str, offer: str, timestamp: float, start: Optional[float] = None,
+                     end: Optional[float] = None):
+        self._put(("offers", (food, offer, timestamp, start, end)))
+
+    def record_sale(self, item: str, quantity: int, month: str, timestamp: float):
+        self._put(("sales", (item, quantity, month, timestamp)))
+
+    # Write-behind
+
+    def _write_loop(self):
+        connection = None
+        pending: Dict[str, List[Tuple]] = {table: [] for table in INSERTS}
+        count = 0
+        waiters: List[threading.Event] = []
+        try:
+            connection = self._connect()
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while not stopping:
+                try:
+                    event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    event = None
+                if event is _STOP:
+                    stopping = True
+                elif isinstance(event, threading.Event):
+                    waiters.append(event)
+                elif event is not None:
+                    table, row = event
+                    pending[table].append(row)
+                    count += 1
+                if stopping or waiters or count >= self.batch_size or time.monotonic() >= deadline:
+                    try:
+                        if count:
+                            with connection:  # one transaction per batch
+                                for table, rows in pending.items():
+                                    if rows:
+                                        connection.executemany(INSERTS[table], rows)
+                    except Exception as error:  # a failing batch is dropped, it must not stop the writer
+                        traceback.print_exc()
+                        self.error = error
+                    finally:
+                        for rows in pending.values():
+                            rows.clear()
+                        count = 0
+                        for waiter in waiters:
+                            waiter.set()
+                        waiters.clear()
+                    deadline = time.monotonic() + self.flush_interval
+        except Exception as error:
+            traceback.print_exc()
+            self.error = error
+        finally:
+            self._running = False
+            for waiter in waiters:
+                waiter.set()
+            if connection is not None:
+                connection.close()
+
+    def flush(self):
+        """
+        Block until every event queued before this call is committed. Raises the error of a batch that failed since the
+        previous flush(), or RuntimeError when the writer has stopped.
+        """
+        if not self._running:
+            raise RuntimeError("The SQLite writer is not running.") from self.error
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(0.1):
+            if not self._writer.is_alive():  # stopped before reaching this flush
+                raise RuntimeError("The SQLite writer is not running.") from self.error
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    # Startup
+
+    def rows(self, table: str) -> Iterator[Tuple]:
+        """Stream the rows of a table in insertion order."""
+        connection = sqlite3.connect(self.path)
+        try:
+            columns = INSERTS[table].split("(")[1].split(")")[0]
+            yield from connection.execute(f"SELECT {columns} FROM {table} ORDER BY id")
+        finally:
+            connection.close()
+
+    def restore(self, system=None, menu=None) -> Dict[str, int]:
+        """
+        Replay the persisted events into a RecommendationSystem and/or SeasonalMenu whose catalog and menu items are
+        already loaded. Events referring to unknown users, dishes or menu items are skipped. Returns the number of
+        replayed events per table.
+        """
+        restored = {table: 0 for table in INSERTS}
+        if system is not None:
+            # Orders are replayed in batches, each batch updating the derived indexes once per distinct key
+            orders = []
+            for user_name, food_name, quantity, timestamp in self.rows("orders"):
+                user = system.catalog.get_user(user_name)
+                food = system.catalog.get_food(food_name)
+                if user is not None and food is not None:
+                    orders.append((user, food, quantity, timestamp))
+                    if len(orders) >= self.REPLAY_BATCH:
+                        system.apply_orders(orders)
+                        restored["orders"] += len(orders)
+                        orders = []
+            system.apply_orders(orders)
+            restored["orders"] += len(orders)
+            for user_name, _, food_name, rating, _ in self.rows("ratings"):
+                user = system.catalog.get_user(user_name)
+                food = system.catalog.get_food(food_name)
+                if user is not None and food is not None:
+                    system.apply_rating(user, food, rating)
+                    restored["ratings"] += 1
+            for food_name, offer, timestamp, start, end in self.rows("offers"):
+                food = system.catalog.get_food(food_name)
+                if food is not None:
+                    # Offers recorded before start / end times were stored start when recorded and never end
+                    system.apply_offer(food, offer, timestamp if start is None else start, end)
+                    restored["offers"] += 1
+        if menu is not None:
+            for item_name, quantity, month, _ in self.rows("sales"):
+                if menu.apply_sale(item_name, quantity, month):
+                    restored["sales"] += 1
+        return restored
@@ -0,0 +1,93 @@
+import csv
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the forecast falls back to nested lists
+    np = None
+
+from seasonal_menu_items import Holiday, MenuItem, SEASON_BY_MONTH, Season, SeasonalMenu
+
+SEASONS = list(Season)
+HOLIDAYS = list(Holiday)
+
+
+@dataclass
+class PriceForecast:
+    """
+    Seasonal prices of every menu item for every day of a date range. prices[i][j] is the price of items[i] on dates[j]
+    and offered[i][j] tells whether the item is on the seasonal menu that day (its season or one of its holidays).
+    With NumPy both matrices are 2-D arrays, otherwise lists of lists.
+    """
+    items: List[str]
+    dates: List[date]
+    prices: object
+    offered: object
+    seasons: List[Season]  # season of each date
+    holidays: List[Optional[Holiday]]  # holiday of each date, if any
+
+    def to_csv(self, path: str, offered_only: bool = False):
+        """Write one row per item with one price column per date (empty when offered_only and not on the menu)."""
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["item"] + [day.isoformat() for day in self.dates])
+            for index, name in enumerate(self.items):
+                prices = self.prices[index]
+                offered = self.offered[index]
+                writer.writerow([name] + [f"{price:.2f}" if offered[day] or not offered_only else ""
+                                          for day, price in enumerate(prices)])
+
+    def save_npz(self, path: str):
+        """Save the price and offered matrices with their labels as a compressed NumPy archive."""
+        if np is None:
+            raise RuntimeError("NumPy is required to save the forecast as .npz")
+        np.savez_compressed(path, prices=np.asarray(self.prices, dtype=np.float32),
+                            offered=np.asarray(self.offered, dtype=bool), items=np.array(self.items),
+                            dates=np.array([day.isoformat() for day in self.dates]))
+
+
+def forecast_prices(menu: SeasonalMenu, start: Optional[date] = None, days: int = 90) -> PriceForecast:
+    """
+    Price every item of the menu for each day from start (today by default) over the next days days.
+    The popularity of each item is taken from its sales so far, like get_seasonal_items does; the availability of the
+    item's ingredients comes from its month vector, so the whole items x days matrix is computed in one vectorized pass.
+    """
+    if start is None:
+        start = datetime.now().date()
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    items: List[MenuItem] = list(menu.menu_items)
+
+    calendar = {}
+    for year in range(start.year, dates[-1].year + 1 if dates else start.year):
+        calendar.update(menu.holiday_calendar(year))
+    day_months = [day.month - 1 for day in dates]
+    day_seasons = [SEASON_BY_MONTH.get(day.month, Season.WINTER) for day in dates]
+    day_holidays = [calendar.get(day) for day in dates]
+
+    popularity = [min(1.0, item.total_sales / menu.max_sales) if menu.max_sales else 0.0 for item in items]
+
+    if np is not None:
+        availability = np.array([item.availability_by_month for item in items], dtype=float).reshape(len(items), 12)
+        base = np.array([item.base_price for item in items], dtype=float)[:, None]
+        popularity_factor = 1 + 0.2 * np.array(popularity, dtype=float)[:, None]
+        seasonal_factor = 1 + 0.3 * (1 - availability[:, day_months])
+        prices = base * seasonal_factor * popularity_factor
+
+        # Membership: one column per season / holiday (plus a never-offered column for "no holiday")
+        in_season = np.array([[season in item.seasons for season in SEASONS] for item in items], dtype=bool)
+        on_holiday = np.array([[holiday in item.holidays for holiday in HOLIDAYS] + [False] for item in items],
+                              dtype=bool)
+        season_columns = np.array([SEASONS.index(season) for season in day_seasons], dtype=int)
+        holiday_columns = np.array([HOLIDAYS.index(holiday) if holiday else len(HOLIDAYS) for holiday in day_holidays],
+                                   dtype=int)
+        offered = (in_season.reshape(len(items), len(SEASONS))[:, season_columns]
+                   | on_holiday.reshape(len(items), len(HOLIDAYS) + 1)[:, holiday_columns])
+    else:
+        prices = [[item.base_price * (1 + 0.3 * (1 - item.availability_by_month[month])) * (1 + 0.2 * pop)
+                   for month in day_months] for item, pop in zip(items, popularity)]
+        offered = [[season in item.seasons or (holiday is not None and holiday in item.holidays)
+                    for season, holiday in zip(day_seasons, day_holidays)] for item in items]
+
+    return PriceForecast([item.name for item in items], dates, prices, offered, day_seasons, day_holidays)
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 from collections import defaultdict
 
 class Season(Enum):
@@ -28,6 +28,22 @@ class Holiday(Enum):
         self.month = month
         self.day = day
 
+# month (1-12) -> the season it belongs to
+SEASON_BY_MONTH: Dict[int, Season] = {month: season for season in Season for month in season.months}
+
+def month_availability(peak_seasons: List[Season], month: int) -> float:
+    """Availability of an ingredient in a month: 1.0 in its peak seasons, fading by 1/6 per month away from the closest
+    peak month, with a floor of 0.2."""
+    if SEASON_BY_MONTH.get(month, Season.WINTER) in peak_seasons:
+        return 1.0
+    min_distance = float('inf')
+    for season in peak_seasons:
+        for peak_month in season.months:
+            distance = min((month - peak_month) % 12,
+                           (peak_month - month) % 12)
+            min_distance = min(min_distance, distance)
+    return max(0.2, 1 - (min_distance / 6))
+
 @dataclass
 class Ingredient:
     name: str
@@ -35,6 +51,11 @@ class Ingredient:
     shelf_life_days: int
     base_cost: float
     local_sourcing: bool = False
+    # availability_by_month[month - 1] is the availability in that month, precomputed from peak_seasons
+    availability_by_month: List[float] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.availability_by_month = [month_availability(self.peak_seasons, month) for month in range(1, 13)]
 
 class PricingStrategy:
     @staticmethod
@@ -55,7 +76,12 @@ class MenuItem:
         self.seasons = seasons or []
         self.holidays = holidays or []
         self.sales_history: Dict[str, int] = defaultdict(int)
+        self.total_sales = 0  # running sum of sales_history, maintained by SeasonalMenu.apply_sale
         self.popularity_score = 0.5  # Initial neutral popularity
+        # availability_by_month[month - 1] is the mean availability of the ingredients in that month
+        self.availability_by_month = [
+            sum(ing.availability_by_month[month] for ing in ingredients) / len(ingredients) if ingredients else 1.0
+            for month in range(12)]
 
     def update_popularity(self, sales_count: int, max_sales: int):
         self.popularity_score = min(1.0, sales_count / max_sales)
@@ -64,48 +90,47 @@ class SeasonalMenu:
     def __init__(self):
         self.menu_items: List[MenuItem] = []
         self.sales_history: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.store = None  # optional persistence.SQLiteStore receiving every recorded sale
+        self._day_state = None  # (date, season, holiday) of the last day the calendar was evaluated for
+        self.items_by_name: Dict[str, MenuItem] = {}
+        self.max_sales = 0  # highest total_sales over the menu items
+        self._month_key = (None, None)  # ((year, month), "YYYY-MM") of the last recorded sale
 
     def add_item(self, item: MenuItem):
         self.menu_items.append(item)
+        self.items_by_name.setdefault(item.name, item)
+        item.total_sales = sum(item.sales_history.values())
+        self.max_sales = max(self.max_sales, item.total_sales)
 
     def calculate_ingredient_availability(self, ingredient: Ingredient) -> float:
-        current_season = self.get_current_season()
-        if current_season in ingredient.peak_seasons:
-            return 1.0
-        
-        current_month = datetime.now().month
-        min_distance = float('inf')
-        
-        for season in ingredient.peak_seasons:
-            for peak_month in season.months:
-                distance = min((current_month - peak_month) % 12,
-                             (peak_month - current_month) % 12)
-                min_distance = min(min_distance, distance)
-        
-        return max(0.2, 1 - (min_distance / 6))
+        return ingredient.availability_by_month[datetime.now().month - 1]
+
+    def _season_and_holiday(self, today: datetime) -> Tuple[Season, Optional[Holiday]]:
+        # Season and holiday only change with the date, so they are evaluated once per day
+        if self._day_state is None or self._day_state[0] != today.date():
+            self._day_state = (today.date(), SEASON_BY_MONTH.get(today.month, Season.WINTER), self._find_holiday(today))
+        return self._day_state[1], self._day_state[2]
 
     def get_current_season(self) -> Season:
-        current_month = datetime.now().month
-        for season in Season:
-            if current_month in season.months:
-                return season
-        return Season.WINTER
+        return self._season_and_holiday(datetime.now())[0]
 
     def get_current_holiday(self) -> Optional[Holiday]:
-        today = datetime.now()
-        
-        for holiday in Holiday:
+        return self._season_and_holiday(datetime.now())[1]
+
+    def _find_holiday(self, today: datetime) -> Optional[Holiday]:
+        return self.holiday_calendar(today.year).get(today.date())
+
+    def holiday_calendar(self, year: int) -> Dict:
+        """Map every holiday date of a year to its Holiday, resolving the dynamic dates (Easter, Thanksgiving)."""
+        calendar = {}
+        for holiday in reversed(Holiday):  # earlier holidays win if two fall on the same date
             if holiday == Holiday.EASTER:
-                easter_date = self._calculate_easter_date(today.year)
-                if today.date() == easter_date:
-                    return holiday
+                calendar[self._calculate_easter_date(year)] = holiday
             elif holiday == Holiday.THANKSGIVING:
-                thanksgiving = self._calculate_thanksgiving_date(today.year)
-                if today.date() == thanksgiving:
-                    return holiday
-            elif holiday.month == today.month and holiday.day == today.day:
-                return holiday
-        return None
+                calendar[self._calculate_thanksgiving_date(year)] = holiday
+            else:
+                calendar[datetime(year, holiday.month, holiday.day).date()] = holiday
+        return calendar
 
     def _calculate_easter_date(self, year: int) -> datetime.date:
         a = year % 19
@@ -128,24 +153,23 @@ class SeasonalMenu:
 
     def _calculate_thanksgiving_date(self, year: int) -> datetime.date:
         first = datetime(year, 11, 1)
-        while first.weekday() != 4:  # 4 is Thursday
+        while first.weekday() != 3:  # 3 is Thursday
             first += timedelta(days=1)
         return (first + timedelta(weeks=3)).date()
 
     def get_seasonal_items(self) -> List[Dict]:
-        current_season = self.get_current_season()
-        current_holiday = self.get_current_holiday()
+        now = datetime.now()  # the only clock read of the request
+        current_season, current_holiday = self._season_and_holiday(now)
+        month_index = now.month - 1
         
-        max_sales = max((sum(item.sales_history.values()) 
-                        for item in self.menu_items), default=1)
+        max_sales = self.max_sales or 1
 
         seasonal_items = []
         for item in self.menu_items:
             if current_season in item.seasons or current_holiday in item.holidays:
-                availability_score = sum(self.calculate_ingredient_availability(ing) 
-                                      for ing in item.ingredients) / len(item.ingredients)
+                availability_score = item.availability_by_month[month_index]
                 
-                item.update_popularity(sum(item.sales_history.values()), max_sales)
+                item.update_popularity(item.total_sales, max_sales)
                 
                 current_price = PricingStrategy.calculate_seasonal_price(
                     item.base_price, 
@@ -166,8 +190,22 @@ class SeasonalMenu:
                      reverse=True)
 
     def record_sale(self, item_name: str, quantity: int = 1):
-        date_key = datetime.now().strftime("%Y-%m")
-        for item in self.menu_items:
-            if item.name == item_name:
-                item.sales_history[date_key] += quantity
-                break
+        now = datetime.now()
+        if self._month_key[0] != (now.year, now.month):
+            self._month_key = ((now.year, now.month), now.strftime("%Y-%m"))
+        date_key = self._month_key[1]
+        if self.apply_sale(item_name, quantity, date_key) and self.store is not None:
+            self.store.record_sale(item_name, quantity, date_key, now.timestamp())
+
+    def apply_sale(self, item_name: str, quantity: int, date_key: str) -> bool:
+        item = self.items_by_name.get(item_name)
+        if item is None:
+            return False
+        item.sales_history[date_key] += quantity
+        item.total_sales += quantity
+        if item.total_sales >= self.max_sales:
+            self.max_sales = item.total_sales
+        elif quantity < 0 and item.total_sales - quantity == self.max_sales:
+            # A correction lowered the best seller, so the maximum has to be looked up again
+            self.max_sales = max(other.total_sales for other in self.menu_items)
+        return True
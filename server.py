@@ -0,0 +1,290 @@
+"""
+Line based request/response protocol over TCP or a Unix socket. Every request is one JSON object per line:
+
+    {"op": "order", "args": {"dish": "Tacos", "quantity": 2}}
+
+where op is a command name or its number in the terminal menu (1-13), and args may also be a list in the order of the
+command's arguments. Every response is one JSON object per line: {"ok": true, "output": "...", "result": ...} with the
+text the command printed in output, or {"ok": false, "error": "..."}.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import shlex
+import signal
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from main import DATABASE_PATH, RecommendationSystem, build_demo_system, print_seasonal_items
+from order_pipeline import OrderPipeline
+from seasonal_menu_items import SeasonalMenu
+
+# command name : (terminal menu number, argument names with their types, needs a logged in user)
+COMMANDS: Dict[str, Tuple[Optional[str], List[Tuple[str, type]], bool]] = {
+    "login": (None, [("username", str), ("password", str)], False),
+    "logout": (None, [], False),
+    "rate": ("1", [("cuisine", str), ("dish", str), ("rating", int)], True),
+    "order": ("2", [("dish", str), ("quantity", int)], True),
+    "seasonal": ("3", [], False),
+    "cuisine": ("4", [("cuisine", str)], True),
+    "new_arrivals": ("5", [], True),
+    "new_in_cuisine": (None, [("cuisine", str), ("days", float)], True),
+    "personalized": ("6", [], True),
+    "nutrition": ("7", [], True),
+    "popular": ("8", [], True),
+    "time_based": ("9", [], True),
+    "pair": ("10", [("dish", str)], True),
+    "nutrition_lookup": ("11", [("nutrition_score", int)], False),
+    "offers": ("12", [], False),
+    "similar": ("13", [("dish", str)], True),
+    "cache_stats": (None, [], False),
+    "complete": (None, [("prefix", str)], False),
+    "train_model": (None, [], False),
+}
+COMMAND_BY_NUMBER = {number: name for name, (number, _, _) in COMMANDS.items() if number}
+
+
+class Session:
+    """
+    State of one client connection. It replaces RecommendationSystem.logged_user for the connection: every request runs
+    with the session's user as the acting user, so any number of customers can be logged in at the same time.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, peer: Any):
+        self.id = next(self._ids)
+        self.peer = peer
+        self.user = None
+        self.connected_at = time.time()
+        self.requests = 0
+
+
+class RecommendationServer:
+    """asyncio server exposing the terminal menu operations of a shared RecommendationSystem and SeasonalMenu."""
+
+    def __init__(self, system: RecommendationSystem, menu: SeasonalMenu):
+        self.system = system
+        self.menu = menu
+        self.sessions: Dict[int, Session] = {}
+        self.lock = threading.Lock()  # taken around every command, pass it to the order pipeline of the system
+        self.handlers: Dict[str, Callable] = {
+            "login": self._login,
+            "logout": self._logout,
+            "rate": lambda session, cuisine, dish, rating: self.system.rate_dish(cuisine, dish, rating),
+            "order": lambda session, dish, quantity: self.system.order_food(dish, quantity, wait=False),
+            "seasonal": self._seasonal,
+            "cuisine": lambda session, cuisine: self.system.cuisine_based_recommendations(cuisine),
+            "new_arrivals": lambda session: self.system.get_new_arrivals(),
+            "new_in_cuisine": lambda session, cuisine, days: self.system.get_new_arrivals(
+                cuisine, time.time() - days * 24 * 60 * 60),
+            "personalized": lambda session: self.system.personalized_recommendations(),
+            "nutrition": lambda session: self.system.recommend_based_on_nutrition(),
+            "popular": lambda session: self.system.popular_dishes_recommendation(),
+            "time_based": lambda session: self.system.time_based_suggestions(),
+            "pair": lambda session, dish: self.system.pair_recommendations(dish),
+            "nutrition_lookup": lambda session, nutrition_score: self.system.nutritionTree.get_food(nutrition_score),
+            "offers": lambda session: self.system.offer_recommendation(),
+            "similar": lambda session, dish: self.system.similar_dishes(dish),
+            "cache_stats": lambda session: self.system.cache.stats(),
+            "complete": lambda session, prefix: self.system.autocomplete_names(prefix, 10),
+            "train_model": self._train_model,
+        }
+
+    def _login(self, session: Session, username: str, password: str):
+        user = self.system.authenticate(username, password)
+        if user is None:
+            raise ValueError("Invalid username or password.")
+        session.user = user
+        print(f"User {username} logged in successfully!")
+        return username
+
+    def _logout(self, session: Session):
+        session.user = None
+        print("Logged out.")
+
+    def _train_model(self, session: Session):
+        model = self.system.train_rating_model()
+        print(f"Rating model trained on {len(model.users)} users and {len(model.items)} dishes.")
+        return {"users": len(model.users), "dishes": len(model.items), "rmse": model.rmse}
+
+    def _seasonal(self, session: Session):
+        seasonal_items = self.menu.get_seasonal_items()
+        print_seasonal_items(seasonal_items)
+        return seasonal_items
+
+    def execute(self, session: Session, request: Dict) -> Dict:
+        """
+        Run one request for a session and build its response. The command runs synchronously on the event loop thread
+        with the session's user acting as logged in user and its printed output captured, so requests of different
+        sessions never interleave. Orders are only queued to the system's order pipeline, which applies them in
+        micro-batches under the same lock.
+        """
+        op = str(request.get("op", ""))
+        name = COMMAND_BY_NUMBER.get(op, op)
+        if name not in COMMANDS:
+            return {"ok": False, "error": f"Unknown command '{op}'."}
+        _, parameters, needs_login = COMMANDS[name]
+        if needs_login and session.user is None:
+            return {"ok": False, "error": "User not logged in."}
+
+        args = request.get("args") or []
+        try:
+            if isinstance(args, dict):
+                args = [args[parameter] for parameter, _ in parameters]
+            if len(args) != len(parameters):
+                raise ValueError(f"'{name}' expects {len(parameters)} argument(s): "
+                                 f"{', '.join(parameter for parameter, _ in parameters) or 'none'}.")
+            values = [kind(value) for value, (_, kind) in zip(args, parameters)]
+        except (KeyError, TypeError, ValueError) as error:
+            return {"ok": False, "error": f"Invalid arguments: {error}"}
+
+        output = io.StringIO()
+        session.requests += 1
+        try:
+            with contextlib.redirect_stdout(output), self.lock, self.system.acting_as(session.user):
+                result = self.handlers[name](session, *values)
+        except Exception as error:  # a failing command must not take the connection down
+            return {"ok": False, "error": str(error), "output": output.getvalue()}
+        return {"ok": True, "output": output.getvalue(), "result": result}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = Session(writer.get_extra_info("peername"))
+        self.sessions[session.id] = session
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    response = {"ok": False, "error": "Request line too long."}
+                    writer.write((json.dumps(response) + "\n").encode())
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as error:
+                    response = {"ok": False, "error": f"Malformed request: {error}"}
+                else:
+                    if request.get("op") == "quit":
+                        break
+                    response = self.execute(session, request)
+                writer.write((json.dumps(response, default=str) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[session.id]
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None,
+                    backlog: int = 4096) -> asyncio.AbstractServer:
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_path, backlog=backlog)
+        return await asyncio.start_server(self.handle_connection, host, port, backlog=backlog)
+
+
+class RecommendationClient:
+    """Minimal asyncio client for the server, one session per client."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None):
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def call(self, op, *args) -> Dict:
+        self.writer.write((json.dumps({"op": op, "args": list(args)}) + "\n").encode())
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        return json.loads(line)
+
+    async def close(self):
+        with contextlib.suppress(ConnectionError):
+            self.writer.write(b'{"op": "quit"}\n')
+            await self.writer.drain()
+        self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+
+
+async def serve(args):
+    system, menu, store = build_demo_system(args.db)
+    server = RecommendationServer(system, menu)
+    system.order_pipeline = OrderPipeline(system, menu, lock=server.lock)
+    listener = await server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Serving FlavorSync on {where}", file=sys.stderr)
+    # Stop cleanly on SIGTERM so the store can write its pending events
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        system.order_pipeline.close()  # apply and record the queued orders first
+        store.close()
+
+
+async def interactive_client(args):
+    """Read commands like: order "Kung Pao Chicken" 2  (or raw JSON requests) from stdin and print the responses."""
+    client = await RecommendationClient.connect(args.host, args.port, args.unix)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                request = json.loads(line)
+                response = await client.call(request.get("op"), *(request.get("args") or []))
+            else:
+                op, *words = shlex.split(line)
+                if op == "quit":
+                    break
+                response = await client.call(op, *words)
+            if response.get("output"):
+                print(response["output"], end="")
+            if not response["ok"]:
+                print(f"Error: {response['error']}")
+    finally:
+        await client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FlavorSync recommendation server and client.")
+    parser.add_argument("mode", choices=["serve", "client"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on / connect to this Unix socket path instead of TCP")
+    parser.add_argument("--db", default=DATABASE_PATH, help="SQLite database of the server")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args) if args.mode == "serve" else interactive_client(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import bisect
+import heapq
+import multiprocessing
+import zlib
+from array import array
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from main import PopularityTracker, RecommendationSystem
+
+ITEMSIZE = {kind: array(kind).itemsize for kind in "diqQB"}
+WORD_MASK = (1 << 64) - 1
+
+
+class SharedCatalog:
+    """
+    Read-mostly food catalog laid out as flat arrays in multiprocessing.shared_memory, so N worker processes attach to
+    one copy instead of each holding its own Food objects. Food ids are positions in the arrays:
+
+        nutrition_score, calories, rating  float64 per food
+        cuisine                            int32 code per food, cuisines[code] is the name
+        exclusion                          allergen / diet exclusion mask per food (see main.DietaryFilter), as
+                                           exclusion_words uint64 words per food, least significant word first
+        sorted_ids, sorted_scores          food ids in ascending nutrition score order and their scores
+        name_offsets, names                UTF-8 names concatenated, name i is names[name_offsets[i]:name_offsets[i + 1]]
+
+    The creating process owns the blocks and unlinks them on close(); workers attach with attach(spec).
+    """
+    ARRAYS = {"nutrition_score": "d", "calories": "d", "rating": "d", "cuisine": "i", "exclusion": "Q", "sorted_ids": "i",
+              "sorted_scores": "d", "name_offsets": "q", "names": "B"}
+
+    def __init__(self, blocks: Dict[str, shared_memory.SharedMemory], lengths: Dict[str, int],
+                 cuisines: List[str], exclusion_words: int, owner: bool):
+        self._blocks = blocks
+        self.lengths = lengths
+        self.cuisines = cuisines
+        self.exclusion_words = exclusion_words
+        self.owner = owner
+        self._names: Dict[int, str] = {}
+        # Typed views over the blocks (a block may be larger than requested, so slice to the array length first)
+        self.views: Dict[str, memoryview] = {}
+        for field, kind in self.ARRAYS.items():
+            buffer = blocks[field].buf[:lengths[field] * ITEMSIZE[kind]]
+            self.views[field] = buffer.cast(kind) if kind != "B" else buffer
+
+    @classmethod
+    def create(cls, system: RecommendationSystem) -> "SharedCatalog":
+        foods = system.food_items
+        cuisines = list(dict.fromkeys(food.cuisine_type for food in foods))
+        cuisine_codes = {cuisine: code for code, cuisine in enumerate(cuisines)}
+        encoded = [food.name.encode("utf-8") for food in foods]
+        offsets = [0]
+        for name in encoded:
+            offsets.append(offsets[-1] + len(name))
+        sorted_ids = sorted(range(len(foods)), key=lambda food_id: foods[food_id].nutrition_score)
+        # DietaryFilter masks are unbounded ints (two bits per allergen), split into as many 64 bit words as the widest
+        masks = [system.dietary_filter.food_masks.get(food.name, 0) for food in foods]
+        words = max(1, (max(masks, default=0).bit_length() + 63) // 64)
+        data = {
+            "nutrition_score": [food.nutrition_score for food in foods],
+            "calories": [food.calories for food in foods],
+            "rating": [food.rating for food in foods],
+            "cuisine": [cuisine_codes[food.cuisine_type] for food in foods],
+            "exclusion": [(mask >> (64 * word)) & WORD_MASK for mask in masks for word in range(words)],
+            "sorted_ids": sorted_ids,
+            "sorted_scores": [foods[food_id].nutrition_score for food_id in sorted_ids],
+            "name_offsets": offsets,
+        }
+        blocks = {}
+        lengths = {}
+        catalog = None
+        complete = False
+        try:
+            for field, kind in cls.ARRAYS.items():
+                length = offsets[-1] if field == "names" else len(data[field])
+                blocks[field] = shared_memory.SharedMemory(create=True, size=max(1, length * ITEMSIZE[kind]))
+                lengths[field] = length
+            catalog = cls(blocks, lengths, cuisines, words, owner=True)
+            for field, values in data.items():
+                catalog.views[field][:] = array(cls.ARRAYS[field], values)
+            catalog.views["names"][:] = b"".join(encoded)
+            complete = True
+            return catalog
+        finally:
+            # A failed creation must not leak the blocks it already made
+            if not complete:
+                if catalog is not None:
+                    catalog.close()
+                else:
+                    for block in blocks.values():
+                        block.close()
+                        block.unlink()
+
+    @property
+    def spec(self) -> Tuple[Dict[str, str], Dict[str, int], List[str], int]:
+        """Picklable description used by attach() in the worker processes."""
+        names = {field: block.name for field, block in self._blocks.items()}
+        return names, self.lengths, self.cuisines, self.exclusion_words
+
+    @classmethod
+    def attach(cls, spec) -> "SharedCatalog":
+        names, lengths, cuisines, exclusion_words = spec
+        blocks = {}
+        for field, name in names.items():
+            blocks[field] = shared_memory.SharedMemory(name=name)
+        return cls(blocks, lengths, cuisines, exclusion_words, owner=False)
+
+    def __len__(self):
+        return self.lengths["nutrition_score"]
+
+    def name(self, food_id: int) -> str:
+        # Decoded names are kept per process, so only the dishes a worker actually returns are ever copied out
+        name = self._names.get(food_id)
+        if name is None:
+            offsets = self.views["name_offsets"]
+            name = self._names[food_id] = bytes(self.views["names"][offsets[food_id]:offsets[food_id + 1]]).decode()
+        return name
+
+    def allowed(self, food_ids: List[int], mask: int) -> List[int]:
+        """The ids of the foods not excluded by a user's exclusion mask."""
+        if not mask:
+            return food_ids
+        exclusion = self.views["exclusion"]
+        words = self.exclusion_words
+        if words == 1:
+            mask &= WORD_MASK  # bits of allergens no dish had when the catalog was made exclude nothing
+            return [food_id for food_id in food_ids if not exclusion[food_id] & mask]
+        # Only the words where the user mask has bits need to be read
+        mask_words = [(word, (mask >> (64 * word)) & WORD_MASK) for word in range(words)]
+        mask_words = [(word, bits) for word, bits in mask_words if bits]
+        return [food_id for food_id in food_ids
+                if not any(exclusion[food_id * words + word] & bits for word, bits in mask_words)]
+
+    def in_score_range(self, low: float, high: float) -> List[int]:
+        """Ids of the foods with low <= nutrition score <= high, in ascending score order."""
+        scores = self.views["sorted_scores"]
+        return self.views["sorted_ids"][bisect.bisect_left(scores, low):bisect.bisect_right(scores, high)].tolist()
+
+    def close(self):
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        for block in self._blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self._blocks = {}
+
+
+def shard_of(user_name: str, shards: int) -> int:
+    """Stable user -> shard assignment (the built-in hash of str changes between processes)."""
+    return zlib.crc32(user_name.encode("utf-8")) % shards
+
+
+def _worker(spec, requests, responses, initial_orders: Dict[str, Dict[int, int]]):
+    """
+    Worker process: owns the order graph of its users and answers their recommendation requests against the shared
+    catalog. Requests arrive in batches of (request id, op, user name, user exclusion mask, args) and are answered in one
+    message per batch. Requests of users the worker does not own are answered with False.
+    """
+    catalog = SharedCatalog.attach(spec)
+    orders: Dict[str, Dict[int, int]] = initial_orders  # user name : {food id : order count}, for every user of the shard
+    by_cuisine: Dict[int, List[int]] = {}  # cuisine code : food ids, cuisines never change (ratings do)
+    for food_id, code in enumerate(catalog.views["cuisine"]):
+        by_cuisine.setdefault(code, []).append(food_id)
+    ratings = catalog.views["rating"]
+    try:
+        while True:
+            batch = requests.get()
+            if batch is None:
+                break
+            results = []
+            for request_id, op, user_name, mask, args in batch:
+                user_orders = orders.get(user_name)
+                if user_orders is None:
+                    result = False
+                elif op == "order":
+                    food_id = args[0]
+                    user_orders[food_id] = user_orders.get(food_id, 0) + 1
+                    result = True
+                elif op == "personalized":
+                    result = [catalog.name(food_id) for food_id in catalog.allowed(list(user_orders), mask)[:5]]
+                elif op == "cuisine":
+                    # Current ratings, the router writes them into the shared array
+                    top = heapq.nlargest(5, catalog.allowed(by_cuisine.get(args[0], []), mask), key=ratings.__getitem__)
+                    result = [catalog.name(food_id) for food_id in top]
+                elif op == "nutrition":
+                    count = sum(user_orders.values())
+                    if count:
+                        scores = catalog.views["nutrition_score"]
+                        average = sum(scores[food_id] * weight for food_id, weight in user_orders.items()) / count
+                        result = [catalog.name(food_id)
+                                  for food_id in catalog.allowed(catalog.in_score_range(average - 15, average + 15), mask)]
+                    else:
+                        result = []
+                else:
+                    result = None
+                results.append((request_id, result))
+            responses.put(results)
+    finally:
+        catalog.close()
+
+
+class ShardedRecommender:
+    """
+    Runs recommendation work for a RecommendationSystem in N worker processes. Users are partitioned across the workers
+    by shard_of(); each worker keeps the orders of its own users, and the food catalog (names, cuisines, nutrition
+    scores, calories, ratings) is shared by all of them through a SharedCatalog. The router (this object, in the parent
+    process) resolves dish and cuisine names to ids, rejects requests of users the system does not know, dispatches every
+    request to the worker owning the user and, for cold-start users, falls back to the global popularity tracker it
+    maintains. Ratings are aggregated by the router and their Bayesian means written into the shared catalog, where the
+    workers' top rated dishes of a cuisine read them. Every result is filtered with the user's allergen and diet
+    exclusion mask, like the single process recommenders.
+
+    run() takes many requests at once and sends one message per worker, so the workers compute in parallel and the
+    IPC cost is paid per batch rather than per request.
+    """
+
+    def __init__(self, system: RecommendationSystem, workers: Optional[int] = None):
+        self.system = system
+        self.workers = workers or multiprocessing.cpu_count()
+        self.catalog = SharedCatalog.create(system)
+        self.food_ids = {food.name: food_id for food_id, food in enumerate(system.food_items)}
+        self.popularity = PopularityTracker()
+        self.dietary_filter = system.dietary_filter
+        self.user_masks = {user.name: system.dietary_filter.user_mask(user) for user in system.users}
+
+        self.cuisine_codes = {cuisine: code for code, cuisine in enumerate(self.catalog.cuisines)}
+        initial = [dict() for _ in range(self.workers)]
+        for user in system.users:
+            initial[shard_of(user.name, self.workers)][user.name] = {
+                self.food_ids[food.name]: weight for food, weight in system.graph.edges(user) if food.name in self.food_ids}
+        for food_name, quantity in system.popular_dishes.items():
+            self.popularity.add(food_name, quantity)
+
+        context = multiprocessing.get_context("spawn")
+        self._requests = [context.Queue() for _ in range(self.workers)]
+        self._responses = [context.Queue() for _ in range(self.workers)]
+        self._processes = [context.Process(target=_worker, args=(self.catalog.spec, self._requests[shard],
+                                                                 self._responses[shard], initial[shard]), daemon=True)
+                           for shard in range(self.workers)]
+        for process in self._processes:
+            process.start()
+
+    def rate(self, user_name: str, food_name: str, rating) -> bool:
+        """
+        Ratings are catalog data: the router aggregates them in the system (RecommendationSystem.apply_rating) and
+        writes the dish's Bayesian mean into the shared rating array. Returns False for an unknown user or dish.
+        """
+        user, food = self.system.catalog.get_user(user_name), self.system.catalog.get_food(food_name)
+        food_id = self.food_ids.get(food_name)
+        if user is None or food is None or food_id is None:
+            return False
+        self.system.apply_rating(user, food, rating)
+        self.catalog.views["rating"][food_id] = food.rating
+        return True
+
+    def run(self, requests: List[Tuple[str, str, tuple]]) -> List:
+        """
+        Execute (op, user name, args) requests, op being "order" (args: dish name, quantity), "personalized",
+        "nutrition" or "cuisine" (args: cuisine name), and return their results in the same order. Requests of unknown
+        users, and orders of unknown dishes or listings of unknown cuisines, get False.
+        """
+        batches = [[] for _ in range(self.workers)]
+        results: List = [None] * len(requests)
+        for request_id, (op, user_name, args) in enumerate(requests):
+            mask = self.user_masks.get(user_name)
+            if mask is None:
+                results[request_id] = False
+                continue
+            if op == "order":
+                food_name, quantity = args
+                food_id = self.food_ids.get(food_name)
+                if food_id is None:
+                    results[request_id] = False
+                    continue
+                self.popularity.add(food_name, quantity)
+                args = (food_id,)
+            elif op == "cuisine":
+                code = self.cuisine_codes.get(args[0])
+                if code is None:
+                    results[request_id] = False
+                    continue
+                args = (code,)
+            batches[shard_of(user_name, self.workers)].append((request_id, op, user_name, mask, args))
+        pending = []
+        for shard, batch in enumerate(batches):
+            if batch:
+                self._requests[shard].put(batch)
+                pending.append(shard)
+        for shard in pending:
+            for request_id, result in self._responses[shard].get():
+                results[request_id] = result
+        # Cold start: users without orders get the globally popular dishes
+        for request_id, (op, user_name, _) in enumerate(requests):
+            if op == "personalized" and results[request_id] == []:
+                mask = self.user_masks[user_name]
+                results[request_id] = self.popularity.top_k(
+                    5, (lambda name: self.dietary_filter.allows(name, mask)) if mask else None)
+        return results
+
+    def call(self, op: str, user_name: str, *args):
+        return self.run([(op, user_name, args)])[0]
+
+    def close(self):
+        for queue in self._requests:
+            queue.put(None)
+        for process in self._processes:
+            process.join()
+        self.catalog.close()
@@ -0,0 +1,250 @@
+from typing import Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional for the rest of the system, the similarity index needs it
+    np = None
+
+NUMERIC_FEATURES = ("calories", "proteins", "fats", "carbohydrates", "vitamins", "minerals", "nutrition_score")
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for the dish similarity index")
+
+
+class DishSimilarityIndex:
+    """
+    k-nearest-neighbour index of the dishes by cosine similarity of their feature vectors:
+
+        the numeric features (calories, the macros given to nutrition_score, vitamin and mineral counts and the score
+        itself), standardized with the catalog mean and standard deviation and weighted by NUMERIC_WEIGHT
+        one-hot columns for the cuisine, the meal type and every flavor term of the flavor profile
+
+    build() computes the whole L2-normalized feature matrix and the neighbour lists of every dish with blocked matrix
+    products (block rows x all dishes at a time), keeping the `neighbours` most similar dishes of each one, so
+    similar_dishes() is a list slice. add() indexes one more dish incrementally: a single matrix-vector product gives its
+    similarity to every dish, its own list is the best of them and it is inserted in the lists it now belongs to. The
+    standardization is refreshed by a full build once the catalog has doubled since the last one. Dishes added with
+    defer=True or add_many (bulk imports) are only indexed by the next build.
+    """
+    NUMERIC_WEIGHT = 1.0
+    CATEGORY_WEIGHTS = {"cuisine": 1.0, "meal": 0.7, "flavor": 0.7}
+
+    def __init__(self, neighbours: int = 20, block: int = 1024):
+        self.neighbours = neighbours
+        self.block = block
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.numeric: List[List[float]] = []  # raw numeric features per dish
+        self.categories: List[Optional[List[int]]] = []  # one-hot column ids per dish, None until interned
+        self.uninterned: List[tuple] = []  # (dish, cuisine_type, meal_type, flavor_terms) registered by add_many
+        self.columns: Dict[tuple, int] = {}  # (kind, value) : one-hot column id
+        self.column_weights: List[float] = []
+        self.neighbour_ids: List[List[int]] = []
+        self.neighbour_scores: List[List[float]] = []
+        # Normalized feature rows of the indexed dishes in a preallocated buffer whose rows and columns double when full,
+        # and the similarity of every dish's least similar neighbour (-inf while its list is not full)
+        self._rows = None
+        self._worst = None
+        self._width = 0  # columns in use
+        self.mean = self.scale = None
+        self.built_size = 0  # number of dishes at the last full build
+        self.indexed = 0  # dishes [0, indexed) are in the matrix and the neighbour lists
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    @property
+    def ready(self) -> bool:
+        """Whether every dish is indexed, i.e similar_dishes() can answer for any of them."""
+        return self._rows is not None and self.indexed == len(self.names)
+
+    @property
+    def matrix(self):
+        """Normalized feature matrix of the indexed dishes (a view of the buffer), None before the first build."""
+        return None if self._rows is None else self._rows[:self.indexed, :self._width]
+
+    def _column(self, kind: str, value: str) -> int:
+        column = self.columns.get((kind, value))
+        if column is None:
+            column = self.columns[(kind, value)] = len(self.columns)
+            self.column_weights.append(self.CATEGORY_WEIGHTS[kind])
+        return column
+
+    def add(self, name: str, cuisine_type: str, meal_type: str, flavor_terms: List[str], calories: float,
+            proteins: float, fats: float, carbohydrates: float, vitamins: int, minerals: int, nutrition_score: float,
+            defer: bool = False):
+        """
+        Register a dish (vitamins and minerals as counts). It is indexed right away unless defer is set or no build
+        happened yet.
+        Time Complexity: O(n * d) for n dishes and d features, amortized over the rebuilds
+        """
+        if not self._register(name, cuisine_type, meal_type, flavor_terms,
+                              [calories, proteins, fats, carbohydrates, vitamins, minerals, nutrition_score]):
+            return
+        if defer or self._rows is None or self.indexed != len(self.names) - 1:
+            return
+        if len(self.names) >= 2 * self.built_size:
+            self.build()
+        else:
+            self._insert(len(self.names) - 1)
+
+    def add_many(self, dishes):
+        """
+        Bulk version of add(defer=True) for (name, cuisine_type, meal_type, flavor_terms, numeric features) tuples, the
+        features in NUMERIC_FEATURES order. The dishes are indexed by the next build, which also maps their categories
+        to one-hot columns.
+        Time Complexity: O(m) for m dishes
+        """
+        for name, cuisine_type, meal_type, flavor_terms, numeric in dishes:
+            if name in self.ids:
+                continue
+            self.uninterned.append((len(self.names), cuisine_type, meal_type, flavor_terms))
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.numeric.append(numeric)
+            self.categories.append(None)
+
+    def _register(self, name, cuisine_type, meal_type, flavor_terms, numeric) -> bool:
+        if name in self.ids:
+            return False
+        self.ids[name] = len(self.names)
+        self.names.append(name)
+        self.numeric.append(numeric)
+        self.categories.append(self._columns(cuisine_type, meal_type, flavor_terms))
+        return True
+
+    def _columns(self, cuisine_type, meal_type, flavor_terms) -> List[int]:
+        columns = [self._column("cuisine", cuisine_type), self._column("meal", meal_type.strip().lower())]
+        columns.extend(self._column("flavor", term) for term in flavor_terms)
+        return columns
+
+    def _vectors(self, start: int, stop: int):
+        """Normalized feature rows of the dishes [start, stop) with the current standardization."""
+        rows = stop - start
+        numeric = (np.asarray(self.numeric[start:stop], dtype=np.float64) - self.mean) / self.scale * self.NUMERIC_WEIGHT
+        onehot = np.zeros((rows, len(self.columns)), dtype=np.float64)
+        weights = self.column_weights
+        for row, columns in enumerate(self.categories[start:stop]):
+            for column in columns:
+                onehot[row, column] = weights[column]
+        vectors = np.hstack((numeric, onehot)).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def build(self):
+        """Recompute the standardization, the feature matrix and every neighbour list."""
+        _require_numpy()
+        for dish, cuisine_type, meal_type, flavor_terms in self.uninterned:
+            self.categories[dish] = self._columns(cuisine_type, meal_type, flavor_terms)
+        self.uninterned = []
+        count = len(self.names)
+        self.built_size = self.indexed = count
+        self.neighbour_ids = [[] for _ in range(count)]
+        self.neighbour_scores = [[] for _ in range(count)]
+        self._width = len(NUMERIC_FEATURES) + len(self.columns)
+        self._rows = np.zeros((max(16, 2 * count), 2 * self._width), dtype=np.float32)
+        self._worst = np.full(len(self._rows), -np.inf, dtype=np.float32)
+        if not count:
+            return
+        numeric = np.asarray(self.numeric, dtype=np.float64)
+        self.mean = numeric.mean(axis=0)
+        self.scale = numeric.std(axis=0)
+        self.scale[self.scale == 0] = 1
+        matrix = self.matrix
+        matrix[:] = self._vectors(0, count)
+        keep = min(self.neighbours, count - 1)
+        if keep <= 0:
+            return
+        for start in range(0, count, self.block):
+            stop = min(count, start + self.block)
+            scores = matrix[start:stop] @ matrix.T
+            scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # a dish is not its own neighbour
+            best = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-best_scores, axis=1, kind="stable")
+            best = np.take_along_axis(best, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            self.neighbour_ids[start:stop] = best.tolist()
+            self.neighbour_scores[start:stop] = best_scores.tolist()
+            if keep == self.neighbours:
+                self._worst[start:stop] = best_scores[:, -1]
+
+    def _reserve(self, rows: int, width: int):
+        """Grow the buffer (doubling) so it holds rows x width, new cells are zero."""
+        capacity, columns = self._rows.shape
+        if rows <= capacity and width <= columns:
+            return
+        grown = np.zeros((capacity if rows <= capacity else max(2 * capacity, rows),
+                          columns if width <= columns else max(2 * columns, width)), dtype=np.float32)
+        grown[:self.indexed, :self._width] = self.matrix
+        self._rows = grown
+        worst = np.full(len(grown), -np.inf, dtype=np.float32)
+        worst[:self.indexed] = self._worst[:self.indexed]
+        self._worst = worst
+
+    def _insert(self, dish: int):
+        vector = self._vectors(dish, dish + 1)[0]
+        # New one-hot columns are zero for the dishes already indexed
+        self._reserve(dish + 1, len(vector))
+        self._width = len(vector)
+        scores = self.matrix @ vector
+        self._rows[dish, :self._width] = vector
+        self.indexed = dish + 1
+        keep = min(self.neighbours, dish)
+        if keep:
+            best = np.argpartition(-scores, keep - 1)[:keep]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            self.neighbour_ids.append(best.tolist())
+            self.neighbour_scores.append(scores[best].tolist())
+            if keep == self.neighbours:
+                self._worst[dish] = scores[best[-1]]
+        else:
+            self.neighbour_ids.append([])
+            self.neighbour_scores.append([])
+        # Dishes whose list is not full yet or whose worst neighbour is less similar than the new dish
+        for other in np.flatnonzero(scores > self._worst[:dish]).tolist():
+            ids, similarities = self.neighbour_ids[other], self.neighbour_scores[other]
+            score = float(scores[other])
+            position = len(similarities)
+            while position and similarities[position - 1] < score:
+                position -= 1
+            ids.insert(position, dish)
+            similarities.insert(position, score)
+            del ids[self.neighbours:], similarities[self.neighbours:]
+            if len(similarities) == self.neighbours:
+                self._worst[other] = similarities[-1]
+
+    def similar_dishes(self, name: str, k: int = 5, accept: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        Names of the k dishes most similar to name (all accepted by accept, if given), most similar first. Lists longer
+        than the precomputed neighbours, or filtered below k, are answered with one matrix-vector product. Queries never
+        modify the index, dishes that are not indexed yet (see ready) have no similar dishes.
+        """
+        dish = self.ids.get(name)
+        if dish is None or dish >= self.indexed:
+            return []
+        names = self.names
+        result = []
+        for other in self.neighbour_ids[dish]:
+            if accept is None or accept(names[other]):
+                result.append(names[other])
+                if len(result) == k:
+                    return result
+        if len(self.neighbour_ids[dish]) == self.indexed - 1:  # every other dish was already considered
+            return result
+        matrix = self.matrix
+        scores = matrix @ matrix[dish]
+        scores[dish] = -np.inf
+        result = []
+        for other in np.argsort(-scores, kind="stable").tolist()[:-1]:
+            if accept is None or accept(names[other]):
+                result.append(names[other])
+                if len(result) == k:
+                    break
+        return result
@@ -0,0 +1,258 @@
+import contextlib
+import copy
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Iterator, List, Optional
+
+from main import RecommendationSystem, ResultCache
+from order_pipeline import OrderEvent, OrderPipeline
+
+Mutation = Callable[[RecommendationSystem], None]
+
+
+class _ReaderSlot:
+    """
+    Per-thread state of a reader: the replica it is currently using (None when it is not reading), and its private result
+    cache and user exclusion masks, valid for the catalog generation they were filled from.
+    """
+    __slots__ = ("replica", "generation", "cache", "user_masks")
+
+    def __init__(self):
+        self.replica = None
+        self.generation = None
+        self.cache = None
+        self.user_masks = None
+
+
+class VersionedSystem:
+    """
+    Snapshot isolated access to a RecommendationSystem shared by many reader threads and a single writer thread.
+
+    Two replicas of the system are kept (left-right scheme). Readers always use the published replica and never take a
+    lock: entering a read only stores the replica in the reader thread's slot and re-checks that it is still the
+    published one. All mutations go through submit(); the writer thread collects them into batches (up to batch_size
+    mutations or batch_delay seconds), applies a batch to the unpublished replica, atomically publishes it as the next
+    version, waits until no reader is left on the previous replica and then applies the same batch to it. A reader
+    therefore sees one consistent version for its whole read, while writes never block readers. Before a replica is
+    published the writer calls its prepare_reads(), so that reading never modifies the shared structures; the only state
+    a read fills in (cached results, user exclusion masks) is private to the reader thread.
+
+    Because every batch is applied to both replicas, mutations must be deterministic functions of the system (take
+    timestamps when submitting, not while applying: pass them as the timestamp of addFood / add_foods_bulk and the now
+    of apply_offer) and must not have external side effects. The submit_* helpers do both: they take the time when
+    called, and the system's persistence store is kept here and called once per event by them. Orders go through an
+    OrderPipeline whose micro-batches become one mutation each.
+
+    reload() swaps in a completely new catalog the same way, without downtime for readers.
+    """
+
+    def __init__(self, system: RecommendationSystem, batch_size: int = 256, batch_delay: float = 0.005):
+        self.store = system.store
+        system.store = None  # the store must not be copied nor called twice per event
+        system.prepare_reads()
+        self._replicas = [system, self._clone(system)]
+        self._published = (0, self._replicas[0], 0)  # (version, replica, catalog generation), replaced as a whole
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._slots: List[_ReaderSlot] = []
+        self._slots_lock = threading.Lock()  # only taken the first time a thread reads
+        self._local = threading.local()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="snapshot-writer", daemon=True)
+        self._writer.start()
+        self.orders = OrderPipeline(system, batch_size=batch_size, batch_delay=batch_delay, handler=self._submit_orders)
+
+    @staticmethod
+    def _clone(system: RecommendationSystem) -> RecommendationSystem:
+        logged_user = system.logged_user
+        system.logged_user = None
+        try:
+            return copy.deepcopy(system)
+        finally:
+            system.logged_user = logged_user
+
+    @property
+    def version(self) -> int:
+        return self._published[0]
+
+    # Readers
+
+    def _slot(self) -> _ReaderSlot:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            slot = self._local.slot = _ReaderSlot()
+            with self._slots_lock:
+                self._slots.append(slot)
+        return slot
+
+    @contextlib.contextmanager
+    def read(self, user_name: Optional[str] = None) -> Iterator[RecommendationSystem]:
+        """
+        Yield a read-only view of the current version. The view is a shallow copy sharing every index of the published
+        replica, with its own logged_user (looked up by user_name), so readers of different users don't interfere, and
+        the reader thread's own result cache (checked against the versions of the replica) and user mask cache.
+        """
+        slot = self._slot()
+        while True:
+            published = self._published
+            slot.replica = published[1]
+            if self._published is published:  # not republished before the writer could see our slot
+                break
+        try:
+            replica = published[1]
+            if slot.generation != published[2]:
+                slot.generation = published[2]
+                slot.cache = ResultCache(replica.cache.max_size)
+                slot.user_masks = {}
+            slot.cache.versions = replica.cache.versions
+            view = copy.copy(replica)
+            view.cache = slot.cache
+            view.dietary_filter = copy.copy(replica.dietary_filter)
+            view.dietary_filter.user_masks = slot.user_masks
+            view.logged_user = replica.catalog.get_user(user_name) if user_name is not None else None
+            yield view
+        finally:
+            slot.replica = None
+
+    # Writer
+
+    def submit(self, mutation: Mutation):
+        """Queue a deterministic mutation of the system for the next batch."""
+        self._queue.put(mutation)
+
+    def submit_order(self, user_name: str, food_name: str, quantity: int, wait: bool = False):
+        """Queue an order to the order pipeline, with wait block until it is published."""
+        self.orders.submit(user_name, food_name, quantity)
+        if wait:
+            self.flush()
+
+    def _submit_orders(self, events: List[OrderEvent], record: bool = True) -> Dict[str, int]:
+        # Called by the order pipeline with each micro-batch; replayed batches are not recorded again
+        def orders(system: RecommendationSystem):
+            batch = []
+            for event in events:
+                user = system.catalog.get_user(event.user)
+                food = system.catalog.get_food(event.item)
+                if user is not None and food is not None:
+                    batch.append((user, food, event.quantity, event.timestamp))
+            system.apply_orders(batch)
+        self.submit(orders)
+        if record and self.store is not None:
+            for event in events:
+                self.store.record_order(event.user, event.item, event.quantity, event.timestamp)
+        # Counted against the current version, the mutation applies them once the queued ones are applied
+        with self.read() as view:
+            known = sum(view.catalog.has_user(event.user) and view.catalog.has_food(event.item) for event in events)
+        return {"orders": known, "sales": 0, "skipped": len(events) - known}
+
+    def submit_rating(self, user_name: str, cuisine: str, food_name: str, rating):
+        def rate(system: RecommendationSystem):
+            user = system.catalog.get_user(user_name)
+            food = system.catalog.get_food(food_name)
+            if user is not None and food is not None and food.cuisine_type == cuisine:
+                system.apply_rating(user, food, rating)
+        self.submit(rate)
+        if self.store is not None:
+            self.store.record_rating(user_name, cuisine, food_name, rating, time.time())
+
+    def submit_food(self, *food):
+        """Queue a new dish (the arguments of addFood), arriving now."""
+        timestamp = time.time()
+        self.submit(lambda system: system.addFood(*food, timestamp=timestamp))
+
+    def submit_offer(self, food_name: str, offer: str, start: Optional[float] = None, end: Optional[float] = None):
+        """Queue an offer for a dish, starting now unless start is given (see RecommendationSystem.add_offers)."""
+        timestamp = time.time()
+        start = timestamp if start is None else start
+        if end is not None and end <= start:
+            raise ValueError("The offer must end after it starts.")
+
+        def promote(system: RecommendationSystem):
+            food = system.catalog.get_food(food_name)
+            if food is not None:
+                system.apply_offer(food, offer, start, end, timestamp)
+        self.submit(promote)
+        if self.store is not None:
+            self.store.record_offer(food_name, offer, timestamp, start, end)
+
+    def reload(self, system: RecommendationSystem):
+        """Replace the whole catalog with a new system (e.g a fresh import) once the queued mutations are applied."""
+        system.store = None
+        self._queue.put(("reload", system))
+
+    def flush(self):
+        """Block until every mutation and order submitted before this call is published."""
+        self.orders.flush()
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        self.orders.close()
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def _wait_for_readers(self, replica: RecommendationSystem):
+        # Readers leave quickly; yield the GIL until none of them still uses the replica
+        while any(slot.replica is replica for slot in list(self._slots)):
+            time.sleep(0)
+
+    def _publish(self, replica: RecommendationSystem, generation: Optional[int] = None) -> RecommendationSystem:
+        version, previous, current_generation = self._published
+        self._published = (version + 1, replica, current_generation if generation is None else generation)
+        self._wait_for_readers(previous)
+        return previous
+
+    @staticmethod
+    def _run(batch: List[Mutation], system: RecommendationSystem):
+        for mutation in batch:
+            try:
+                mutation(system)
+            except Exception:  # a failing mutation fails the same way on both replicas, keep the writer alive
+                traceback.print_exc()
+
+    def _apply(self, batch: List[Mutation]):
+        standby = self._replicas[1] if self._published[1] is self._replicas[0] else self._replicas[0]
+        now = time.time()  # the same for both replicas, so they stay identical
+        self._run(batch, standby)
+        standby.prepare_reads(now)
+        previous = self._publish(standby)
+        self._run(batch, previous)
+        previous.prepare_reads(now)
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch: List[Mutation] = []
+            waiters: List[threading.Event] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.batch_delay
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif isinstance(item, tuple):
+                    # Apply what came before the reload, then publish the new catalog
+                    if batch:
+                        self._apply(batch)
+                        batch = []
+                    new_system = item[1]
+                    new_system.prepare_reads()
+                    self._replicas = [new_system, self._clone(new_system)]
+                    self._publish(new_system, self._published[2] + 1)
+                else:
+                    batch.append(item)
+                if stopping or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._apply(batch)
+            for waiter in waiters:
+                waiter.set()
@@ -0,0 +1,51 @@
+from benchmarks.run import ENTRY_POINTS, run_scale, summarize
+from benchmarks.synthetic import SyntheticGenerator
+from catalog_loader import FOOD_FIELDS, USER_FIELDS
+
+
+def test_generator_is_deterministic_per_seed():
+    first = SyntheticGenerator(3).generate(300)
+    second = SyntheticGenerator(3).generate(300)
+    assert (first.foods, first.users, first.orders, first.ratings) == (
+        second.foods, second.users, second.orders, second.ratings)
+    assert [item.name for item in first.menu_items] == [item.name for item in second.menu_items]
+    assert SyntheticGenerator(4).generate(300).foods != first.foods
+
+
+def test_generated_records_reference_the_catalog():
+    data = SyntheticGenerator(5).generate(400, n_users=30, n_orders=1000, n_ratings=200)
+    assert len(data.foods) == 400 and len(data.users) == 30
+    assert all(set(FOOD_FIELDS) <= set(food) for food in data.foods)
+    assert all(set(USER_FIELDS) <= set(user) for user in data.users)
+    foods = {food["name"]: food for food in data.foods}
+    users = {user["name"] for user in data.users}
+    assert len(foods) == 400 and len(users) == 30
+    assert all(food["cuisine_type"] in data.cuisines for food in data.foods)
+    assert all(user in users and food in foods and 1 <= quantity <= 3 for user, food, quantity in data.orders)
+    assert all(user in users and foods[food]["cuisine_type"] == cuisine and 1 <= rating <= 5
+               for user, cuisine, food, rating in data.ratings)
+    # Zipf traffic: the most ordered dish gets far more than its uniform share
+    counts = {}
+    for _, food, _ in data.orders:
+        counts[food] = counts.get(food, 0) + 1
+    assert max(counts.values()) > 10 * len(data.orders) / len(data.foods)
+
+
+def test_summarize_matches_the_sorted_timings():
+    timings = [5000, 1000, 3000, 2000, 4000] * 20
+    stats = summarize(timings)
+    ordered = sorted(timings)
+    assert stats["ops"] == 100
+    assert stats["total_s"] == sum(timings) / 1e9
+    assert stats["p50_us"] == ordered[50] / 1000 and stats["p99_us"] == ordered[99] / 1000
+    assert stats["throughput_ops_s"] == round(100 / (sum(timings) / 1e9), 1)
+    assert summarize([]) == {"ops": 0}
+
+
+def test_run_scale_times_every_entry_point():
+    result = run_scale(200, seed=1, query_ops=10)
+    assert (result["foods"], result["users"], result["orders"], result["ratings"]) == (200, 20, 200, 100)
+    assert list(result["entry_points"]) == ENTRY_POINTS
+    expected_ops = {"addFood": 200, "order_food": 200, "rate_dish": 100}
+    for name, stats in result["entry_points"].items():
+        assert stats["ops"] == expected_ops.get(name, 10)
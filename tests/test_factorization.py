@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from factorization import RatingMatrix, _solve_side, train_als  # noqa: E402
+
+
+class Rater:
+    def __init__(self, name, ratings):
+        self.name = name
+        self.ratings = ratings
+
+
+def random_raters(seed, users=30, items=40, density=0.3):
+    rng = random.Random(seed)
+    return [Rater(f"user {u}", {f"dish {i}": rng.randint(1, 5) for i in range(items) if rng.random() < density})
+            for u in range(users)]
+
+
+def dense(matrix):
+    result = np.zeros(matrix.shape, dtype=np.float32)
+    for row in range(len(matrix.users)):
+        for position in range(matrix.indptr[row], matrix.indptr[row + 1]):
+            result[row, matrix.indices[position]] = matrix.values[position]
+    return result
+
+
+def test_rating_matrix_holds_every_rating():
+    raters = random_raters(31) + [Rater("nobody", {})]
+    matrix = RatingMatrix.from_users(raters)
+    assert "nobody" not in matrix.users  # users without ratings get no row
+    assert matrix.nnz == sum(len(rater.ratings) for rater in raters)
+    table = dense(matrix)
+    for rater in raters[:-1]:
+        for item, rating in rater.ratings.items():
+            assert table[matrix.users.index(rater.name), matrix.items.index(item)] == rating
+    transposed = matrix.transpose()
+    assert (transposed.users, transposed.items) == (matrix.items, matrix.users)
+    assert np.array_equal(dense(transposed), table.T)
+
+
+def test_solve_side_matches_per_row_least_squares():
+    matrix = RatingMatrix.from_users(random_raters(32))
+    rng = np.random.default_rng(1)
+    fixed = rng.standard_normal((len(matrix.items), 4)).astype(np.float32)
+    regularization = 0.3
+    solved = _solve_side(matrix, fixed, regularization, chunk=7)
+    for row in range(len(matrix.users)):
+        columns = matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]
+        ratings = matrix.values[matrix.indptr[row]:matrix.indptr[row + 1]].astype(np.float64)
+        features = fixed[columns].astype(np.float64)
+        gram = features.T @ features + regularization * len(columns) * np.eye(4)
+        assert solved[row] == pytest.approx(np.linalg.solve(gram, features.T @ ratings), rel=1e-3, abs=1e-4)
+
+
+def test_top_n_lists_the_best_unrated_dishes():
+    raters = random_raters(33)
+    matrix = RatingMatrix.from_users(raters)
+    model = train_als(matrix, factors=4, iterations=4, top_n=6, chunk=8)
+    assert set(model.top_n) == set(matrix.users)
+    for rater in raters:
+        predicted = {item: model.predict(rater.name, item) for item in matrix.items if item not in rater.ratings}
+        expected = sorted(predicted, key=predicted.get, reverse=True)[:6]
+        recommended = model.recommendations(rater.name)
+        assert len(recommended) == len(expected) and not set(recommended) & set(rater.ratings)
+        assert [predicted[item] for item in recommended] == pytest.approx([predicted[item] for item in expected],
+                                                                          abs=1e-5)
+    assert model.recommendations("stranger") == [] and model.predict("stranger", "dish 1") is None
+
+
+def test_als_recovers_low_rank_ratings():
+    rng = np.random.default_rng(2)
+    users, items = rng.standard_normal((50, 2)), rng.standard_normal((60, 2))
+    truth = 3 + users @ items.T
+    raters = [Rater(f"user {u}", {f"dish {i}": float(truth[u, i]) for i in range(60) if rng.random() < 0.5})
+              for u in range(50)]
+    matrix = RatingMatrix.from_users(raters)
+    model = train_als(matrix, factors=2, regularization=0.01, iterations=15)
+    assert model.rmse < 0.1
+    assert train_als(matrix, factors=2, regularization=0.01, iterations=1).rmse > model.rmse
@@ -0,0 +1,842 @@
+import contextlib
+import io
+import json
+import math
+import pickle
+import random
+import time
+from array import array
+
+import pytest
+
+import catalog_loader
+from main import ArrivalRing, AttributeIndex, AutocompleteTrie, Catalog, DietaryFilter, Food, FoodRow, FoodTable, Graph, MaxHeap, MealSlotIndex, NewArrivals, OfferIndex, PopularityTracker, RecommendationSystem, ResultCache, User
+
+CUISINES = ["Italian", "Mexican", "Indian"]
+FLAVORS = ["Sweet", "Spicy and Sour", "Earthy and Spicy", "Savory"]
+MEALS = ["breakfast", "lunch", "dinner", "snack"]
+DIETS = ["Vegan", "Vegetarian", "Gluten-Free", "None"]
+ALLERGENS = ["Nuts", "Dairy", "Gluten", "Soy"]
+
+
+def quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def food_record(rng, i):
+    return {"name": f"Dish {i}", "cuisine_type": rng.choice(CUISINES), "calories": rng.randint(100, 900),
+            "proteins": rng.randint(1, 40), "fats": rng.randint(1, 40), "carbohydrates": rng.randint(1, 80),
+            "vitamins": ["Vitamin C"] * rng.randint(0, 3), "minerals": ["Iron"] * rng.randint(0, 3),
+            "dietary_restrictions": rng.choice(DIETS), "allergens": rng.sample(ALLERGENS, rng.randint(0, 2)),
+            "meal_type": rng.choice(MEALS), "flavor_profile": rng.choice(FLAVORS)}
+
+
+def food_records(count, seed):
+    rng = random.Random(seed)
+    return [food_record(rng, i) for i in range(count)]
+
+
+def build_system(count=60, seed=1, users=("ana", "bo"), **options):
+    """A system with the test cuisines, users and count random dishes added one by one with addFood."""
+    rng = random.Random(seed)
+    system = RecommendationSystem(**options)
+    with quiet():
+        for cuisine in CUISINES:
+            system.add_cuisine(cuisine)
+        for name in users:
+            system.addUser(name, "pw", "addr", "Italian", "None")
+        for i in range(count):
+            record = food_record(rng, i)
+            system.addFood(*record.values())
+    return system
+
+
+# Catalog (user-001)
+
+def test_catalog_lookups_match_a_linear_scan():
+    system = build_system()
+    for name in ["Dish 0", "Dish 17", "Dish 59", "Dish 60", "missing"]:
+        expected = next((food for food in system.food_items if food.name == name), None)
+        assert system.catalog.get_food(name) is expected
+        assert system.catalog.has_food(name) == (expected is not None)
+    for name in ["ana", "bo", "cy"]:
+        expected = next((user for user in system.users if user.name == name), None)
+        assert system.catalog.get_user(name) is expected
+
+
+def test_catalog_rejects_duplicates():
+    catalog = Catalog()
+    food = Food("Pizza", "Italian", 800, 40, "None", [], "dinner", "Savory")
+    assert catalog.add_food(food)
+    assert not catalog.add_food(Food("Pizza", "Mexican", 100, 10, "None", [], "lunch", "Sweet"))
+    assert catalog.get_food("Pizza") is food
+    user = User("ana", "pw", "addr", "Italian", "None", "None")
+    assert catalog.add_user(user)
+    assert not catalog.add_user(User("ana", "other", "addr", "Mexican", "Vegan", "None"))
+    assert catalog.get_user("ana") is user
+
+
+def test_duplicate_names_are_not_added_twice():
+    system = build_system(count=10)
+    with quiet():
+        system.addFood("Dish 3", "Italian", 1, 1, 1, 1, [], [], "None", [], "lunch", "Sweet")
+        system.addUser("ana", "x", "y", "Mexican", "Vegan")
+    assert [food.name for food in system.food_items].count("Dish 3") == 1
+    assert [user.name for user in system.users].count("ana") == 1
+    assert system.catalog.get_user("ana").password == "pw"
+
+
+# NutritionTree (user-002)
+
+def test_nutrition_band_matches_a_brute_force_filter():
+    system = build_system(count=120, seed=2)
+    scores = [food.nutrition_score for food in system.food_items]
+    assert system.nutritionTree.scores == sorted(scores)
+    for average in [0, scores[0], scores[40] + 0.5, scores[90], 1000]:
+        band = system.nutritionTree.inorder_recommendations(average, 15)
+        expected = sorted((food for food in system.food_items if average - 15 <= food.nutrition_score <= average + 15),
+                          key=lambda food: food.nutrition_score)  # stable: equal scores keep their insertion order
+        assert band == [food.name for food in expected]
+
+
+def test_get_food_returns_the_exact_or_next_lower_score():
+    system = build_system(count=50, seed=3)
+    foods = system.food_items
+    for food in foods:
+        match = system.nutritionTree.get_food(food.nutrition_score)
+        assert system.catalog.get_food(match).nutrition_score == food.nutrition_score
+    lowest = min(food.nutrition_score for food in foods)
+    assert system.nutritionTree.get_food(lowest - 1) is None
+    highest = max(food.nutrition_score for food in foods)
+    for query in [lowest + 0.01, (lowest + highest) / 2 + 0.001, highest + 1]:
+        expected = max(food.nutrition_score for food in foods if food.nutrition_score <= query)
+        assert system.catalog.get_food(system.nutritionTree.get_food(query)).nutrition_score == expected
+
+
+# MaxHeap (user-003)
+
+def rated_dishes(rng, count):
+    dishes = [Food(f"Dish {i}", "Italian", 100, 10, "None", [], "lunch", "Sweet") for i in range(count)]
+    for dish in dishes:
+        dish.rating = rng.choice([0, 1, 2.5, 3, 4, 4.5, 5])
+    return dishes
+
+
+def assert_heap_invariants(heap):
+    for index, dish in enumerate(heap.heap):
+        assert heap.positions[dish.name] == index
+        if index:
+            assert heap.heap[(index - 1) // 2].rating >= dish.rating
+    assert len(heap.positions) == len(heap.heap)
+
+
+def test_max_heap_top_k_matches_sorting():
+    rng = random.Random(5)
+    dishes = rated_dishes(rng, 200)
+    heap = MaxHeap()
+    for dish in dishes[:120]:
+        heap.push(dish)
+    heap.push_many(dishes[120:])
+    assert_heap_invariants(heap)
+    ratings = sorted((dish.rating for dish in dishes), reverse=True)
+    for k in [0, 1, 5, 37, 200, 500]:
+        assert [dish.rating for dish in heap.top_k(k)] == ratings[:k]
+    accept = lambda name: int(name.split()[1]) % 3 == 0
+    expected = sorted((dish.rating for dish in dishes if accept(dish.name)), reverse=True)[:10]
+    assert [dish.rating for dish in heap.top_k(10, accept)] == expected
+    assert len(heap) == 200  # top_k does not consume the heap
+
+
+def test_max_heap_update_keeps_the_order_after_rating_changes():
+    rng = random.Random(6)
+    dishes = rated_dishes(rng, 100)
+    heap = MaxHeap()
+    heap.push_many(dishes)
+    for _ in range(300):
+        dish = rng.choice(dishes)
+        dish.rating = rng.uniform(0, 5)
+        assert heap.update(dish)
+    assert_heap_invariants(heap)
+    assert not heap.update(Food("Unknown", "Italian", 1, 1, "None", [], "lunch", "Sweet"))
+    popped = [heap.pop().rating for _ in range(len(dishes))]
+    assert popped == sorted((dish.rating for dish in dishes), reverse=True)
+    assert heap.pop() is None and not heap.positions
+
+
+def test_cuisine_top_k_follows_the_ratings():
+    rng = random.Random(7)
+    system = build_system(count=60, seed=7)
+    system.logged_user = system.users[0]
+    with quiet():
+        for _ in range(150):
+            food = rng.choice(system.food_items)
+            system.rate_dish(food.cuisine_type, food.name, rng.randint(1, 5))
+    for cuisine in CUISINES:
+        expected = sorted((food.rating for food in system.cuisines[cuisine]), reverse=True)[:5]
+        assert [system.catalog.get_food(name).rating for name in system.top_k(cuisine, 5)] == expected
+
+
+# PopularityTracker (user-004)
+
+def decayed_counts(orders, half_life, now):
+    counts = {}
+    for name, quantity, timestamp in orders:
+        weight = quantity * 0.5 ** ((now - timestamp) / half_life) if half_life else quantity
+        counts[name] = counts.get(name, 0) + weight
+    return counts
+
+
+def assert_top_matches(tracker, counts, k, accept=None):
+    top = tracker.top_k(k, accept)
+    eligible = sorted((count for name, count in counts.items() if accept is None or accept(name)), reverse=True)
+    assert len(top) == min(k, len(eligible))
+    for name, expected in zip(top, eligible):
+        assert math.isclose(counts[name], expected, rel_tol=1e-9)
+
+
+def test_popularity_tracker_matches_brute_force_counts():
+    rng = random.Random(8)
+    tracker = PopularityTracker(k=5)
+    orders = [(f"Dish {rng.randrange(40)}", rng.randint(1, 4), 1000.0 + i) for i in range(2000)]
+    for order in orders:
+        tracker.add(*order)
+    counts = decayed_counts(orders, None, 0)
+    assert tracker.scores == counts
+    assert_top_matches(tracker, counts, 5)
+    assert_top_matches(tracker, counts, 3, lambda name: name.endswith("7") or name.endswith("2"))
+
+
+def test_decayed_popularity_matches_exponential_decay():
+    rng = random.Random(9)
+    half_life = 3600
+    tracker = PopularityTracker(k=5, half_life=half_life)
+    orders = []
+    timestamp = 0.0
+    for _ in range(3000):
+        timestamp += rng.expovariate(1 / 400)  # long enough to rescale several times
+        orders.append((f"Dish {rng.randrange(30)}", rng.randint(1, 3), timestamp))
+    for order in orders:
+        tracker.add(*order)
+    assert timestamp * tracker.decay_rate > 3 * tracker.RESCALE_EXPONENT
+    now = timestamp + 1800
+    counts = decayed_counts(orders, half_life, now)
+    for name, expected in counts.items():
+        assert math.isclose(tracker.score(name, now), expected, rel_tol=1e-6, abs_tol=1e-12)
+    assert_top_matches(tracker, counts, 5)
+    assert_top_matches(tracker, counts, 5, lambda name: int(name.split()[1]) % 2 == 0)
+
+
+# Graph (user-005)
+
+def test_graph_weights_count_the_connections():
+    rng = random.Random(10)
+    graph = Graph()
+    vertices = [f"user {i}" for i in range(10)] + [f"dish {i}" for i in range(30)]
+    for vertex in vertices:
+        assert graph.add_vertex(vertex)
+    assert not graph.add_vertex("user 0")
+    edges = [(f"user {rng.randrange(10)}", f"dish {rng.randrange(30)}") for _ in range(500)]
+    for user, dish in edges:
+        assert graph.add_edge(user, dish)
+    assert not graph.add_edge("user 0", "missing")
+    for vertex in vertices:
+        expected = {}
+        for user, dish in edges:  # first connection order, weight = number of connections
+            if vertex in (user, dish):
+                other = dish if vertex == user else user
+                expected[other] = expected.get(other, 0) + 1
+        assert graph.edges(vertex) == list(expected.items())
+        assert graph.neighbors(vertex) == list(expected)
+        assert graph.degree(vertex) == len(expected)
+        for other, weight in expected.items():
+            assert graph.weight(vertex, other) == graph.weight(other, vertex) == weight
+
+    csr = graph.to_csr()
+    assert list(csr.vertices) == vertices
+    for vertex_id, vertex in enumerate(vertices):
+        assert [(csr.vertices[other], weight) for other, weight in csr.neighbors(vertex_id)] == graph.edges(vertex)
+
+
+def test_orders_are_stored_once_per_pair():
+    system = build_system(count=10)
+    system.logged_user = system.users[0]
+    with quiet():
+        for _ in range(3):
+            system.order_food("Dish 4", 2)
+        system.order_food("Dish 5", 1)
+    user = system.users[0]
+    assert system.graph.edges(user) == [(system.catalog.get_food("Dish 4"), 3), (system.catalog.get_food("Dish 5"), 1)]
+    assert user.order_history == [("Dish 4", 2)] * 3 + [("Dish 5", 1)]
+    assert system.popular_dishes == {"Dish 4": 6, "Dish 5": 1}
+
+
+# AttributeIndex (user-006)
+
+def shared_attributes(food, other):
+    terms = AttributeIndex.flavor_terms(food.flavor_profile)
+    other_terms = AttributeIndex.flavor_terms(other.flavor_profile)
+    return ((food.cuisine_type == other.cuisine_type) + (food.flavor_profile == other.flavor_profile)
+            + sum(term in other_terms for term in terms))
+
+
+def test_pairings_match_a_brute_force_scan():
+    system = build_system(count=80, seed=11)
+    foods = system.food_items
+    for food in foods[::7]:
+        counts = {other.name: shared_attributes(food, other) for other in foods if other is not food}
+        expected = [name for name in sorted(counts, key=lambda name: -counts[name]) if counts[name]]
+        assert system.attribute_index.matches(food) == {name: count for name, count in counts.items() if count}
+        assert system.attribute_index.pairings(food) == expected
+
+
+def test_flavor_terms_skip_connecting_words():
+    assert AttributeIndex.flavor_terms("Earthy and Spicy, spicy") == ["earthy", "spicy"]
+    assert AttributeIndex.flavor_terms("Sweet & Sour with Heat") == ["sweet", "sour", "heat"]
+
+
+# MealSlotIndex (user-007)
+
+def slot_dishes(foods, slot):
+    return [food for food in foods if MealSlotIndex.MEAL_TYPE_SLOTS.get(food.meal_type.strip().lower()) == slot]
+
+
+def test_meal_slot_suggestions_match_a_brute_force_scan():
+    system = build_system(count=100, seed=12)
+    accept = lambda name: int(name.split()[1]) % 4 != 1
+    for slot in MealSlotIndex.SLOTS:
+        for weekend in (False, True):
+            matching = [food.name for food in slot_dishes(system.food_items, slot)
+                        if weekend or food.calories < MealSlotIndex.QUICK_MEAL_CALORIES]
+            assert system.meal_slots.suggestions(weekend, slot) == matching[:5]
+            assert system.meal_slots.suggestions(weekend, slot, accept) == [name for name in matching if accept(name)][:5]
+        for max_calories in [0, 300, 501, 10000]:
+            expected = sorted((food for food in slot_dishes(system.food_items, slot) if food.calories < max_calories),
+                              key=lambda food: food.calories)
+            assert system.meal_slots.under_calories(slot, max_calories) == [food.name for food in expected]
+            assert system.meal_slots.under_calories(slot, max_calories, 3) == [food.name for food in expected][:3]
+
+
+def test_meal_slot_add_many_matches_add():
+    system = build_system(count=100, seed=13)
+    one_by_one, batched = MealSlotIndex(), MealSlotIndex()
+    for food in system.food_items[:30]:
+        one_by_one.add(food)
+        batched.add(food)
+    for food in system.food_items[30:]:
+        one_by_one.add(food)
+    batched.add_many(system.food_items[30:])
+    assert (batched.ordered, batched.calories, batched.names) == (one_by_one.ordered, one_by_one.calories, one_by_one.names)
+
+
+def test_slot_for_hour():
+    assert [MealSlotIndex.slot_for_hour(hour) for hour in (0, 6, 10, 11, 16, 17, 21, 22)] == [
+        "late-night", "breakfast", "breakfast", "lunch", "lunch", "dinner", "dinner", "late-night"]
+
+
+# Bulk ingestion (user-008)
+
+def index_state(system):
+    """Everything the catalog indexes answer, by dish name (the two systems have distinct Food objects)."""
+    prefixes = ["", "d", "dish 1", "dish 4", "i", "m"]
+    return {
+        "foods": [(food.name, food.cuisine_type, food.calories, round(food.nutrition_score, 9), food.timestamp)
+                  for food in system.food_items],
+        "nutrition": system.nutritionTree.inorder_recommendations(0, 10 ** 6),
+        "top_rated": {cuisine: sorted(dish.name for dish in heap.heap) for cuisine, heap in system.rating_heaps.items()},
+        "cuisines": {cuisine: [food.name for food in foods] for cuisine, foods in system.cuisines.items()},
+        "meal_slots": (system.meal_slots.ordered, system.meal_slots.names),
+        "attributes": (dict(system.attribute_index.by_cuisine), dict(system.attribute_index.by_flavor_term)),
+        "masks": system.dietary_filter.food_masks,
+        "autocomplete": [system.autocomplete.prefix_search(prefix, 50) for prefix in prefixes],
+        "arrivals": [system.new_arrivals.recent(None, cuisine) for cuisine in [None] + CUISINES],
+        "graph": [getattr(vertex, "name", vertex) for vertex in system.graph.vertices],
+        "similarity": (system.similarity.names, system.similarity.numeric),
+    }
+
+
+def test_add_foods_bulk_matches_add_food():
+    records = food_records(150, seed=14)
+    one_by_one = build_system(count=0)
+    with quiet():
+        for record in records:
+            one_by_one.addFood(*record.values())
+    bulk = build_system(count=0)
+    result = bulk.add_foods_bulk(records[:40])
+    assert result == {"added": 40, "skipped": 0}
+    # Names already in the system or repeated in the batch are skipped
+    result = bulk.add_foods_bulk(records[30:45] + records[40:] + records[100:110])
+    assert result == {"added": 110, "skipped": 25}
+    assert index_state(bulk) == index_state(one_by_one)
+    assert [food.nutrition_score for food in bulk.food_items] == pytest.approx(
+        [food.nutrition_score for food in one_by_one.food_items])
+
+
+def test_add_foods_bulk_invalidates_the_cached_listings():
+    system = build_system(count=20, seed=15)
+    system.logged_user = system.users[1]
+    with quiet():
+        system.cuisine_based_recommendations("Italian")
+    system.add_foods_bulk([dict(food_record(random.Random(0), 500), cuisine_type="Italian")])
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        system.cuisine_based_recommendations("Italian")
+    assert "Dish 500" in output.getvalue()
+
+
+# ResultCache (user-017)
+
+def test_result_cache_recomputes_only_stale_entries():
+    cache = ResultCache(max_size=3)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert cache.get("cuisine", ("Italian",), 0, [("ratings", "Italian")], lambda: compute("it-1")) == "it-1"
+    assert cache.get("cuisine", ("Mexican",), 0, [("ratings", "Mexican")], lambda: compute("mx-1")) == "mx-1"
+    cache.bump(("ratings", "Italian"))
+    assert cache.get("cuisine", ("Italian",), 0, [("ratings", "Italian")], lambda: compute("it-2")) == "it-2"
+    assert cache.get("cuisine", ("Mexican",), 0, [("ratings", "Mexican")], lambda: compute("mx-2")) == "mx-1"
+    assert cache.get("cuisine", ("Mexican",), 1, [("ratings", "Mexican")], lambda: compute("mx-mask")) == "mx-mask"
+    assert calls == ["it-1", "mx-1", "it-2", "mx-mask"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stale"], stats["size"]) == (1, 4, 1, 3)
+    # Least recently used entries are evicted first
+    cache.get("popular", (), 0, ["popularity"], lambda: compute("popular"))
+    assert ("cuisine", ("Italian",), 0) not in cache.entries
+    assert ("cuisine", ("Mexican",), 0) in cache.entries
+
+
+def test_cached_endpoints_match_fresh_computations():
+    rng = random.Random(23)
+    system = build_system(count=60, seed=23, users=())
+    with quiet():
+        for i, diet in enumerate(["None", "Vegan", "Vegetarian"]):
+            system.addUser(f"user {i}", "pw", "addr", "Italian", diet)
+    endpoints = [
+        lambda: system.cuisine_based_recommendations("Italian", 5),
+        lambda: system.cuisine_based_recommendations("Mexican"),
+        lambda: system.recommend_based_on_nutrition(),
+        lambda: system.popular_dishes_recommendation(),
+        lambda: system.pair_recommendations("Dish 3"),
+        lambda: system.pair_recommendations("Dish 8"),
+        lambda: system.offer_recommendation(),
+    ]
+
+    def outputs():
+        results = []
+        for endpoint in endpoints:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                endpoint()
+            results.append(output.getvalue())
+        return results
+
+    next_dish = 60
+    for step in range(150):
+        system.logged_user = rng.choice(system.users)
+        action = rng.random()
+        food = rng.choice(system.food_items)
+        with quiet():
+            if action < 0.4:
+                system.order_food(food.name, rng.randint(1, 3))
+            elif action < 0.7:
+                system.rate_dish(food.cuisine_type, food.name, rng.randint(1, 5))
+            elif action < 0.85:
+                system.addFood(*dict(food_record(rng, next_dish), cuisine_type=rng.choice(CUISINES)).values())
+                next_dish += 1
+            else:
+                system.add_offers(food.name, f"{rng.randint(5, 50)}% off")
+        cached = outputs()
+        system.cache.clear()
+        assert outputs() == cached, step  # and the fresh entries are checked after the next mutation
+    assert system.cache.stats()["hits"] > 0
+
+
+# AutocompleteTrie (user-018)
+
+def random_names(rng, count):
+    syllables = ["pa", "par", "pan", "ta", "tac", "co", "cor", "ma", "mas", "la", " ", "Pi", "PIZ", "za"]
+    return list({"".join(rng.choice(syllables) for _ in range(rng.randint(1, 5))).strip() or "x" for _ in range(count)})
+
+
+def assert_trie_structure(trie, node=None):
+    node = node or trie.root
+    entries = list(node.entries or [])
+    for char, child in zip(node.first, node.children):
+        assert child.label and child.label[0] == char
+        assert child.children or child.entries  # no dangling edges
+        if not child.entries:
+            assert len(child.children) != 1  # chains of single children are compressed
+        entries.extend(assert_trie_structure(trie, child))
+    assert node.top == sorted(entries, key=trie.scores.__getitem__, reverse=True)[:trie.TOP_K]
+    return entries
+
+
+def test_autocomplete_matches_a_brute_force_prefix_scan():
+    rng = random.Random(24)
+    names = random_names(rng, 400)
+    scores = rng.sample(range(10 ** 6), 2 * len(names))  # distinct, so the ranking has no ties
+    trie = AutocompleteTrie()
+    expected = {}
+    for index, name in enumerate(names[:150]):
+        kind = rng.choice(["dish", "cuisine"])
+        trie.insert(name, kind, scores[index])
+        expected[(kind, name)] = scores[index]
+    batch = [(name, rng.choice(["dish", "cuisine"]), scores[150 + index]) for index, name in enumerate(names[150:])]
+    trie.insert_many(batch)
+    expected.update(((kind, name), score) for name, kind, score in batch)
+    for _ in range(500):  # score changes both ways
+        entry = rng.choice(list(expected))
+        expected[entry] = rng.choice([expected[entry] + rng.randint(1, 10 ** 5), expected[entry] - rng.randint(1, 10 ** 5)])
+        assert trie.update(entry[1], entry[0], expected[entry])
+    assert not trie.update("never added", "dish", 1)
+    assert len(trie) == len(expected)
+    assert_trie_structure(trie)
+
+    prefixes = ["", "p", "pa", "PAR", "pan", "ta", "taco", "m", "ma ", "x", "zz"] + [name[:3] for name in names[:20]]
+    for prefix in prefixes:
+        for limit in [1, 5, 10, 25]:
+            for kind in [None, "dish", "cuisine"]:
+                matching = sorted((entry for entry in expected if entry[1].lower().startswith(prefix.lower())
+                                   and (kind is None or entry[0] == kind)), key=expected.__getitem__, reverse=True)
+                assert trie.prefix_search(prefix, limit, kind) == [name for _, name in matching[:limit]]
+    for name in names[:50]:
+        assert trie.search(name) and trie.search(name.upper())
+        assert trie.search(name + "q") is (name + "q" in names)
+
+
+def test_insert_many_matches_sequential_inserts():
+    rng = random.Random(25)
+    names = random_names(rng, 300)
+    items = [(name, "dish", rng.random()) for name in names]
+    sequential, batched = AutocompleteTrie(), AutocompleteTrie()
+    for name, kind, score in items[:100]:
+        sequential.insert(name, kind, score)
+        batched.insert(name, kind, score)
+    for name, kind, score in items[100:]:
+        sequential.insert(name, kind, score)
+    batched.insert_many(items[100:] + items[100:110])  # repeated names are indexed once
+    assert batched.scores == sequential.scores
+    assert_trie_structure(batched)
+    for prefix in ["", "p", "pa", "co", "la", "pi"]:
+        assert batched.prefix_search(prefix, 20) == sequential.prefix_search(prefix, 20)
+
+
+# Compact dish layout (user-019)
+
+def test_food_rows_read_and_write_like_food_objects():
+    table = FoodTable()
+    record = ("Tacos", "Mexican", 450, 38.5, "Gluten-Free", ["Corn", "Dairy"], "lunch", "Spicy and Sour")
+    row, food = table.add(*record), Food(*record)
+    assert not hasattr(food, "__dict__") and not hasattr(row, "__dict__")
+    for attribute in ["name", "cuisine_type", "calories", "nutrition_score", "dietary_restrictions", "allergens",
+                      "meal_type", "flavor_profile", "rating", "rating_count", "rating_sum", "promotion"]:
+        assert getattr(row, attribute) == getattr(food, attribute), attribute
+    for target in (row, food):
+        target.rating = 4.5
+        target.cuisine_type = "Fusion"
+        target.promotion = "10% off"
+    assert (row.rating, row.cuisine_type, row.promotion) == (food.rating, food.cuisine_type, food.promotion)
+    row.promotion = None
+    assert row.promotion is None and not table.promotions
+    assert FoodRow(table, 0).name == "Tacos"
+
+
+def test_dietary_restriction_lists_are_interned_as_tuples(tmp_path):
+    table = FoodTable()
+    record = ("Salad", "Greek", 200, 70.0, ["Vegan", "Gluten-Free"], ["Nuts"], "lunch", "Sour")
+    row, food = table.add(*record), Food(*record)
+    assert row.dietary_restrictions == food.dietary_restrictions == ("Vegan", "Gluten-Free")
+    row.dietary_restrictions = food.dietary_restrictions = ["Vegetarian"]
+    row.allergens = ["Dairy"]
+    assert row.dietary_restrictions == food.dietary_restrictions == ("Vegetarian",) and row.allergens == ("Dairy",)
+    path = tmp_path / "foods.jsonl"
+    path.write_text(json.dumps({"name": "Salad", "cuisine_type": "Greek", "calories": 200, "proteins": 10, "fats": 5,
+                                "carbohydrates": 20, "vitamins": [], "minerals": [],
+                                "dietary_restrictions": ["Vegan", "Gluten-Free"], "allergens": [], "meal_type": "lunch",
+                                "flavor_profile": "Sour"}) + "\n")
+    for columnar in (False, True):
+        system = RecommendationSystem(columnar=columnar)
+        with quiet():
+            catalog_loader.load_catalog(system, str(path))
+        salad = system.catalog.get_food("Salad")
+        assert salad.dietary_restrictions == ("Vegan", "Gluten-Free")
+        vegan = User("v", "p", "a", "Greek", "Vegan", [])
+        assert system.dietary_filter.allows("Salad", system.dietary_filter.user_mask(vegan))
+
+
+def test_food_table_pickles_remap_the_vocabulary_codes():
+    table = FoodTable()
+    table.add("Tacos", "Mexican", 450, 38.5, "None", [], "lunch", "Spicy")
+    table.add("Pizza", "Italian", 800, 20.0, "Vegetarian", ["Dairy"], "dinner", "Savory")
+    restored = pickle.loads(pickle.dumps(table))
+    assert [(FoodRow(restored, i).cuisine_type, FoodRow(restored, i).allergens) for i in range(2)] == [
+        ("Mexican", ()), ("Italian", ("Dairy",))]
+    # Codes written by a process whose vocabulary had other values first
+    state = table.__getstate__()
+    state["vocabularies"][0] = ["Cuisine from elsewhere", "Italian", "Mexican"]
+    state["cuisines"] = array("I", [2, 1])
+    moved = FoodTable.__new__(FoodTable)
+    moved.__setstate__(state)
+    assert [FoodRow(moved, i).cuisine_type for i in range(2)] == ["Mexican", "Italian"]
+
+
+def test_columnar_system_gives_the_same_recommendations():
+    outputs = []
+    for columnar in (False, True):
+        rng = random.Random(26)
+        system = build_system(count=80, seed=26, columnar=columnar)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            for _ in range(100):
+                system.logged_user = rng.choice(system.users)
+                food = rng.choice(system.food_items)
+                if rng.random() < 0.5:
+                    system.order_food(food.name, rng.randint(1, 3))
+                else:
+                    system.rate_dish(food.cuisine_type, food.name, rng.randint(1, 5))
+            system.add_offers("Dish 7", "2 for 1")
+            for user in system.users:
+                system.logged_user = user
+                for cuisine in CUISINES:
+                    system.cuisine_based_recommendations(cuisine)
+                system.personalized_recommendations()
+                system.recommend_based_on_nutrition()
+                system.popular_dishes_recommendation()
+                system.pair_recommendations("Dish 11")
+                system.offer_recommendation()
+                system.get_new_arrivals()
+        assert isinstance(system.food_items[0], FoodRow if columnar else Food)
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+# DietaryFilter (user-020)
+
+def labels(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    return {term.strip().lower() for term in value if term.strip() and term.strip().lower() != "none"}
+
+
+def can_eat(user, food):
+    """A dish is safe without the user's allergens and satisfying each known diet of the user (vegan implies two more)."""
+    satisfied = labels(food.dietary_restrictions)
+    if "vegan" in satisfied:
+        satisfied |= {"vegetarian", "dairy-free"}
+    diets = labels(user.dietary_pref) & set(DietaryFilter.DIETS)
+    return not labels(user.allergens) & labels(food.allergens) and diets <= satisfied
+
+
+def test_exclusion_masks_match_a_set_based_check():
+    rng = random.Random(27)
+    system = build_system(count=150, seed=27)
+    dietary_filter = system.dietary_filter
+    diets = ["None", "Vegan", "Vegetarian", "Dairy-Free", "Gluten-Free, Nut-Free", "Keto"]
+    users = [User(f"user {i}", "pw", "addr", "Italian", rng.choice(diets),
+                  rng.sample(ALLERGENS + ["Shellfish"], rng.randint(0, 2))) for i in range(40)]
+    names = [food.name for food in system.food_items]
+    for user in users:
+        mask = dietary_filter.user_mask(user)
+        expected = [food.name for food in system.food_items if can_eat(user, food)]
+        assert [name for name in names if dietary_filter.allows(name, mask)] == expected
+        assert dietary_filter.filter(names, mask) == expected  # vectorized for long lists
+        assert dietary_filter.filter(names[:10], mask) == [name for name in expected if name in names[:10]]
+    assert dietary_filter.user_mask(None) == 0
+
+
+def test_user_masks_follow_allergens_added_later():
+    system = build_system(count=5, seed=28)
+    user = User("ana", "pw", "addr", "Italian", "None", ["Shellfish"])
+    assert system.dietary_filter.user_mask(user) == 0  # no dish has shellfish yet
+    with quiet():
+        system.addFood("Paella", "Mexican", 600, 30, 20, 60, [], [], "None", ["Shellfish"], "dinner", "Savory")
+    mask = system.dietary_filter.user_mask(user)
+    assert mask and not system.dietary_filter.allows("Paella", mask)
+    assert system.dietary_filter.allows("Dish 1", mask)
+
+
+def test_recommendations_skip_dishes_the_user_cannot_eat():
+    rng = random.Random(29)
+    system = build_system(count=120, seed=29)
+    with quiet():
+        system.addUser("vera", "pw", "addr", "Italian", "Vegan")
+    vera = system.catalog.get_user("vera")
+    vera.allergens = ["Nuts"]
+    with quiet():
+        for _ in range(200):
+            system.logged_user = rng.choice(system.users)
+            food = rng.choice(system.food_items)
+            system.order_food(food.name, 1)
+            system.rate_dish(food.cuisine_type, food.name, rng.randint(1, 5))
+    system.logged_user = vera
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for cuisine in CUISINES:
+            system.cuisine_based_recommendations(cuisine)
+        system.personalized_recommendations()
+        system.popular_dishes_recommendation()
+        system.pair_recommendations("Dish 2")
+        system.get_new_arrivals()
+    listed = [line.split(". ", 1)[1] for line in output.getvalue().splitlines() if line[:1].isdigit()]
+    assert listed and all(can_eat(vera, system.catalog.get_food(name)) for name in listed)
+
+
+def test_personalized_recommendations_explain_a_fully_filtered_history():
+    system = build_system(count=40, seed=30)
+    meat = next(food for food in system.food_items if not can_eat(User("x", "", "", "", "Vegan", []), food))
+    system.logged_user = system.users[0]
+    system.logged_user.dietary_pref = "Vegan"
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        system.order_food(meat.name, 1)
+        system.personalized_recommendations()
+    assert "match their dietary preferences" in output.getvalue()
+
+
+# Rating aggregates and the rating model (user-021)
+
+def test_rating_aggregates_keep_one_rating_per_user():
+    rng = random.Random(34)
+    system = build_system(count=20, seed=34, users=("ana", "bo", "cy"))
+    latest = {}
+    with quiet():
+        for _ in range(300):
+            system.logged_user = rng.choice(system.users)
+            food = rng.choice(system.food_items)
+            rating = rng.randint(1, 5)
+            system.rate_dish(food.cuisine_type, food.name, rating)
+            latest[(system.logged_user.name, food.name)] = rating
+    prior = RecommendationSystem.RATING_PRIOR_MEAN * RecommendationSystem.RATING_PRIOR_WEIGHT
+    for food in system.food_items:
+        ratings = [rating for (_, name), rating in latest.items() if name == food.name]
+        assert (food.rating_count, food.rating_sum) == (len(ratings), sum(ratings))
+        expected = (prior + sum(ratings)) / (RecommendationSystem.RATING_PRIOR_WEIGHT + len(ratings)) if ratings else 0
+        assert food.rating == pytest.approx(expected)
+    for user in system.users:
+        assert user.ratings == {name: rating for (user_name, name), rating in latest.items() if user_name == user.name}
+
+
+def test_trained_model_serves_the_personalized_list():
+    pytest.importorskip("numpy")
+    rng = random.Random(35)
+    system = build_system(count=30, seed=35, users=[f"user {i}" for i in range(8)])
+    with quiet():
+        for _ in range(120):
+            system.logged_user = rng.choice(system.users)
+            food = rng.choice(system.food_items)
+            system.rate_dish(food.cuisine_type, food.name, rng.randint(1, 5))
+    model = system.train_rating_model(factors=3, iterations=3)
+    user = system.users[0]
+    system.logged_user = user
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        system.personalized_recommendations()
+    listed = [line.split(". ", 1)[1] for line in output.getvalue().splitlines() if line[:1].isdigit()]
+    assert listed == model.recommendations(user.name, 5)
+    assert not set(listed) & set(user.ratings)
+
+
+# OfferIndex (user-023)
+
+def running_offers(latest, now):
+    return sorted((name, text) for name, (text, start, end) in latest.items()
+                  if start <= now and (end is None or end > now))
+
+
+def test_offer_index_matches_a_brute_force_schedule():
+    rng = random.Random(42)
+    foods = [Food(f"Dish {i:02d}", "Italian", 100, 10, "None", [], "lunch", "Sweet") for i in range(25)]
+    index = OfferIndex()
+    latest = {}  # food name : (text, start, end) of its last offer
+    clock = 0.0
+    for step in range(600):
+        clock += rng.uniform(0, 5)
+        if rng.random() < 0.4:
+            food = rng.choice(foods)
+            start = clock + rng.uniform(-10, 30)
+            end = None if rng.random() < 0.3 else start + rng.uniform(1, 60)
+            index.add(food, f"offer {step}", start, end)
+            latest[food.name] = (f"offer {step}", start, end)
+        for now in (clock, clock + rng.uniform(0, 40)):  # listings never modify the index
+            before = (list(index.active), list(index.starts), list(index.ends))
+            assert [(offer.food.name, offer.text) for offer in index.current(now)] == running_offers(latest, now)
+            if [offer.food.name for offer in index.current(now)] != index.active:
+                assert index.due(now)  # advance(now) would change the running offers
+            assert (index.active, index.starts, index.ends) == before
+        if rng.random() < 0.5:
+            active = list(index.active)
+            changed = index.advance(clock)
+            running = running_offers(latest, clock)
+            assert index.active == [name for name, _ in running]
+            assert len(index) == len(running)
+            assert not index.due(clock)
+            texts = dict(running)
+            assert [food.promotion for food in foods] == [texts.get(food.name) for food in foods]
+            assert changed == (index.active != active)
+
+
+def test_offer_listing_follows_the_clock(monkeypatch):
+    system = build_system(count=10, seed=43)
+    system.logged_user = system.users[0]
+    now = 1_000_000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    with quiet():
+        system.add_offers("Dish 1", "Running", start=now - 100, end=now + 100)
+        system.add_offers("Dish 2", "Expired", start=now - 100, end=now - 50)
+        system.add_offers("Dish 3", "Scheduled", start=now + 1000)
+        system.add_offers("Dish 4", "Ends soon", start=now - 10, end=now + 5)
+        system.add_offers("Dish 1", "Replacement", start=now - 5)
+        system.add_offers("Dish 5", "Invalid", start=now, end=now - 1)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        system.offer_recommendation()
+        now += 10
+        system.offer_recommendation()  # the cached listing is not used once an offer ended
+        now += 1000
+        system.offer_recommendation()
+    first, second, third = output.getvalue().split("Special Offers!!!!!")[1:]
+    assert "Dish 1" in first and "Replacement" in first and "Running" not in first
+    assert "Dish 4" in first and "Dish 4" not in second
+    assert "Dish 3" not in first + second and "Dish 3" in third
+    assert "Dish 2" not in first + second + third and "Dish 5" not in first + second + third
+
+
+# New arrival rings (user-024)
+
+def test_arrival_ring_keeps_the_newest_arrivals():
+    rng = random.Random(44)
+    ring = ArrivalRing(16)
+    arrivals = []
+    for i in range(100):
+        arrivals.append((f"Dish {i}", float(i)))
+        ring.append(*arrivals[-1])
+        kept = arrivals[-16:][::-1]  # newest first
+        assert len(ring) == len(kept)
+        k = rng.randint(0, 20)
+        since = rng.uniform(0, i + 1)
+        accept = lambda name: int(name.split()[1]) % 3 != 0
+        assert ring.recent() == [name for name, _ in kept]
+        assert ring.recent(k) == [name for name, _ in kept][:k]
+        assert ring.recent(k, since, accept) == [name for name, timestamp in kept
+                                                 if timestamp >= since and accept(name)][:k]
+
+
+def test_new_arrivals_per_cuisine_match_the_added_dishes():
+    foods = [Food(f"Dish {i}", CUISINES[i % 3] if i % 7 else "Unregistered", 100, 10, "None", [], "lunch", "Sweet")
+             for i in range(300)]
+    one_by_one, batched = NewArrivals(capacity=32, cuisine_capacity=8), NewArrivals(capacity=32, cuisine_capacity=8)
+    for food in foods[:100]:
+        one_by_one.add(food, 1.0)
+        batched.add(food, 1.0)
+    for food in foods[100:]:
+        one_by_one.add(food, 2.0)
+    batched.add_many(foods[100:], 2.0)
+    for cuisine in [None, "Unregistered"] + CUISINES:
+        names = [food.name for food in foods if cuisine is None or food.cuisine_type == cuisine][::-1]
+        capacity = 32 if cuisine is None else 8
+        assert one_by_one.recent(None, cuisine) == batched.recent(None, cuisine) == names[:capacity]
+        assert batched.recent(3, cuisine, since=2.0) == names[:3]
+    assert batched.recent(5, "Unknown") == []
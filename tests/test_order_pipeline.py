@@ -0,0 +1,228 @@
+import contextlib
+import io
+import math
+import random
+from datetime import datetime
+
+import pytest
+
+from main import RecommendationSystem
+from order_pipeline import OrderEvent, OrderPipeline, micro_batches
+from seasonal_menu_items import MenuItem, SeasonalMenu
+from snapshots import VersionedSystem
+
+CUISINES = ["Italian", "Mexican", "Indian"]
+USERS = ["ana", "bo", "cy"]
+
+
+def build(seed=45):
+    rng = random.Random(seed)
+    system = RecommendationSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cuisine in CUISINES:
+            system.add_cuisine(cuisine)
+        for name in USERS:
+            system.addUser(name, "pw", "addr", "Italian", "None")
+        for i in range(40):
+            system.addFood(f"Dish {i}", CUISINES[i % 3], rng.randint(100, 900), rng.randint(1, 40), rng.randint(1, 40),
+                           rng.randint(1, 80), [], [], "None", [], "lunch", "Sweet")
+    menu = SeasonalMenu()
+    for name in ["Pumpkin Soup", "Berry Tart"]:
+        menu.add_item(MenuItem(name, "", 8.0, []))
+    return system, menu
+
+
+def random_events(seed, count):
+    rng = random.Random(seed)
+    events = []
+    timestamp = 1_700_000_000.0
+    for _ in range(count):
+        timestamp += rng.expovariate(1 / 900)  # some hours apart, so the decayed windows matter
+        item = rng.choice([f"Dish {rng.randrange(40)}"] * 8 + ["Pumpkin Soup", "Berry Tart", "Unknown"])
+        events.append(OrderEvent(rng.choice(USERS + ["ghost"]), item, rng.randint(1, 3), timestamp))
+    return events
+
+
+def apply_one_by_one(system, menu, events):
+    """Reference: every event applied on its own, like order_food and record_sale do."""
+    for event in events:
+        user, food = system.catalog.get_user(event.user), system.catalog.get_food(event.item)
+        if food is not None:
+            if user is not None:
+                system.apply_order(user, food, event.quantity, event.timestamp)
+        elif event.item in menu.items_by_name:
+            menu.apply_sale(event.item, event.quantity, datetime.fromtimestamp(event.timestamp).strftime("%Y-%m"))
+
+
+def assert_same_state(system, menu, reference, reference_menu):
+    for user, expected in zip(system.users, reference.users):
+        assert [(food.name, weight) for food, weight in system.graph.edges(user)] == [
+            (food.name, weight) for food, weight in reference.graph.edges(expected)]
+        assert user.order_history == expected.order_history
+    assert system.popular_dishes == reference.popular_dishes
+    for window, tracker in system.popularity.items():
+        expected = reference.popularity[window]
+        now = 1_800_000_000.0
+        for name in expected.scores:
+            assert math.isclose(tracker.score(name, now), expected.score(name, now), rel_tol=1e-9, abs_tol=1e-300)
+        assert [tracker.score(name, now) for name in tracker.top_k()] == pytest.approx(
+            [expected.score(name, now) for name in expected.top_k()], rel=1e-9)
+    assert system.autocomplete.scores == reference.autocomplete.scores
+    for prefix in ["", "d", "dish 1", "i", "m"]:  # equal scores may be listed in either order
+        ranks = [[trie.scores.get(("dish", name), trie.scores.get(("cuisine", name)))
+                  for name in trie.prefix_search(prefix, 10)] for trie in (system.autocomplete, reference.autocomplete)]
+        assert ranks[0] == ranks[1]
+    assert [(dict(item.sales_history), item.total_sales) for item in menu.menu_items] == [
+        (dict(item.sales_history), item.total_sales) for item in reference_menu.menu_items]
+    assert menu.max_sales == reference_menu.max_sales
+
+
+def test_micro_batches():
+    assert list(micro_batches(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(micro_batches([], 3)) == []
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 1000])
+def test_replayed_batches_match_per_event_application(batch_size):
+    events = random_events(46, 600)
+    reference, reference_menu = build()
+    apply_one_by_one(reference, reference_menu, events)
+    system, menu = build()
+    pipeline = OrderPipeline(system, menu, batch_size=batch_size)
+    try:
+        counts = pipeline.replay(events)
+    finally:
+        pipeline.close()
+    skipped = sum(event.user == "ghost" and event.item.startswith("Dish") or event.item == "Unknown" for event in events)
+    sales = sum(event.item in ("Pumpkin Soup", "Berry Tart") for event in events)
+    assert counts == {"events": 600, "orders": 600 - skipped - sales, "sales": sales, "skipped": skipped}
+    assert_same_state(system, menu, reference, reference_menu)
+
+
+def test_submitted_events_are_applied_and_recorded_once():
+    class Recorder:
+        def __init__(self):
+            self.orders, self.sales = [], []
+
+        def record_order(self, *row):
+            self.orders.append(row)
+
+        def record_sale(self, *row):
+            self.sales.append(row)
+
+    events = random_events(47, 400)
+    reference, reference_menu = build()
+    apply_one_by_one(reference, reference_menu, events)
+    system, menu = build()
+    system.store, menu.store = Recorder(), Recorder()
+    pipeline = OrderPipeline(system, menu, batch_size=32, batch_delay=0.001)
+    try:
+        for event in events:
+            pipeline.submit(*event)
+        pipeline.flush()
+        assert pipeline.stats["events"] == 400 and pipeline.stats["batches"] >= 400 // 32
+        assert_same_state(system, menu, reference, reference_menu)
+        # Replays are not recorded again
+        pipeline.replay(events[:10])
+    finally:
+        pipeline.close()
+    applied = [event for event in events if event.user != "ghost" and system.catalog.has_food(event.item)]
+    assert system.store.orders == [tuple(event) for event in applied]
+    assert [(item, quantity) for item, quantity, _, _ in menu.store.sales] == [
+        (event.item, event.quantity) for event in events if event.item in menu.items_by_name]
+
+
+def test_order_food_waits_for_its_batch():
+    system, menu = build()
+    system.order_pipeline = OrderPipeline(system, menu, batch_delay=10)  # only a flush ends the batch early
+    try:
+        system.logged_user = system.users[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.order_food("Dish 3", 2)
+            assert system.users[0].order_history == [("Dish 3", 2)]
+            system.order_food("Dish 4", 1, wait=False)
+            system.order_pipeline.flush()
+        assert system.popular_dishes == {"Dish 3": 2, "Dish 4": 1}
+    finally:
+        system.order_pipeline.close()
+
+
+def test_handler_receives_the_batches():
+    system, _ = build()
+    batches = []
+
+    def handler(events, record):
+        batches.append((events, record))
+        return {"orders": len(events), "sales": 0, "skipped": 0}
+    pipeline = OrderPipeline(system, batch_size=5, handler=handler)
+    try:
+        for i in range(12):
+            pipeline.submit("ana", f"Dish {i}", 1, float(i))
+        pipeline.flush()
+        replayed = pipeline.replay(OrderEvent("bo", f"Dish {i}", 1, float(i)) for i in range(7))
+    finally:
+        pipeline.close()
+    assert [event.item for batch, _ in batches for event in batch] == [f"Dish {i}" for i in range(12)] + [
+        f"Dish {i}" for i in range(7)]
+    assert all(len(batch) <= 5 for batch, _ in batches)
+    assert [record for batch, record in batches if batch[0].user == "bo"] == [False, False]  # replays are not recorded
+    assert replayed == {"events": 7, "orders": 7, "sales": 0, "skipped": 0}
+    assert pipeline.stats["events"] == pipeline.stats["orders"] == 19
+    assert not system.users[0].order_history  # the handler applies them, not the pipeline
+
+
+def test_replay_runs_after_the_submitted_events():
+    system, menu = build()
+    pipeline = OrderPipeline(system, menu, batch_size=4, batch_delay=10)  # only a flush or a replay ends a batch
+    try:
+        pipeline.submit("ana", "Dish 1", 1, 1.0)
+        pipeline.submit("ana", "Dish 2", 1, 2.0)
+        counts = pipeline.replay([OrderEvent("ana", "Dish 3", 1, 3.0), OrderEvent("ana", "Berry Tart", 2, 4.0),
+                                  OrderEvent("ghost", "Dish 4", 1, 5.0)])
+        assert counts == {"events": 3, "orders": 1, "sales": 1, "skipped": 1}
+        assert [name for name, _ in system.users[0].order_history] == ["Dish 1", "Dish 2", "Dish 3"]
+    finally:
+        pipeline.close()
+
+
+def test_versioned_system_replays_are_not_recorded_again():
+    class Recorder:
+        def __init__(self):
+            self.orders = []
+
+        def record_order(self, *row):
+            self.orders.append(row)
+
+    events = [event for event in random_events(49, 60) if event.item.startswith("Dish")]
+    system, _ = build()
+    system.store = Recorder()
+    versioned = VersionedSystem(system, batch_size=16)
+    try:
+        for event in events[:30]:
+            versioned.orders.submit(*event)
+        counts = versioned.orders.replay(events[30:])
+        versioned.flush()
+        assert counts == {"events": len(events) - 30, "orders": sum(event.user != "ghost" for event in events[30:]),
+                          "sales": 0, "skipped": sum(event.user == "ghost" for event in events[30:])}
+        assert versioned.store.orders == [tuple(event) for event in events[:30]]
+        with versioned.read() as view:
+            assert sum(len(user.order_history) for user in view.users) == sum(event.user != "ghost" for event in events)
+    finally:
+        versioned.close()
+
+
+def test_versioned_system_orders_match_per_event_application():
+    events = [event for event in random_events(48, 300) if event.item.startswith("Dish")]
+    reference, _ = build()
+    apply_one_by_one(reference, SeasonalMenu(), events)
+    system, _ = build()
+    versioned = VersionedSystem(system, batch_size=16)
+    try:
+        for event in events:
+            versioned.orders.submit(*event)
+        versioned.flush()
+        with versioned.read() as view:
+            assert [user.order_history for user in view.users] == [user.order_history for user in reference.users]
+            assert view.popular_dishes == reference.popular_dishes
+    finally:
+        versioned.close()
@@ -0,0 +1,160 @@
+import contextlib
+import io
+import random
+import sqlite3
+
+import pytest
+
+from main import RecommendationSystem
+from persistence import SQLiteStore
+from seasonal_menu_items import MenuItem, SeasonalMenu
+
+CUISINES = ["Italian", "Mexican"]
+
+
+def build_system():
+    rng = random.Random(16)
+    system = RecommendationSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cuisine in CUISINES:
+            system.add_cuisine(cuisine)
+        for name in ["ana", "bo", "cy"]:
+            system.addUser(name, "pw", "addr", "Italian", "None")
+        for i in range(30):
+            system.addFood(f"Dish {i}", CUISINES[i % 2], rng.randint(100, 900), rng.randint(1, 40), rng.randint(1, 40),
+                           rng.randint(1, 80), [], [], "None", [], "lunch", "Sweet")
+    return system
+
+
+def build_menu():
+    menu = SeasonalMenu()
+    for name in ["Pumpkin Soup", "Berry Tart"]:
+        menu.add_item(MenuItem(name, "", 10.0, []))
+    return menu
+
+
+def state(system, menu):
+    """What the replayed events feed: graph weights, histories, popularity, ratings, offers and sales."""
+    return {
+        "edges": {user.name: [(food.name, weight) for food, weight in system.graph.edges(user)] for user in system.users},
+        "histories": {user.name: list(user.order_history) for user in system.users},
+        "popular": system.popular_dishes,
+        "top": {window: tracker.top_k() for window, tracker in system.popularity.items()},
+        "ratings": {food.name: (food.rating_count, food.rating_sum, food.rating) for food in system.food_items},
+        "user_ratings": {user.name: user.ratings for user in system.users},
+        "offers": [(offer.food.name, offer.text, offer.start, offer.end) for offer in system.offer_index.current(2000)],
+        "sales": {item.name: (dict(item.sales_history), item.total_sales) for item in menu.menu_items},
+        "max_sales": menu.max_sales,
+    }
+
+
+def test_restore_replays_the_recorded_events(tmp_path):
+    rng = random.Random(17)
+    path = str(tmp_path / "events.db")
+    system, menu = build_system(), build_menu()
+    store = system.store = menu.store = SQLiteStore(path, batch_size=7, flush_interval=0.01)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(200):
+            system.logged_user = rng.choice(system.users)
+            food = system.food_items[rng.randrange(30)]
+            if rng.random() < 0.8:
+                system.order_food(food.name, rng.randint(1, 3))
+            else:
+                system.rate_dish(food.cuisine_type, food.name, rng.randint(1, 5))
+        system.add_offers("Dish 3", "10% off", start=1000, end=3000)
+        system.add_offers("Dish 4", "Free drink", start=1500)
+        system.add_offers("Dish 5", "Expired", start=100, end=200)
+        for _ in range(20):
+            menu.record_sale(rng.choice(["Pumpkin Soup", "Berry Tart", "Unknown"]), rng.randint(1, 4))
+    store.close()
+
+    restored_system, restored_menu = build_system(), build_menu()
+    reader = SQLiteStore(path)
+    reader.REPLAY_BATCH = 16  # several replay batches
+    try:
+        counts = reader.restore(restored_system, restored_menu)
+    finally:
+        reader.close()
+    with sqlite3.connect(path) as connection:
+        for table in ["orders", "ratings", "offers", "sales"]:
+            assert counts[table] == connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    assert counts["orders"] + counts["ratings"] == 200
+    assert state(restored_system, restored_menu) == state(system, menu)
+
+
+def test_restore_skips_unknown_names(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = SQLiteStore(path)
+    store.record_order("ghost", "Dish 1", 1, 1.0)
+    store.record_order("ana", "Unknown dish", 1, 2.0)
+    store.record_order("ana", "Dish 1", 2, 3.0)
+    store.record_rating("ana", "Italian", "Unknown dish", 5, 4.0)
+    store.record_offer("Unknown dish", "50% off", 5.0)
+    store.record_sale("Unknown item", 1, "2024-01", 6.0)
+    store.close()
+
+    system, menu = build_system(), build_menu()
+    reader = SQLiteStore(path)
+    try:
+        assert reader.restore(system, menu) == {"orders": 1, "ratings": 0, "offers": 0, "sales": 0}
+    finally:
+        reader.close()
+    assert system.users[0].order_history == [("Dish 1", 2)]
+
+
+def test_old_databases_are_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE offers (id INTEGER PRIMARY KEY, food TEXT NOT NULL, offer TEXT NOT NULL, "
+                           "ts REAL NOT NULL)")
+        connection.execute("INSERT INTO offers (food, offer, ts) VALUES ('Dish 2', 'Old offer', 50.0)")
+    connection.close()
+    system = build_system()
+    store = SQLiteStore(path)
+    try:
+        assert store.restore(system)["offers"] == 1
+    finally:
+        store.close()
+    # Offers recorded before start / end times start when recorded and never end
+    assert [(offer.food.name, offer.start, offer.end) for offer in system.offer_index.current(10 ** 12)] == [
+        ("Dish 2", 50.0, None)]
+
+
+def test_a_failing_batch_is_reported_and_the_writer_goes_on(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = SQLiteStore(path, flush_interval=0.01)
+    try:
+        store.record_order("ana", "Dish 1", 1, 1.0)
+        store.record_order("ana", "Dish 2", 2 ** 70, 2.0)  # too large for an SQLite integer, the batch is dropped
+        with pytest.raises(OverflowError):
+            store.flush()
+        store.record_order("bo", "Dish 3", 1, 3.0)
+        store.flush()  # the error is reported once
+    finally:
+        store.close()
+    assert list(store.rows("orders")) == [("bo", "Dish 3", 1, 3.0)]
+
+
+def test_a_stopped_writer_fails_fast(tmp_path):
+    class BrokenStore(SQLiteStore):
+        connections = 0
+
+        def _connect(self):
+            BrokenStore.connections += 1
+            if BrokenStore.connections > 1:  # the writer thread's connection
+                raise sqlite3.OperationalError("unable to open database file")
+            return super()._connect()
+
+    store = BrokenStore(str(tmp_path / "events.db"))
+    store._writer.join(5)
+    with pytest.raises(RuntimeError) as raised:
+        store.flush()
+    assert isinstance(raised.value.__cause__, sqlite3.OperationalError)
+    with pytest.raises(RuntimeError):
+        store.record_order("ana", "Dish 1", 1, 1.0)
+    store.close()
+
+    closed = SQLiteStore(str(tmp_path / "other.db"))
+    closed.close()
+    with pytest.raises(RuntimeError):
+        closed.flush()
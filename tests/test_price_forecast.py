@@ -0,0 +1,81 @@
+import csv
+import random
+from datetime import date
+
+import pytest
+
+import price_forecast
+from price_forecast import forecast_prices
+from seasonal_menu_items import Holiday, Ingredient, MenuItem, PricingStrategy, SEASON_BY_MONTH, Season, SeasonalMenu
+
+
+@pytest.fixture
+def menu():
+    rng = random.Random(20)
+    seasons = list(Season)
+    menu = SeasonalMenu()
+    for index in range(25):
+        ingredients = [Ingredient(f"Ingredient {index}-{part}", rng.sample(seasons, rng.randint(0, 2)), 10, 1.0)
+                       for part in range(rng.randint(1, 3))]
+        menu.add_item(MenuItem(f"Item {index}", "", round(rng.uniform(3, 30), 2), ingredients,
+                               seasons=rng.sample(seasons, rng.randint(0, 2)),
+                               holidays=rng.sample(list(Holiday), rng.randint(0, 2))))
+        menu.apply_sale(f"Item {index}", rng.randint(0, 40), "2024-01")
+    return menu
+
+
+def reference(menu, day):
+    """Price and menu membership of every item on one day, computed with the per-item pricing."""
+    season = SEASON_BY_MONTH[day.month]
+    holiday = menu.holiday_calendar(day.year).get(day)
+    rows = []
+    for item in menu.menu_items:
+        popularity = min(1.0, item.total_sales / menu.max_sales)
+        price = PricingStrategy.calculate_seasonal_price(item.base_price, popularity,
+                                                         item.availability_by_month[day.month - 1])
+        rows.append((price, season in item.seasons or (holiday is not None and holiday in item.holidays)))
+    return rows
+
+
+def assert_matches_reference(menu, forecast):
+    assert forecast.items == [item.name for item in menu.menu_items]
+    for column, day in enumerate(forecast.dates):
+        for row, (price, offered) in enumerate(reference(menu, day)):
+            assert forecast.prices[row][column] == pytest.approx(price)
+            assert bool(forecast.offered[row][column]) == offered
+
+
+def test_forecast_matches_the_per_day_pricing(menu):
+    # Across a new year, with Thanksgiving, Christmas and New Year's Day in the range
+    forecast = forecast_prices(menu, date(2024, 11, 15), days=60)
+    assert forecast.dates[0] == date(2024, 11, 15) and forecast.dates[-1] == date(2025, 1, 13)
+    assert forecast.holidays[forecast.dates.index(date(2024, 11, 28))] == Holiday.THANKSGIVING
+    assert forecast.holidays[forecast.dates.index(date(2025, 1, 1))] == Holiday.NEW_YEAR
+    assert_matches_reference(menu, forecast)
+
+
+def test_list_fallback_matches_numpy(menu, monkeypatch):
+    if price_forecast.np is None:
+        pytest.skip("NumPy is not installed")
+    vectorized = forecast_prices(menu, date(2025, 2, 1), days=120)
+    monkeypatch.setattr(price_forecast, "np", None)
+    fallback = forecast_prices(menu, date(2025, 2, 1), days=120)
+    assert isinstance(fallback.prices, list)
+    for vectorized_row, fallback_row in zip(vectorized.prices.tolist(), fallback.prices):
+        assert vectorized_row == pytest.approx(fallback_row)
+    assert vectorized.offered.tolist() == fallback.offered
+    assert_matches_reference(menu, fallback)
+
+
+def test_to_csv(menu, tmp_path):
+    forecast = forecast_prices(menu, date(2024, 6, 1), days=5)
+    path = tmp_path / "prices.csv"
+    forecast.to_csv(str(path), offered_only=True)
+    with open(path, newline="", encoding="utf-8") as handle:
+        rows = list(csv.reader(handle))
+    assert rows[0] == ["item", "2024-06-01", "2024-06-02", "2024-06-03", "2024-06-04", "2024-06-05"]
+    for row, name in enumerate(forecast.items):
+        assert rows[row + 1][0] == name
+        for column, cell in enumerate(rows[row + 1][1:]):
+            expected = f"{forecast.prices[row][column]:.2f}" if forecast.offered[row][column] else ""
+            assert cell == expected
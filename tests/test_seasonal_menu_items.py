@@ -0,0 +1,131 @@
+import random
+from datetime import date, datetime, timedelta
+
+from seasonal_menu_items import (Holiday, Ingredient, MenuItem, PricingStrategy, SEASON_BY_MONTH, Season, SeasonalMenu,
+                                 month_availability)
+
+
+def reference_availability(peak_seasons, month):
+    """Availability computed from scratch like the menu used to on every call."""
+    season = next((season for season in Season if month in season.months), Season.WINTER)
+    if season in peak_seasons:
+        return 1.0
+    distances = [min((month - peak) % 12, (peak - month) % 12) for season in peak_seasons for peak in season.months]
+    return max(0.2, 1 - min(distances, default=float("inf")) / 6)
+
+
+def random_menu(seed, count=40):
+    rng = random.Random(seed)
+    seasons = list(Season)
+    menu = SeasonalMenu()
+    for index in range(count):
+        ingredients = [Ingredient(f"Ingredient {index}-{part}", rng.sample(seasons, rng.randint(0, 2)),
+                                  rng.randint(3, 90), 1.0) for part in range(rng.randint(1, 3))]
+        menu.add_item(MenuItem(f"Item {index}", "", round(rng.uniform(3, 30), 2), ingredients,
+                               seasons=rng.sample(seasons, rng.randint(0, 2)),
+                               holidays=rng.sample(list(Holiday), rng.randint(0, 1))))
+    return menu
+
+
+# Precomputed availability and calendar (user-011)
+
+def test_month_availability_matches_the_reference():
+    seasons = list(Season)
+    for size in range(len(seasons) + 1):
+        for start in range(len(seasons)):
+            peak = [seasons[(start + offset) % len(seasons)] for offset in range(size)]
+            for month in range(1, 13):
+                assert month_availability(peak, month) == reference_availability(peak, month)
+                ingredient = Ingredient("x", peak, 10, 1.0)
+                assert ingredient.availability_by_month[month - 1] == reference_availability(peak, month)
+
+
+def test_item_availability_is_the_mean_of_its_ingredients():
+    for item in random_menu(18).menu_items:
+        for month in range(1, 13):
+            expected = sum(reference_availability(ingredient.peak_seasons, month) for ingredient in item.ingredients)
+            assert abs(item.availability_by_month[month - 1] - expected / len(item.ingredients)) < 1e-12
+
+
+def test_holiday_calendar():
+    menu = SeasonalMenu()
+    calendar = menu.holiday_calendar(2024)
+    assert calendar[date(2024, 3, 31)] == Holiday.EASTER
+    assert calendar[date(2024, 11, 28)] == Holiday.THANKSGIVING
+    assert calendar[date(2024, 12, 25)] == Holiday.CHRISTMAS
+    assert len(calendar) == len(Holiday)
+    assert menu.holiday_calendar(2025)[date(2025, 4, 20)] == Holiday.EASTER
+    for year in range(2000, 2040):
+        thanksgiving = next(day for day, holiday in menu.holiday_calendar(year).items() if holiday == Holiday.THANKSGIVING)
+        assert thanksgiving.month == 11 and thanksgiving.weekday() == 3 and 22 <= thanksgiving.day <= 28
+
+
+def test_season_and_holiday_are_evaluated_per_day():
+    menu = SeasonalMenu()
+    day = datetime(2023, 1, 1, 8)
+    while day.year == 2023:
+        season, holiday = menu._season_and_holiday(day)
+        assert season == next(season for season in Season if day.month in season.months)
+        assert holiday == menu.holiday_calendar(2023).get(day.date())
+        assert menu._season_and_holiday(day + timedelta(hours=3)) == (season, holiday)
+        day += timedelta(days=1)
+    assert SEASON_BY_MONTH[12] == Season.WINTER
+
+
+def test_seasonal_items_match_a_recomputation():
+    menu = random_menu(19)
+    rng = random.Random(19)
+    for item in menu.menu_items:
+        menu.apply_sale(item.name, rng.randint(0, 30), "2024-01")
+    now = datetime.now()
+    season = SEASON_BY_MONTH[now.month]
+    holiday = menu.holiday_calendar(now.year).get(now.date())
+    max_sales = max(sum(item.sales_history.values()) for item in menu.menu_items) or 1
+    expected = []
+    for item in menu.menu_items:
+        if season in item.seasons or holiday in item.holidays:
+            availability = sum(reference_availability(ingredient.peak_seasons, now.month)
+                               for ingredient in item.ingredients) / len(item.ingredients)
+            popularity = min(1.0, sum(item.sales_history.values()) / max_sales)
+            price = PricingStrategy.calculate_seasonal_price(item.base_price, popularity, availability)
+            expected.append((item.name, round(price, 2), round(availability, 9), popularity))
+    expected.sort(key=lambda entry: (entry[2], entry[3]), reverse=True)
+    result = [(entry["name"], entry["price"], round(entry["availability"], 9), entry["popularity"])
+              for entry in menu.get_seasonal_items()]
+    assert result == expected
+
+
+# Name index and running sales totals (user-013)
+
+def test_running_sales_totals_match_the_history():
+    menu = random_menu(21, count=15)
+    rng = random.Random(21)
+    for _ in range(500):
+        name = f"Item {rng.randrange(17)}"  # a few unknown names
+        quantity = rng.randint(1, 10) if rng.random() < 0.8 else -rng.randint(1, 5)  # corrections too
+        assert menu.apply_sale(name, quantity, rng.choice(["2024-01", "2024-02"])) == (name in menu.items_by_name)
+        totals = [sum(item.sales_history.values()) for item in menu.menu_items]
+        assert [item.total_sales for item in menu.menu_items] == totals
+        assert menu.max_sales == max(totals)
+
+
+def test_record_sale_uses_the_current_month():
+    menu = random_menu(22, count=3)
+    menu.record_sale("Item 1", 4)
+    menu.record_sale("Item 1")
+    menu.record_sale("Unknown", 2)
+    month = datetime.now().strftime("%Y-%m")
+    assert dict(menu.items_by_name["Item 1"].sales_history) == {month: 5}
+    assert menu.max_sales == 5
+
+
+def test_items_by_name_keeps_the_first_item_of_a_name():
+    menu = SeasonalMenu()
+    first, second = MenuItem("Soup", "first", 5.0, []), MenuItem("Soup", "second", 6.0, [])
+    first.sales_history["2024-01"] = 7
+    menu.add_item(first)
+    menu.add_item(second)
+    assert menu.items_by_name["Soup"] is first
+    assert first.total_sales == menu.max_sales == 7
+    menu.apply_sale("Soup", 1, "2024-02")
+    assert first.total_sales == 8 and second.total_sales == 0
@@ -0,0 +1,108 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+from main import RecommendationSystem
+from order_pipeline import OrderPipeline
+from seasonal_menu_items import MenuItem, Season, SeasonalMenu
+from server import RecommendationClient, RecommendationServer, Session
+
+
+@pytest.fixture
+def server():
+    system = RecommendationSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        system.add_cuisine("Italian")
+        system.add_cuisine("Mexican")
+        for name in ["ana", "bo"]:
+            system.addUser(name, f"{name}-pw", "addr", "Italian", "None")
+        for i in range(12):
+            system.addFood(f"Dish {i}", ["Italian", "Mexican"][i % 2], 300 + 10 * i, 10, 5, 20, [], [], "None", [],
+                           "lunch", "Sweet")
+    menu = SeasonalMenu()
+    menu.add_item(MenuItem("Soup", "", 5.0, [], seasons=list(Season)))
+    return RecommendationServer(system, menu)
+
+
+def test_commands_need_a_logged_in_session(server):
+    session = Session("peer")
+    assert server.execute(session, {"op": "order", "args": ["Dish 1", 1]}) == {"ok": False, "error": "User not logged in."}
+    assert not server.execute(session, {"op": "login", "args": ["ana", "wrong"]})["ok"]
+    response = server.execute(session, {"op": "login", "args": {"username": "ana", "password": "ana-pw"}})
+    assert response["ok"] and response["result"] == "ana" and session.user.name == "ana"
+    assert server.execute(session, {"op": "2", "args": ["Dish 1", 2]})["ok"]  # terminal menu number
+    assert server.execute(session, {"op": "logout"})["ok"] and session.user is None
+    assert not server.execute(session, {"op": "personalized"})["ok"]
+
+
+def test_invalid_requests_are_rejected(server):
+    session = Session("peer")
+    assert server.execute(session, {"op": "dance"})["error"] == "Unknown command 'dance'."
+    assert server.execute(session, {"op": "login", "args": ["ana"]})["error"].startswith("Invalid arguments")
+    assert server.execute(session, {"op": "login", "args": {"username": "ana"}})["error"].startswith("Invalid arguments")
+    server.execute(session, {"op": "login", "args": ["ana", "ana-pw"]})
+    assert server.execute(session, {"op": "rate", "args": ["Italian", "Dish 0", "five"]})["error"].startswith(
+        "Invalid arguments")
+
+
+def test_sessions_act_as_their_own_user(server):
+    system = server.system
+    ana, bo = Session("a"), Session("b")
+    server.execute(ana, {"op": "login", "args": ["ana", "ana-pw"]})
+    server.execute(bo, {"op": "login", "args": ["bo", "bo-pw"]})
+    for session, dish in [(ana, "Dish 1"), (bo, "Dish 2"), (ana, "Dish 3"), (bo, "Dish 2")]:
+        response = server.execute(session, {"op": "order", "args": {"dish": dish, "quantity": 1}})
+        assert response["ok"] and f"{session.user.name} Ordered {dish}" in response["output"]
+    assert system.logged_user is None  # the acting user is only set during a request
+    assert [name for name, _ in system.catalog.get_user("ana").order_history] == ["Dish 1", "Dish 3"]
+    assert [name for name, _ in system.catalog.get_user("bo").order_history] == ["Dish 2", "Dish 2"]
+    assert "Top Recommendations for bo" in server.execute(bo, {"op": "personalized"})["output"]
+
+
+def test_orders_go_through_the_pipeline(server):
+    system = server.system
+    system.order_pipeline = OrderPipeline(system, server.menu, lock=server.lock, batch_delay=0.01)
+    try:
+        session = Session("peer")
+        server.execute(session, {"op": "login", "args": ["ana", "ana-pw"]})
+        for i in range(20):
+            assert server.execute(session, {"op": "order", "args": [f"Dish {i % 4}", 1]})["ok"]
+        system.order_pipeline.flush()
+    finally:
+        system.order_pipeline.close()
+    assert system.popular_dishes == {f"Dish {i}": 5 for i in range(4)}
+    assert system.order_pipeline.stats["orders"] == 20
+
+
+def test_concurrent_clients_over_a_socket(server):
+    async def scenario():
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            clients = [await RecommendationClient.connect("127.0.0.1", port) for _ in range(2)]
+            try:
+                for client, name in zip(clients, ["ana", "bo"]):
+                    assert (await client.call("login", name, f"{name}-pw"))["ok"]
+                assert len(server.sessions) == 2
+
+                async def orders(client, dish):
+                    return [await client.call("order", dish, 1) for _ in range(10)]
+                results = await asyncio.gather(orders(clients[0], "Dish 4"), orders(clients[1], "Dish 5"))
+                assert all(response["ok"] for responses in results for response in responses)
+                seasonal = await clients[0].call("seasonal")
+                assert seasonal["ok"] and seasonal["result"][0]["name"] == "Soup"
+                malformed = await clients[1].call("cuisine")
+                assert not malformed["ok"]
+            finally:
+                for client in clients:
+                    await client.close()
+            for _ in range(100):  # the server notices the closed connections
+                if not server.sessions:
+                    break
+                await asyncio.sleep(0.01)
+            assert not server.sessions
+    asyncio.run(scenario())
+    assert server.system.catalog.get_user("ana").order_history == [("Dish 4", 1)] * 10
+    assert server.system.catalog.get_user("bo").order_history == [("Dish 5", 1)] * 10
@@ -0,0 +1,159 @@
+import contextlib
+import heapq
+import io
+import random
+
+import pytest
+
+from main import RecommendationSystem
+from sharding import SharedCatalog, ShardedRecommender, shard_of
+
+CUISINES = ["Italian", "Mexican"]
+
+
+@pytest.fixture(scope="module")
+def system():
+    rng = random.Random(4)
+    system = RecommendationSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cuisine in CUISINES:
+            system.add_cuisine(cuisine)
+        for name, diet in [("ana", "Vegan"), ("bo", "None"), ("cy", "Vegetarian")]:
+            system.addUser(name, "p", "a", "Italian", diet)
+        for i in range(80):
+            system.addFood(f"Dish {i}", CUISINES[i % 2], rng.randint(100, 900), rng.randint(1, 40), rng.randint(1, 40),
+                           rng.randint(1, 80), ["Vitamin C"] * rng.randint(0, 3), ["Iron"] * rng.randint(0, 3),
+                           rng.choice(["Vegan", "Vegetarian", "None"]), [], "lunch", "Sweet")
+        for user in system.users[:2]:
+            system.logged_user = user
+            for _ in range(10):
+                system.order_food(f"Dish {rng.randrange(80)}", 1)
+        system.logged_user = None
+    return system
+
+
+@pytest.fixture(scope="module")
+def sharded(system):
+    sharded = ShardedRecommender(system, workers=2)
+    yield sharded
+    sharded.close()
+
+
+def test_shared_catalog_mirrors_the_catalog(system):
+    catalog = SharedCatalog.create(system)
+    try:
+        assert len(catalog) == len(system.food_items)
+        assert [catalog.name(food_id) for food_id in range(len(catalog))] == [food.name for food in system.food_items]
+        scores = [food.nutrition_score for food in system.food_items]
+        expected = sorted((food_id for food_id, score in enumerate(scores) if 20 <= score <= 60), key=scores.__getitem__)
+        assert [scores[food_id] for food_id in catalog.in_score_range(20, 60)] == [scores[food_id] for food_id in expected]
+    finally:
+        catalog.close()
+
+
+def test_shard_of_is_stable():
+    assert shard_of("ana", 4) == shard_of("ana", 4)
+    assert {shard_of(f"user {i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+def test_unknown_users_are_rejected(sharded):
+    assert sharded.run([("order", "ghost", ("Dish 1", 1)), ("personalized", "ghost", ()), ("nutrition", "ghost", ()),
+                        ("cuisine", "ghost", ("Italian",))]) == [False, False, False, False]
+    assert sharded.call("order", "ana", "No such dish", 1) is False
+    assert sharded.call("cuisine", "ana", "No such cuisine") is False
+
+
+def test_nutrition_matches_the_single_process_recommender(system, sharded):
+    for user in system.users:
+        edges = list(system.graph.edges(user))
+        count = sum(weight for _, weight in edges)
+        expected = []
+        if count:
+            average = sum(food.nutrition_score * weight for food, weight in edges) / count
+            mask = system.dietary_filter.user_mask(user)
+            expected = [food.name for food in system.food_items if average - 15 <= food.nutrition_score <= average + 15
+                        and system.dietary_filter.allows(food.name, mask)]
+        assert sorted(sharded.call("nutrition", user.name)) == sorted(expected)
+
+
+def test_cuisine_listing_reads_the_aggregated_ratings_written_by_the_router(system, sharded):
+    rng = random.Random(5)
+    given = {}  # (user, dish) : latest rating
+    for _ in range(300):
+        user, food = rng.choice(system.users), rng.choice(system.food_items)
+        rating = rng.randint(1, 5)
+        assert sharded.rate(user.name, food.name, rating) is True
+        given[(user.name, food.name)] = rating
+    assert sharded.rate("ghost", "Dish 1", 5) is False and sharded.rate("ana", "No such dish", 5) is False
+    ratings = {}
+    for food in system.food_items:
+        values = [rating for (_, name), rating in given.items() if name == food.name]
+        ratings[food.name] = (3.0 * 2 + sum(values)) / (2 + len(values)) if values else 0
+    shared = sharded.catalog.views["rating"]
+    assert [shared[food_id] for food_id in range(len(system.food_items))] == pytest.approx(
+        [ratings[food.name] for food in system.food_items])
+    assert [food.rating for food in system.food_items] == pytest.approx([ratings[food.name] for food in system.food_items])
+    for user in system.users:
+        mask = system.dietary_filter.user_mask(user)
+        candidates = [food.name for food in system.food_items
+                      if food.cuisine_type == "Mexican" and system.dietary_filter.allows(food.name, mask)]
+        expected = heapq.nlargest(5, candidates, key=ratings.__getitem__)
+        assert [ratings[name] for name in sharded.call("cuisine", user.name, "Mexican")] == \
+               pytest.approx([ratings[name] for name in expected])
+
+
+def test_orders_reach_the_worker_of_the_user(system, sharded):
+    mask = sharded.user_masks["cy"]
+    accept = lambda name: system.dietary_filter.allows(name, mask)
+    # Without orders the user gets the popular dishes it may eat
+    assert sharded.call("personalized", "cy") == sharded.popularity.top_k(5, accept)
+    dish = next(food.name for food in system.food_items if accept(food.name))
+    assert sharded.call("order", "cy", dish, 2) is True
+    assert sharded.call("personalized", "cy") == [dish]
+
+
+def test_exclusion_masks_wider_than_64_bits():
+    rng = random.Random(6)
+    system = RecommendationSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        system.add_cuisine("Italian")
+        for name in ["ana", "bo"]:
+            system.addUser(name, "p", "a", "Italian", "None")
+        for i in range(70):  # 70 allergens need 140 bit masks
+            system.addFood(f"Dish {i}", "Italian", rng.randint(100, 900), 10, 10, 10, [], [], "None",
+                           [f"Allergen {i}", f"Allergen {rng.randrange(70)}"], "lunch", "Sweet")
+    system.users[0].allergens = ["Allergen 3", "Allergen 69"]
+    system.users[1].allergens = ["Allergen 40"]
+    catalog = SharedCatalog.create(system)
+    try:
+        assert catalog.exclusion_words == 3
+        food_ids = list(range(len(catalog)))
+        for user in system.users:
+            mask = system.dietary_filter.user_mask(user)
+            assert [catalog.name(food_id) for food_id in catalog.allowed(food_ids, mask)] == [
+                food.name for food in system.food_items if system.dietary_filter.allows(food.name, mask)]
+    finally:
+        catalog.close()
+
+
+def test_failed_creation_unlinks_the_blocks(system, monkeypatch):
+    import sharding
+    created = []
+
+    class RecordingSharedMemory(sharding.shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self.name)
+
+    def failing_array(*args):
+        raise OverflowError("int too big to convert")
+
+    monkeypatch.setattr(sharding.shared_memory, "SharedMemory", RecordingSharedMemory)
+    monkeypatch.setattr(sharding, "array", failing_array)
+    with pytest.raises(OverflowError):
+        SharedCatalog.create(system)
+    assert len(created) == len(SharedCatalog.ARRAYS)
+    monkeypatch.undo()
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            sharding.shared_memory.SharedMemory(name=name)
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from similarity import DishSimilarityIndex, NUMERIC_FEATURES  # noqa: E402
+
+CUISINES = ["Italian", "Mexican", "Indian", "Thai"]
+MEALS = ["Breakfast", "lunch", "dinner", "snack"]
+TERMS = ["sweet", "spicy", "sour", "savory", "earthy"]
+
+
+def random_dishes(seed, count, start=0, terms=TERMS):
+    rng = random.Random(seed)
+    return [(f"Dish {i}", rng.choice(CUISINES), rng.choice(MEALS), rng.sample(terms, rng.randint(1, 2)),
+             [rng.randint(100, 900), rng.randint(1, 40), rng.randint(1, 40), rng.randint(1, 80), rng.randint(0, 3),
+              rng.randint(0, 2), rng.uniform(0, 300)]) for i in range(start, start + count)]
+
+
+def add(index, dishes, defer=False):
+    for name, cuisine, meal, terms, numeric in dishes:
+        index.add(name, cuisine, meal, terms, *numeric, defer=defer)
+
+
+def reference_vectors(dishes):
+    """Feature rows computed from scratch: standardized numbers and weighted one-hot categories, L2-normalized."""
+    numeric = np.array([dish[4] for dish in dishes], dtype=np.float64)
+    scale = numeric.std(axis=0)
+    scale[scale == 0] = 1
+    rows = [list((numeric[i] - numeric.mean(axis=0)) / scale) for i in range(len(dishes))]
+    columns = {}
+    for (_, cuisine, meal, terms, _), row in zip(dishes, rows):
+        for key, weight in [(("cuisine", cuisine), 1.0), (("meal", meal.lower()), 0.7)] + [(("flavor", term), 0.7)
+                                                                                           for term in terms]:
+            columns.setdefault(key, len(columns))
+    vectors = np.zeros((len(dishes), len(NUMERIC_FEATURES) + len(columns)))
+    for i, (_, cuisine, meal, terms, _) in enumerate(dishes):
+        vectors[i, :len(NUMERIC_FEATURES)] = rows[i]
+        vectors[i, len(NUMERIC_FEATURES) + columns[("cuisine", cuisine)]] = 1.0
+        vectors[i, len(NUMERIC_FEATURES) + columns[("meal", meal.lower())]] = 0.7
+        for term in terms:
+            vectors[i, len(NUMERIC_FEATURES) + columns[("flavor", term)]] = 0.7
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def best_scores(similarity, dish, k):
+    scores = np.delete(similarity[dish], dish)
+    return sorted(scores, reverse=True)[:k]
+
+
+def test_build_matches_brute_force_cosine_neighbours():
+    dishes = random_dishes(36, 150)
+    index = DishSimilarityIndex(neighbours=8, block=32)
+    add(index, dishes)
+    index.build()
+    similarity = reference_vectors(dishes) @ reference_vectors(dishes).T
+    for dish in range(len(dishes)):
+        assert index.neighbour_scores[dish] == pytest.approx(best_scores(similarity, dish, 8), abs=1e-5)
+        assert [similarity[dish, other] for other in index.neighbour_ids[dish]] == pytest.approx(
+            index.neighbour_scores[dish], abs=1e-5)
+        assert dish not in index.neighbour_ids[dish]
+
+
+def test_incremental_adds_keep_the_neighbour_lists_exact():
+    dishes = random_dishes(37, 60)
+    index = DishSimilarityIndex(neighbours=6)
+    add(index, dishes)
+    index.build()
+    # Below twice the built size: indexed one by one, including new one-hot columns that grow the buffer
+    more = random_dishes(38, 50, start=60, terms=TERMS + ["smoky", "umami", "herbal"])
+    add(index, more)
+    assert index.built_size == 60 and index.ready
+    matrix = index.matrix.astype(np.float64)
+    similarity = matrix @ matrix.T
+    for dish in range(110):
+        assert index.neighbour_scores[dish] == pytest.approx(best_scores(similarity, dish, 6), abs=1e-5)
+    add(index, random_dishes(39, 20, start=110))  # doubling triggers a full rebuild
+    assert index.built_size == 120 and index.ready
+
+
+def test_deferred_dishes_wait_for_the_next_build():
+    dishes = random_dishes(40, 40)
+    index = DishSimilarityIndex(neighbours=5)
+    add(index, dishes[:20])
+    index.build()
+    index.add_many(dishes[20:30])
+    add(index, dishes[30:], defer=True)
+    assert not index.ready and len(index) == 40
+    assert index.similar_dishes("Dish 25") == [] and index.similar_dishes("Dish 35") == []
+    assert len(index.similar_dishes("Dish 3")) == 5
+    index.build()
+    rebuilt = DishSimilarityIndex(neighbours=5)
+    add(rebuilt, dishes)
+    rebuilt.build()
+    assert index.ready and index.neighbour_ids == rebuilt.neighbour_ids
+    assert np.array_equal(index.matrix, rebuilt.matrix)
+
+
+def test_similar_dishes_with_a_filter_scans_past_the_neighbour_lists():
+    dishes = random_dishes(41, 80)
+    index = DishSimilarityIndex(neighbours=4)
+    add(index, dishes)
+    index.build()
+    matrix = index.matrix.astype(np.float64)
+    accept = lambda name: int(name.split()[1]) % 5 == 0
+    for dish in [0, 7, 33]:
+        scores = matrix @ matrix[dish]
+        ranked = [other for other in np.argsort(-scores, kind="stable") if other != dish]
+        expected = [index.names[other] for other in ranked if accept(index.names[other])][:6]
+        result = index.similar_dishes(index.names[dish], 6, accept)
+        assert [scores[index.ids[name]] for name in result] == pytest.approx(
+            [scores[index.ids[name]] for name in expected], abs=1e-5)
+        assert all(accept(name) for name in result)
+        assert index.similar_dishes(index.names[dish], 3) == [index.names[other] for other in index.neighbour_ids[dish][:3]]
+    assert index.similar_dishes("Unknown") == []
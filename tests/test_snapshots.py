@@ -0,0 +1,196 @@
+import contextlib
+import io
+import random
+import threading
+import time
+
+import pytest
+
+from main import RecommendationSystem
+from snapshots import VersionedSystem
+
+CUISINES = ["Italian", "Mexican", "Indian"]
+
+
+def food_record(i, rng):
+    return dict(name=f"Dish {i}", cuisine_type=rng.choice(CUISINES), calories=rng.randint(100, 900),
+                proteins=rng.randint(1, 40), fats=rng.randint(1, 40), carbohydrates=rng.randint(1, 80),
+                vitamins=["Vitamin C"] * rng.randint(0, 2), minerals=["Iron"] * rng.randint(0, 2),
+                dietary_restrictions=rng.choice(["Vegan", "Vegetarian", "None"]),
+                allergens=rng.choice([[], ["Nuts"], ["Dairy"]]), meal_type=rng.choice(["lunch", "dinner"]),
+                flavor_profile=rng.choice(["Spicy", "Sweet and Sour", "Savory"]))
+
+
+def build_system(n_foods=60, seed=0):
+    rng = random.Random(seed)
+    system = RecommendationSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cuisine in CUISINES:
+            system.add_cuisine(cuisine)
+        system.add_users_bulk([
+            dict(name="ana", password="p", address="a", fav_cuisine="Italian", dietary_pref="Vegan",
+                 allergens=["Nuts", "Shellfish"]),  # no dish has shellfish
+            dict(name="bo", password="p", address="b", fav_cuisine="Mexican", dietary_pref="None")])
+        system.add_foods_bulk(food_record(i, rng) for i in range(n_foods))
+        now = time.time()
+        system.add_offers("Dish 1", "10% off", now - 60, now + 3600)
+        system.add_offers("Dish 2", "free drink", now + 0.2, now + 3600)  # starts while the readers run
+    return system
+
+
+@pytest.fixture
+def versioned():
+    versioned = VersionedSystem(build_system())
+    yield versioned
+    versioned.close()
+
+
+def read_everything(view):
+    view.cuisine_based_recommendations("Italian")
+    view.offer_recommendation()
+    view.similar_dishes("Dish 3")
+    view.pair_recommendations("Dish 4")
+    view.popular_dishes_recommendation()
+    return sum(view.popular_dishes.values())
+
+
+def run_readers(versioned, count, body):
+    errors = []
+
+    def reader(user_name):
+        try:
+            body(user_name)
+        except Exception as error:  # reported by the test thread
+            errors.append(error)
+
+    threads = [threading.Thread(target=reader, args=(["ana", "bo"][index % 2],)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, errors
+
+
+def test_concurrent_readers_see_consistent_versions_while_orders_are_applied(versioned):
+    orders = 300
+    stop = threading.Event()
+
+    def body(user_name):
+        seen = 0
+        while not stop.is_set():
+            with versioned.read(user_name) as view:
+                total = read_everything(view)
+                time.sleep(0)  # let the writer publish in the middle of the read
+                assert sum(view.popular_dishes.values()) == total  # the version does not change under a reader
+                assert total >= seen  # and versions only move forward
+                seen = total
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        threads, errors = run_readers(versioned, 6, body)
+        rng = random.Random(1)
+        for _ in range(orders):
+            versioned.submit_order(rng.choice(["ana", "bo"]), f"Dish {rng.randrange(60)}", 1)
+        versioned.flush()
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert not errors, errors
+    with versioned.read() as view:
+        assert sum(view.popular_dishes.values()) == orders
+
+
+def test_reads_do_not_modify_the_published_replica(versioned):
+    time.sleep(0.3)  # the second offer is now due, but no write advanced the offer index
+    replica = versioned._published[1]
+    allergens = len(replica.dietary_filter.allergen_bits)
+    starts, active = list(replica.offer_index.starts), list(replica.offer_index.active)
+    stop = threading.Event()
+
+    def body(user_name):
+        while not stop.is_set():
+            with versioned.read(user_name) as view:
+                read_everything(view)
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        threads, errors = run_readers(versioned, 4, body)
+        time.sleep(0.5)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert not errors, errors
+    assert not replica.cache.entries and not replica.dietary_filter.user_masks
+    assert len(replica.dietary_filter.allergen_bits) == allergens
+    assert replica.offer_index.starts == starts and replica.offer_index.active == active
+    assert "free drink" in output.getvalue()  # the started offer is listed all the same
+
+
+def test_writer_publishes_both_replicas_identically(versioned):
+    with contextlib.redirect_stdout(io.StringIO()):
+        with versioned.read() as view:
+            first_version = versioned.version
+        versioned.submit_order("ana", "Dish 5", 2)
+        versioned.submit_rating("bo", "Italian", "Dish 7", 4)
+        versioned.flush()
+    assert versioned.version > first_version
+    left, right = versioned._replicas
+    assert left is not right
+    assert left.popular_dishes == right.popular_dishes == {"Dish 5": 2}
+    assert left.cache.versions == right.cache.versions
+    assert left.similarity.ready and right.similarity.ready
+
+
+def offer_state(system):
+    index = system.offer_index
+    return ({name: (offer.text, offer.start, offer.end) for name, offer in index.offers.items()}, list(index.active),
+            sorted((start, offer.food.name) for start, _, offer in index.starts),
+            {food.name: food.promotion for food in system.food_items})
+
+
+def arrival_state(system):
+    rings = [system.new_arrivals.all] + [system.new_arrivals.by_cuisine[cuisine]
+                                         for cuisine in sorted(system.new_arrivals.by_cuisine)]
+    return [(list(ring.names), list(ring.times), ring.head, ring.size) for ring in rings]
+
+
+def test_new_dishes_and_offers_are_identical_on_both_replicas(versioned):
+    rng = random.Random(8)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(60, 70):
+            versioned.submit_food(*food_record(i, rng).values())
+            time.sleep(0.002)  # the two replicas apply each batch at different times
+        now = time.time()
+        versioned.submit_offer("Dish 61", "new dish", now - 1, now + 60)
+        versioned.submit_offer("Dish 3", "ending soon", now - 60, now + 0.05)
+        versioned.submit_offer("Dish 4", "later", now + 3600)
+        time.sleep(0.1)
+        versioned.submit_offer("Dish 62", "started")  # advances the index past the end of "ending soon"
+        record = list(food_record(70, rng).values())
+        versioned.submit(lambda system: system.addFood(*record, timestamp=now))
+        versioned.flush()
+    left, right = versioned._replicas
+    assert len(left.food_items) == len(right.food_items) == 71
+    assert arrival_state(left) == arrival_state(right)
+    assert offer_state(left) == offer_state(right)
+    assert "Dish 3" not in left.offer_index.offers and left.catalog.get_food("Dish 62").promotion == "started"
+    assert left.cache.versions == right.cache.versions
+    with pytest.raises(ValueError):
+        versioned.submit_offer("Dish 5", "backwards", now, now - 1)
+
+
+def listed(view, method, *args):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        method(view, *args)
+    return [line.split(". ", 1)[1] for line in output.getvalue().splitlines() if line[:1].isdigit()]
+
+
+def test_reload_resets_the_private_reader_caches(versioned):
+    with versioned.read("bo") as view:
+        before = listed(view, RecommendationSystem.cuisine_based_recommendations, "Italian")
+    with contextlib.redirect_stdout(io.StringIO()):
+        versioned.reload(build_system(seed=7))
+        versioned.flush()
+    with versioned.read("bo") as view:
+        after = listed(view, RecommendationSystem.cuisine_based_recommendations, "Italian")
+        expected = view.top_k("Italian", len(view.cuisines["Italian"]))
+    assert after == expected
+    assert before != after